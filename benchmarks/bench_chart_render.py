@@ -0,0 +1,131 @@
+"""
+Chart rendering: fresh figure + dpi=300 tight-bbox PNG vs pooled figures from tools/chart_renderer.
+
+    python benchmarks/bench_chart_render.py [--days 250] [--charts 8] [--workers 4]
+
+Every case draws chart_setup.create_stock_chart (close + MA lines, volume
+bars) for --days synthetic bars:
+
+    legacy     plt.style.use + plt.subplots + tight_layout, savefig(dpi=300,
+               bbox_inches='tight') PNG, plt.close (the old chart_setup path)
+    <target>/<fmt>  FIGURES-pooled figure, save_figure at the target's dpi
+    parallel   --charts download PNGs through render_many with --workers
+               processes vs the same charts in one process
+
+Per-chart time is the best of --repeat runs; sizes are of the written file.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from PIL import Image  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "findata-agent", "scripts"))
+
+from chart_setup import create_stock_chart  # noqa: E402
+from tools.chart_renderer import TARGETS, ChartJob, render_many, save_figure  # noqa: E402
+
+
+def bars(days: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, days)))
+    df = pd.DataFrame({"trade_date": pd.bdate_range("2015-01-05", periods=days),
+                       "close": close, "vol": rng.lognormal(11, 0.5, days)})
+    for n in (5, 20, 60):
+        df[f"ma{n}"] = df["close"].rolling(n).mean()
+    return df
+
+
+def legacy_chart(df: pd.DataFrame, path: str):
+    """The old chart_setup.create_stock_chart: style, new figure, tight bbox at 300 dpi."""
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
+    plt.rcParams['axes.unicode_minus'] = False
+    plt.style.use('seaborn-v0_8')
+    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+    ax1.plot(df['trade_date'], df['close'], label='收盘价', linewidth=2, color='blue')
+    for col, color in (('ma5', 'orange'), ('ma20', 'red'), ('ma60', 'green')):
+        ax1.plot(df['trade_date'], df[col], label=col.upper(), alpha=0.7, color=color)
+    ax1.set_title('股票价格走势', fontsize=16, fontweight='bold')
+    ax1.legend(loc='upper left')
+    ax2.bar(df['trade_date'], df['vol'], alpha=0.6, color='lightblue')
+    ax2.set_title('成交量', fontsize=14)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--charts", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", message="Glyph .* missing")  # hosts without SimHei
+
+    df = bars(args.days)
+    out = tempfile.mkdtemp(prefix="bench_charts_")
+    try:
+        create_stock_chart(df, pooled=True)  # warm the font cache and the pooled figure
+        rows = []
+        seconds, path = best_of(lambda: legacy_chart(df, os.path.join(out, "legacy.png")), args.repeat)
+        rows.append(("legacy", seconds, path))
+        for target in TARGETS:
+            for fmt in ("png", "webp", "svg"):
+                path = os.path.join(out, f"{target}.{fmt}")
+                seconds, path = best_of(lambda: save_figure(create_stock_chart(df, pooled=True), path, target=target),
+                                        args.repeat)
+                rows.append((f"{target}/{fmt}", seconds, path))
+
+        print(f"create_stock_chart, {args.days} bars")
+        print(f"{'case':<18}{'ms':>9}{'speedup':>9}{'KB':>9}{'pixels':>12}")
+        legacy_s = rows[0][1]
+        for case, seconds, path in rows:
+            pixels = "-"
+            if not path.endswith(".svg"):
+                with Image.open(path) as im:
+                    pixels = f"{im.width}x{im.height}"
+            print(f"{case:<18}{seconds * 1000:>9.0f}{legacy_s / seconds:>8.1f}x"
+                  f"{os.path.getsize(path) / 1024:>9.0f}{pixels:>12}")
+
+        jobs = [ChartJob(create_stock_chart, os.path.join(out, f"batch_{i}.png"),
+                         {"df": bars(args.days, i), "pooled": True})
+                for i in range(args.charts)]
+        t0 = time.perf_counter()
+        render_many(jobs, workers=1)
+        serial_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        timings = render_many(jobs, workers=args.workers)
+        parallel_s = time.perf_counter() - t0
+        assert not any(t["error"] for t in timings), timings
+        print(f"\n{args.charts} charts: 1 process {serial_s:.2f} s, {args.workers} processes {parallel_s:.2f} s "
+              f"({os.cpu_count()} CPUs)")
+        print(pd.DataFrame(timings)[["path", "build_ms", "save_ms", "bytes", "pid"]]
+              .assign(path=lambda t: t["path"].map(os.path.basename)).round(1).to_string(index=False))
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
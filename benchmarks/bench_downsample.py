@@ -0,0 +1,101 @@
+"""
+Long-range charts: drawing every point vs pixel-bucket downsampling (tools/downsample).
+
+    python benchmarks/bench_downsample.py [--sizes 250,2500,25000,250000] [--full-max 25000]
+
+For each series length a close + MA20 + volume chart is drawn two ways on a
+pooled 12x10 inch figure and saved as a download PNG:
+
+    full        ax.plot / ax.bar over every point (the old create_stock_chart),
+                run only up to --full-max points (bars get slow)
+    downsample  chart_setup.create_stock_chart (plot_series / bar_series)
+
+"shape" renders the close line alone both ways and reports the share of
+pixels that differ, i.e. how much of the picture the downsample changes.
+annotate: the old "every len/10-th row" loop vs annotate_peaks.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import warnings
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "findata-agent", "scripts"))
+
+from chart_setup import create_stock_chart  # noqa: E402
+from tools.chart_renderer import FIGURES, TARGETS  # noqa: E402
+from tools.downsample import annotate_peaks, plot_series  # noqa: E402
+
+
+def bars(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    df = pd.DataFrame({"trade_date": pd.date_range("2000-01-03", periods=n, freq="min"),
+                       "close": close, "vol": rng.lognormal(11, 0.5, n)})
+    df["ma20"] = df["close"].rolling(20).mean()
+    return df
+
+
+def full_chart(df: pd.DataFrame):
+    fig, (ax1, ax2) = FIGURES.subplots(2, 1, figsize=(12, 10))
+    ax1.plot(df['trade_date'], df['close'], label='收盘价', linewidth=2, color='blue')
+    ax1.plot(df['trade_date'], df['ma20'], label='MA20', alpha=0.7, color='red')
+    ax1.legend(loc='upper left')
+    ax2.bar(df['trade_date'], df['vol'], alpha=0.6, color='lightblue')
+    return fig
+
+
+def draw(fig) -> np.ndarray:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="rgba", dpi=TARGETS["download"])
+    return np.frombuffer(buf.getvalue(), dtype=np.uint8)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def line_only(df, downsample: bool):
+    fig, ax = FIGURES.subplots(figsize=(12, 5))
+    (plot_series if downsample else type(ax).plot)(ax, df['trade_date'], df['close'], linewidth=1, color='blue')
+    ax.set_xlim(df['trade_date'].iloc[0], df['trade_date'].iloc[-1])
+    return draw(fig)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="250,2500,25000,250000")
+    parser.add_argument("--full-max", type=int, default=25000)
+    args = parser.parse_args(argv)
+    warnings.filterwarnings("ignore", message="Glyph .* missing")  # hosts without SimHei
+
+    create_stock_chart(bars(100), pooled=True)  # warm fonts and the pooled figures
+    print(f"{'points':>10}{'full s':>10}{'downsample s':>14}{'speedup':>9}{'shape diff':>12}{'annotate ms':>20}")
+    for n in (int(s) for s in args.sizes.split(",")):
+        df = bars(n)
+        down_s, _ = timed(lambda: draw(create_stock_chart(df, pooled=True)))
+        full_s = timed(lambda: draw(full_chart(df)))[0] if n <= args.full_max else float("nan")
+        diff = np.mean(line_only(df, False) != line_only(df, True))
+
+        fig, ax = FIGURES.subplots(figsize=(12, 5))
+        loop_s, _ = timed(lambda: [ax.annotate(f'{v:.1f}', (d, v), textcoords="offset points", xytext=(0, 10))
+                                   for i, (d, v) in enumerate(zip(df['trade_date'], df['close']))
+                                   if i % max(1, n // 10) == 0])
+        fig, ax = FIGURES.subplots(figsize=(12, 5))
+        peak_s, _ = timed(lambda: annotate_peaks(ax, df['trade_date'], df['close'], k=10))
+        print(f"{n:>10,}{full_s:>10.2f}{down_s:>14.2f}{full_s / down_s:>8.1f}x{diff:>11.2%}"
+              f"{loop_s * 1000:>10.1f} -> {peak_s * 1000:>5.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Encode/decode throughput of the agent event stream encodings.
+
+    python benchmarks/bench_event_codec.py [--events 10000] [--repeat 5]
+
+The event mix mirrors a typical run: mostly streamed thought deltas/frames,
+a few code executions, usage and the final result.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from core.event_stream import EventDecoder, available_encodings, encode_event  # noqa: E402
+
+CODE = "import pandas as pd\ndf = pro.daily(ts_code='600519.SH', start_date='20240101')\nprint(df.head())\n"
+
+
+def make_events(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    words = ["分析", "数据", "pro.daily", "ts_code", "收盘价", "plot", "DataFrame", "\n", "```python\n", "  "]
+    events = []
+    for i in range(count):
+        r = rnd.random()
+        if r < 0.85:
+            text = "".join(rnd.choice(words) for _ in range(rnd.randint(1, 24)))
+            events.append({"type": "thought_stream", "content": text, "n": rnd.randint(1, 12)})
+        elif r < 0.92:
+            events.append({"type": "thought", "content": f"正在思考第 {i} 步..."})
+        elif r < 0.97:
+            events.append({"type": "execution", "content": CODE})
+        elif r < 0.99:
+            events.append({"type": "usage", "content": {"prompt_tokens": 2400, "completion_tokens": 310,
+                                                        "cached_tokens": 2048, "ttft": 0.41}})
+        else:
+            events.append({"type": "result", "success": True, "data": "完成，文件已保存到 workspace/exports/a.xlsx"})
+    return events
+
+
+def bench(encoding: str, events, repeat: int):
+    enc_best = dec_best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        chunks = [encode_event(ev, encoding) for ev in events]
+        enc_best = min(enc_best, time.perf_counter() - t0)
+
+        decoder = EventDecoder(encoding)
+        t0 = time.perf_counter()
+        decoded = []
+        for chunk in chunks:
+            decoded.extend(decoder.feed(chunk))
+        dec_best = min(dec_best, time.perf_counter() - t0)
+
+        size = sum(len(c.encode("utf-8")) if isinstance(c, str) else len(c) for c in chunks)
+        assert decoded == events, f"{encoding}: roundtrip mismatch"
+    return enc_best, dec_best, size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    events = make_events(args.events)
+    per = 10_000 / args.events
+    print(f"{args.events} events, best of {args.repeat}; times are per 10k events")
+    print(f"{'encoding':<10}{'encode ms':>12}{'decode ms':>12}{'bytes':>12}{'enc ev/s':>14}{'dec ev/s':>14}")
+    for encoding in available_encodings():
+        enc, dec, size = bench(encoding, events, args.repeat)
+        print(f"{encoding:<10}{enc * 1000 * per:>12.2f}{dec * 1000 * per:>12.2f}{size:>12}"
+              f"{args.events / enc:>14,.0f}{args.events / dec:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
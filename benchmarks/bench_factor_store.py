@@ -0,0 +1,109 @@
+"""
+Cross-sectional screen: joining stored snapshots at query time vs the precomputed factor table.
+
+    python benchmarks/bench_factor_store.py [--symbols 5000] [--days 300] [--repeat 5]
+
+A temporary market store (daily + daily_basic) is filled with synthetic
+snapshots, then the screen "pe_ttm < 15 and ret_20 > 10" runs two ways:
+
+    join     MARKET.daily over the last 21 days, pivot closes, merge the
+             latest daily_basic, filter (what a script does without factors)
+    factors  FACTORS.screen on the latest factor partition (cold and warm)
+
+Also reported: the full backfill and the nightly one-day increment of
+`FactorStore.build`.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from tools.factor_store import FactorStore  # noqa: E402
+from tools.market_store import MarketStore  # noqa: E402
+
+SCREEN = "pe_ttm < 15 and ret_20 > 10"
+
+
+def fill_stores(root: str, symbols: int, days: int, seed: int = 0):
+    """Synthetic pro.daily / pro.daily_basic snapshots, one partition per day."""
+    rng = np.random.default_rng(seed)
+    codes = np.array([f"{i:06d}.{'SH' if i % 2 else 'SZ'}" for i in range(symbols)], dtype=object)
+    dates = pd.bdate_range("2023-01-03", periods=days).strftime("%Y%m%d")
+    daily, basic = MarketStore(os.path.join(root, "daily")), MarketStore(os.path.join(root, "daily_basic"))
+    close = rng.lognormal(2.5, 0.8, symbols)
+    eps = close / rng.uniform(5, 60, symbols)
+    shares = rng.lognormal(11, 1.0, symbols)
+    for day in dates:
+        pct = np.clip(rng.normal(0.0005, 0.025, symbols), -0.1, 0.1)
+        pre_close, close = close, np.round(close * (1 + pct), 2)
+        vol = np.round(rng.lognormal(11, 1.0, symbols), 2)
+        daily.write_day(day, pd.DataFrame({
+            "ts_code": codes, "open": pre_close, "high": close * 1.01, "low": close * 0.99, "close": close,
+            "pre_close": pre_close, "change": close - pre_close, "pct_chg": np.round(pct * 100, 4),
+            "vol": vol, "amount": np.round(vol * close / 10, 3)}))
+        basic.write_day(day, pd.DataFrame({
+            "ts_code": codes, "close": close, "turnover_rate": vol * 100 / shares, "volume_ratio": 1.0,
+            "pe": close / eps, "pe_ttm": close / eps, "pb": close / eps / 8, "ps_ttm": close / eps / 5,
+            "dv_ttm": 1.0, "total_mv": close * shares, "circ_mv": close * shares * 0.8}))
+    return daily, basic
+
+
+def join_screen(daily: MarketStore, basic: MarketStore):
+    days = daily.dates()[-21:]
+    bars = daily.daily(start_date=days[0], end_date=days[-1], fields="ts_code,trade_date,pct_chg")
+    growth = (1 + bars.pivot(index="trade_date", columns="ts_code", values="pct_chg").iloc[1:] / 100).prod()
+    ret = ((growth - 1) * 100).rename("ret_20").reset_index()
+    latest = basic.daily(trade_date=days[-1], fields="ts_code,pe_ttm")
+    return ret.merge(latest, on="ts_code").query(SCREEN)
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    root = tempfile.mkdtemp(prefix="bench_factors_")
+    try:
+        daily, basic = fill_stores(root, args.symbols, args.days)
+        factors = FactorStore(daily, basic)
+        last = daily.dates()[-1]
+        backfill = factors.build(end_date=daily.dates()[-2], progress=lambda *a: None)
+        nightly = factors.build(progress=lambda *a: None)
+
+        joined = join_screen(daily, basic)
+        screened = FactorStore(daily, basic).screen(SCREEN)
+        assert set(joined["ts_code"]) == set(screened["ts_code"]), "screens disagree"
+
+        print(f"{args.symbols:,} symbols x {args.days} days; screen: {SCREEN!r} -> {len(screened)} symbols on {last}")
+        print(f"build: backfill {backfill['written']} days {backfill['seconds']:.2f} s, "
+              f"nightly 1 day {nightly['seconds'] * 1000:.0f} ms")
+        join_s = best_of(lambda: join_screen(daily, basic), args.repeat)
+        cold_s = best_of(lambda: FactorStore(daily, basic).screen(SCREEN), args.repeat)
+        warm_s = best_of(lambda: factors.screen(SCREEN), args.repeat)
+        print(f"{'case':<16}{'ms':>10}{'speedup':>10}")
+        for case, seconds in (("join", join_s), ("factors cold", cold_s), ("factors warm", warm_s)):
+            print(f"{case:<16}{seconds * 1000:>10.1f}{join_s / seconds:>9.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Memory of a whole-market daily history under each dtype policy (tools/frame_dtypes).
+
+    python benchmarks/bench_frame_dtypes.py [--symbols 5000] [--days 250]
+
+Each variant runs in a fresh interpreter that "fetches" one pro.daily
+snapshot per trading day (object ts_code / YYYYMMDD strings, float64
+numbers, as Tushare returns them) and concatenates them:
+
+    raw      concat as returned
+    legacy   raw + pd.to_numeric per column + pd.to_datetime (what scripts did)
+    lean     normalize_frame per day at fetch time, concat_frames
+    compact  lean + sorted categorical ts_code + float32 where values allow
+    int32    compact with int32 YYYYMMDD dates
+    arrow    compact with ArrowDtype columns
+
+Reported: peak RSS of the process (ru_maxrss) and the final frame's
+memory_usage(deep=True).
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT)
+
+VARIANTS = ("raw", "legacy", "lean", "compact", "int32", "arrow")
+PRICE_COLUMNS = ["open", "high", "low", "close", "pre_close", "change", "pct_chg"]
+
+
+def fetch_day(codes, day: str, rng):
+    """One pro.daily(trade_date=day) snapshot with Tushare's wire types."""
+    import numpy as np
+    import pandas as pd
+
+    n = len(codes)
+    close = np.round(rng.lognormal(2.5, 0.8, n), 2)
+    pre_close = np.round(close / (1 + rng.normal(0, 0.02, n)), 2)
+    vol = np.round(rng.lognormal(11, 1.0, n), 2)
+    records = {
+        "ts_code": np.array(codes, dtype=object),
+        "trade_date": np.array([day] * n, dtype=object),
+        "open": np.round(pre_close * (1 + rng.normal(0, 0.01, n)), 2),
+        "high": np.round(close * 1.01, 2),
+        "low": np.round(close * 0.99, 2),
+        "close": close,
+        "pre_close": pre_close,
+        "change": np.round(close - pre_close, 2),
+        "pct_chg": np.round((close / pre_close - 1) * 100, 4),
+        "vol": vol,
+        "amount": np.round(vol * close / 10, 3),
+    }
+    return pd.DataFrame(records).astype({"ts_code": object, "trade_date": object})
+
+
+def run_variant(variant: str, symbols: int, days: int):
+    import numpy as np
+    import pandas as pd
+
+    from tools.frame_dtypes import concat_frames, normalize_frame
+
+    rng = np.random.default_rng(0)
+    codes = [f"{i:06d}.{'SH' if i % 2 else 'SZ'}" for i in range(symbols)]
+    dates = pd.bdate_range("2023-01-03", periods=days).strftime("%Y%m%d")
+    level = {"int32": "compact"}.get(variant, variant)
+    t0 = time.perf_counter()
+    frames = []
+    for day in dates:
+        df = fetch_day(codes, day, rng)
+        if variant in ("raw", "legacy"):
+            frames.append(df)
+        else:
+            frames.append(normalize_frame(df, "daily", level, dates="int32" if variant == "int32" else "datetime"))
+    if variant in ("raw", "legacy"):
+        df = pd.concat(frames, ignore_index=True)
+    else:
+        df = concat_frames(frames)
+    del frames
+    if variant == "legacy":
+        for col in PRICE_COLUMNS + ["vol", "amount"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df["trade_date"] = pd.to_datetime(df["trade_date"], format="%Y%m%d")
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    frame_bytes = int(df.memory_usage(deep=True).sum())
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"variant": variant, "rows": len(df), "frame_mb": frame_bytes / 2 ** 20,
+                      "peak_rss_mb": peak_kb / 1024, "seconds": elapsed,
+                      "dtypes": {c: str(t) for c, t in df.dtypes.items()}}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.variant:
+        run_variant(args.variant, args.symbols, args.days)
+        return
+
+    print(f"{args.symbols} symbols x {args.days} days = {args.symbols * args.days:,} rows")
+    print(f"{'variant':<10}{'frame MB':>10}{'peak RSS MB':>13}{'fetch+convert s':>17}")
+    base = None
+    for variant in VARIANTS:
+        out = subprocess.run([sys.executable, __file__, "--variant", variant, "--symbols", str(args.symbols),
+                              "--days", str(args.days)], capture_output=True, text=True, cwd=ROOT)
+        if out.returncode != 0:
+            print(f"{variant:<10} failed: {out.stderr.strip().splitlines()[-1] if out.stderr.strip() else ''}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        base = base or r
+        print(f"{variant:<10}{r['frame_mb']:>10.1f}{r['peak_rss_mb']:>13.1f}{r['seconds']:>17.2f}"
+              f"   ({base['frame_mb'] / r['frame_mb']:.1f}x smaller frame)")
+
+
+if __name__ == "__main__":
+    main()
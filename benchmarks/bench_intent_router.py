@@ -0,0 +1,84 @@
+"""
+Template fast path: routing decisions and scoring time of core/intent_router.
+
+    python benchmarks/bench_intent_router.py [--repeat 200]
+
+CASES is the regression list: each intent with the template it must route
+to (None = must go to the LLM) and the parameters it must carry. Requests
+the templates cannot serve (dividends, PE, turnover, candlesticks, money
+flow, ...) must not route, and "X到Y" ranges must keep their end. Exits
+non-zero when any case disagrees.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from core.intent_router import IntentRouter  # noqa: E402
+
+TODAY = date(2026, 10, 19)
+
+CASES = [
+    # served by the templates
+    ("获取平安银行2023年的日线数据并画折线图", "stock_daily", {"start_date": "20230101", "end_date": "20231231", "outputs": ["chart"]}),
+    ("获取平安银行近一年的日线数据，导出Excel", "stock_daily", {"start_date": "20251019", "end_date": "20261019"}),
+    ("获取平安银行2023年1月到3月的日线", "stock_daily", {"start_date": "20230101", "end_date": "20230331"}),
+    ("获取平安银行2023年1月1日至15日的日线", "stock_daily", {"start_date": "20230101", "end_date": "20230115"}),
+    ("平安银行2023-01-05~2月28日日线 csv", "stock_daily", {"start_date": "20230105", "end_date": "20230228", "outputs": ["csv"]}),
+    ("平安银行2023年至今的日线导出到excel", "stock_daily", {"start_date": "20230101", "end_date": "20261019"}),
+    ("下载000001.SZ 20230101到20230331的行情", "stock_daily", {"ts_code": "000001.SZ", "end_date": "20230331"}),
+    ("获取中国2020年到2023年的GDP数据并画图", "macro_series", {"start": "2020Q1", "end": "2023Q4"}),
+    ("获取2023年CPI月度数据", "macro_series", {"start": "202301", "end": "202312"}),
+    # data the templates do not fetch
+    ("获取平安银行2023年1月的分红数据", None, {}),
+    ("平安银行 2023年1月 PE", None, {}),
+    ("平安银行2023年1月的换手率", None, {}),
+    ("获取平安银行2023年的日线并画K线图", None, {}),
+    ("平安银行2023年资金流向", None, {}),
+    ("平安银行2023年的成交量", None, {}),
+    ("平安银行2023年均线", None, {}),
+    ("平安银行月度行情", None, {}),
+    ("平安银行2023年周线", None, {}),
+    ("获取2023年CPI同比和PPI", None, {}),
+    ("对比平安银行和万科A 2023年走势", None, {}),
+    # ranges whose end cannot be read
+    ("获取平安银行2023年1月到三月的日线", None, {}),
+    ("平安银行2023年1月到的日线", None, {}),
+]
+
+
+def check(router: IntentRouter):
+    failures = []
+    for intent, template, params in CASES:
+        match = router.route(intent, TODAY)
+        got = match.template if match else None
+        wrong = {k: match.params.get(k) for k, v in params.items() if match.params.get(k) != v} if match else {}
+        if got != template or wrong:
+            failures.append((intent, template, got, wrong))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    router = IntentRouter()
+    failures = check(router)
+    t0 = time.perf_counter()
+    for _ in range(args.repeat):
+        for intent, _, _ in CASES:
+            router.score(intent, TODAY)
+    per_ms = (time.perf_counter() - t0) * 1000 / (args.repeat * len(CASES))
+
+    print(f"{len(CASES)} cases, {len(CASES) - len(failures)} as expected, score() {per_ms:.3f} ms per intent")
+    for intent, want, got, wrong in failures:
+        print(f"  MISMATCH {intent!r}: want {want}, got {got} {wrong or ''}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
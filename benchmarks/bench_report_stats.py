@@ -0,0 +1,118 @@
+"""
+Report statistics: the per-column pattern of the export scripts vs tools/report_stats.
+
+    python benchmarks/bench_report_stats.py [--rows 1000000] [--symbols 2000] [--repeat 3]
+
+"single" treats the whole frame as one report (what complete_stock_export.py
+does per stock); "panel" produces one report per ts_code, which the legacy
+scripts can only do by looping over groups.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from tools.report_stats import report_metrics, summary_stats  # noqa: E402
+
+COLUMNS = ["open", "high", "low", "close", "change", "pct_chg", "vol", "amount"]
+
+
+def make_panel(rows: int, symbols: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = -(-rows // symbols)
+    dates = pd.bdate_range("2000-01-03", periods=days)
+    df = pd.DataFrame({
+        "ts_code": np.repeat([f"{i:06d}.SZ" for i in range(symbols)], days)[:rows],
+        "trade_date": np.tile(dates, symbols)[:rows],
+    })
+    pct = rng.normal(0, 2, rows).round(2)
+    close = 10 * np.exp(np.cumsum(pct / 100))
+    df["pre_close"] = close / (1 + pct / 100)
+    df["close"] = close
+    df["open"] = df["pre_close"] * (1 + rng.normal(0, 0.01, rows))
+    df["high"] = np.maximum(df["open"], close) * (1 + rng.random(rows) * 0.02)
+    df["low"] = np.minimum(df["open"], close) * (1 - rng.random(rows) * 0.02)
+    df["change"] = close - df["pre_close"]
+    df["pct_chg"] = pct
+    df["vol"] = rng.integers(1_000, 1_000_000, rows).astype("float64")
+    df["amount"] = df["vol"] * close
+    return df
+
+
+def legacy_single(df: pd.DataFrame):
+    """What the export scripts did: one reduction per column and stat, boolean-mask copies for counts."""
+    summary = {
+        "latest": df["close"].iloc[-1], "first": df["close"].iloc[0],
+        "max_high": df["high"].max(), "min_low": df["low"].min(), "avg_close": df["close"].mean(),
+        "vol_sum": df["vol"].sum(), "vol_mean": df["vol"].mean(), "vol_max": df["vol"].max(),
+        "amount_sum": df["amount"].sum(), "amount_mean": df["amount"].mean(),
+        "volatility": df["pct_chg"].std(), "max_gain": df["pct_chg"].max(), "max_loss": df["pct_chg"].min(),
+        "up_days": len(df[df["pct_chg"] > 0]), "down_days": len(df[df["pct_chg"] < 0]),
+        "flat_days": len(df[df["pct_chg"] == 0]),
+    }
+    stats = pd.DataFrame({
+        "统计项": COLUMNS,
+        "平均值": [df[c].mean() for c in COLUMNS],
+        "最大值": [df[c].max() for c in COLUMNS],
+        "最小值": [df[c].min() for c in COLUMNS],
+        "标准差": [df[c].std() for c in COLUMNS],
+    })
+    return summary, stats
+
+
+def legacy_panel(df: pd.DataFrame):
+    return {code: legacy_single(part) for code, part in df.groupby("ts_code", sort=True)}
+
+
+def kernel_single(df: pd.DataFrame):
+    return report_metrics(df), summary_stats(df, COLUMNS, labels=True)
+
+
+def kernel_panel(df: pd.DataFrame):
+    return report_metrics(df, by="ts_code"), summary_stats(df, COLUMNS, by="ts_code", labels=True)
+
+
+def best_of(fn, df, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def check(df: pd.DataFrame):
+    """The kernel must agree with the legacy numbers."""
+    summary, stats = legacy_single(df)
+    metrics, kstats = kernel_single(df)
+    m = metrics.iloc[0]
+    for key in ("max_high", "min_low", "avg_close", "vol_sum", "volatility", "up_days", "down_days", "flat_days"):
+        assert np.isclose(m[key], summary[key]), key
+    assert np.isclose(m["last_close"], summary["latest"]) and np.isclose(m["first_close"], summary["first"])
+    assert np.allclose(kstats.to_numpy(), stats.drop(columns="统计项").to_numpy())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = make_panel(args.rows, args.symbols)
+    check(df[df["ts_code"] == df["ts_code"].iloc[0]])
+    print(f"{len(df):,} rows, {df['ts_code'].nunique():,} symbols, best of {args.repeat}")
+    print(f"{'case':<10}{'legacy ms':>12}{'kernel ms':>12}{'speedup':>10}")
+    for case, legacy, kernel in (("single", legacy_single, kernel_single), ("panel", legacy_panel, kernel_panel)):
+        old = best_of(legacy, df, args.repeat)
+        new = best_of(kernel, df, args.repeat)
+        print(f"{case:<10}{old * 1000:>12.1f}{new * 1000:>12.1f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Synthetic daily bars: the per-day loop of the old mock generator vs tools/synthetic_market.
+
+    python benchmarks/bench_synthetic_market.py [--symbols 5000] [--start 20150101] [--end 20241231]
+
+"legacy" is the loop export_stock_robust.generate_realistic_mock_data used
+(one iteration and several np.random calls per row), timed on
+--legacy-symbols symbols and reported as rows/s. "vectorized" is
+generate_daily for the full symbol x date grid; "store" writes the same
+grid into a temporary MarketStore, one partition per day.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from tools.market_store import MarketStore  # noqa: E402
+from tools.synthetic_market import generate_daily, synthetic_codes, write_store  # noqa: E402
+
+
+def legacy_one(ts_code: str, start_date: str, end_date: str):
+    """The old per-row generator (weekday calendar, one dict per row)."""
+    day, end = datetime.strptime(start_date, "%Y%m%d"), datetime.strptime(end_date, "%Y%m%d")
+    dates = []
+    while day <= end:
+        if day.weekday() < 5:
+            dates.append(day)
+        day += timedelta(days=1)
+    prices = []
+    for i in range(len(dates)):
+        prices.append(1800.0 if i == 0 else prices[-1] * (1 + np.random.normal(0, 0.015)))
+    rows = []
+    for i, (date, close) in enumerate(zip(dates, prices)):
+        pre_close = prices[i - 1] if i else close
+        open_ = pre_close * (1 + np.random.uniform(-0.03, 0.03))
+        spread = np.random.uniform(0.01, 0.04)
+        high = max(open_, close) * (1 + spread * np.random.uniform(0.3, 1))
+        low = min(open_, close) * (1 - spread * np.random.uniform(0.3, 1))
+        vol = int(15000 * (1 + abs(close / pre_close - 1) * 200) * np.random.uniform(0.8, 1.5))
+        rows.append({"ts_code": ts_code, "trade_date": date.strftime("%Y%m%d"), "open": round(open_, 2),
+                     "high": round(high, 2), "low": round(low, 2), "close": round(close, 2),
+                     "pre_close": round(pre_close, 2), "change": round(close - pre_close, 2),
+                     "pct_chg": round((close / pre_close - 1) * 100, 2), "vol": vol,
+                     "amount": round(vol * (open_ + high + low + close) / 40, 3)})
+    return pd.DataFrame(rows)
+
+
+def check(df: pd.DataFrame):
+    """Bars must be internally consistent."""
+    d = df.sort_values(["ts_code", "trade_date"])
+    prev = d.groupby("ts_code", observed=True)["close"].shift()
+    assert (prev.dropna() == d.loc[prev.notna(), "pre_close"]).all(), "pre_close != previous close"
+    assert (d["low"] <= d[["open", "close"]].min(axis=1)).all() and (d["high"] >= d[["open", "close"]].max(axis=1)).all()
+    assert d["pct_chg"].abs().max() <= 20.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--start", default="20150101")
+    parser.add_argument("--end", default="20241231")
+    parser.add_argument("--legacy-symbols", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    codes = synthetic_codes(args.symbols)
+    t0 = time.perf_counter()
+    legacy = pd.concat([legacy_one(c, args.start, args.end) for c in codes[:args.legacy_symbols]])
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    df = generate_daily(codes, args.start, args.end, suspension_rate=0.01)
+    vector_s = time.perf_counter() - t0
+    check(df[df["ts_code"].isin(codes[:50])])
+
+    root = tempfile.mkdtemp(prefix="bench_synthetic_")
+    try:
+        t0 = time.perf_counter()
+        written = write_store(MarketStore(root), codes, args.start, args.end, suspension_rate=0.01)
+        store_s = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print(f"{args.symbols:,} symbols, {args.start}-{args.end}: {len(df):,} rows, "
+          f"{df.memory_usage(deep=True).sum() / 2 ** 20:.0f} MB")
+    print(f"{'case':<12}{'rows':>14}{'seconds':>10}{'rows/s':>14}")
+    for case, rows, seconds in (("legacy", len(legacy), legacy_s), ("vectorized", len(df), vector_s),
+                                ("store", written["rows"], store_s)):
+        print(f"{case:<12}{rows:>14,}{seconds:>10.2f}{rows / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
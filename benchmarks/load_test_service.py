@@ -0,0 +1,174 @@
+"""
+Load test for the HTTP/SSE service against the stub LLM and stub data backends.
+
+    python benchmarks/load_test_service.py --jobs 40 --concurrency 8
+
+Without --url it starts tools.stub_llm_server in-process and `python -m service`
+as a subprocess with DEEPSEEK_BASE_URL pointing at the stub and
+FINDATA_STUB_TUSHARE=1, so no API key, token or network is needed.
+(If config.json defines `llm_backends`, those take precedence over DEEPSEEK_BASE_URL.)
+
+Each client submits an intent, follows its SSE stream to the `end` event and
+retries on 429. Reports throughput and submit / first-event / total latency.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, ROOT_DIR)
+
+from tools.stub_llm_server import serve_in_thread  # noqa: E402
+
+LOAD_TEST_REPLY = """计划：用 pro.daily 获取日线并导出 CSV。
+
+```python
+df = pro.daily(ts_code='600519.SH', start_date='20240101', end_date='20240630')
+path = f"workspace/exports/load_test_{os.getpid()}.csv"
+df.to_csv(path, index=False)
+print(len(df))
+print_output_path(path)
+```
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_healthy(host: str, port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/healthz")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("service did not become healthy")
+
+
+def run_client(host: str, port: int, intent: str) -> dict:
+    t0 = time.perf_counter()
+    rejected = 0
+    conn = http.client.HTTPConnection(host, port, timeout=120)
+    while True:
+        body = json.dumps({"intent": intent}).encode("utf-8")
+        conn.request("POST", "/v1/jobs", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        payload = json.loads(resp.read() or b"{}")
+        if resp.status == 429:
+            rejected += 1
+            time.sleep(float(resp.getheader("Retry-After") or 1))
+            continue
+        if resp.status != 202:
+            return {"ok": False, "status": f"http {resp.status}", "rejected": rejected}
+        break
+    submitted = time.perf_counter()
+
+    # Same keep-alive connection for the event stream
+    conn.request("GET", f"/v1/jobs/{payload['id']}/events", headers={"Accept": "text/event-stream"})
+    resp = conn.getresponse()
+    first_event = None
+    events = 0
+    end = {}
+    name = None
+    for raw in resp:
+        line = raw.decode("utf-8").rstrip("\n")
+        if line.startswith("event: "):
+            name = line[7:]
+        elif line.startswith("data: "):
+            events += 1
+            if first_event is None:
+                first_event = time.perf_counter()
+            if name == "end":
+                end = json.loads(line[6:])
+                break
+    resp.read()
+    conn.close()
+    done = time.perf_counter()
+    return {
+        "ok": end.get("status") == "succeeded",
+        "status": end.get("status", "disconnected"),
+        "rejected": rejected,
+        "events": events,
+        "submit": submitted - t0,
+        "first_event": (first_event or done) - submitted,
+        "total": done - t0,
+    }
+
+
+def _pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the FinDataAgent HTTP/SSE service")
+    parser.add_argument("--url", help="existing service (default: start stubs + service locally)")
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4, help="service job workers (local mode)")
+    parser.add_argument("--max-pending", type=int, default=8, help="service queue bound (local mode)")
+    parser.add_argument("--ttft", type=float, default=0.2, help="stub LLM time to first token")
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--intent", default="导出贵州茅台2024年上半年日线数据")
+    args = parser.parse_args(argv)
+
+    stub = proc = None
+    if args.url:
+        parsed = urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        stub, llm_url = serve_in_thread(reply=LOAD_TEST_REPLY, ttft=args.ttft, token_delay=args.token_delay)
+        host, port = "127.0.0.1", _free_port()
+        env = dict(os.environ, DEEPSEEK_BASE_URL=llm_url, DEEPSEEK_API_KEY="stub", FINDATA_STUB_TUSHARE="1")
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "service", "--port", str(port), "--workers", str(args.workers),
+             "--max-pending", str(args.max_pending)],
+            cwd=ROOT_DIR, env=env)
+    try:
+        _wait_healthy(host, port)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(lambda _: run_client(host, port, args.intent), range(args.jobs)))
+        wall = time.perf_counter() - t0
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if stub is not None:
+            stub.shutdown()
+
+    ok = [r for r in results if r["ok"]]
+    statuses = {}
+    for r in results:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+    print(f"jobs={args.jobs} concurrency={args.concurrency} wall={wall:.2f}s "
+          f"throughput={len(results) / wall:.2f} jobs/s")
+    print(f"statuses={statuses} rejected(429)={sum(r['rejected'] for r in results)}")
+    for key in ("submit", "first_event", "total"):
+        values = [r[key] for r in ok]
+        if values:
+            print(f"{key:<12} p50={statistics.median(values) * 1000:8.1f}ms "
+                  f"p95={_pct(values, 0.95) * 1000:8.1f}ms max={max(values) * 1000:8.1f}ms")
+    if ok:
+        print(f"events/job  mean={statistics.mean(r['events'] for r in ok):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,9 @@ import tushare as ts
 from dotenv import load_dotenv
 import matplotlib.pyplot as plt
 
+from tools.price_adjust import PRICE_COLUMNS, adjust_prices
+from tools.report_stats import metrics_dict, summary_stats
+
 def export_stock_daily_complete():
     """完整的股票日线数据导出功能"""
     
@@ -70,17 +73,17 @@ def export_stock_daily_complete():
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        # 计算前复权价格
-        for col in ['open', 'high', 'low', 'close', 'pre_close']:
-            if col in df.columns:
-                df[f'{col}_adj'] = df[col] * df['adj_factor']
+        # 按日期排序
+        df = df.sort_values('trade_date').reset_index(drop=True)
+        
+        # 计算前复权价格（原始价 × 复权因子 / 区间内最新复权因子）
+        qfq = adjust_prices(df, how='qfq')
+        for col in PRICE_COLUMNS:
+            df[f'{col}_adj'] = qfq[col].to_numpy()
         
         # 添加股票名称
         df['stock_name'] = stock_name
         
-        # 按日期排序
-        df = df.sort_values('trade_date').reset_index(drop=True)
-        
         # 4. 计算技术指标
         print("4. 正在计算技术指标...")
         
@@ -104,33 +107,31 @@ def export_stock_daily_complete():
         # 5. 数据统计分析
         print("5. 正在生成统计摘要...")
         
-        # 基本统计
-        latest_price = df['close'].iloc[-1]
-        first_price = df['close'].iloc[0]
-        price_change = latest_price - first_price
-        price_change_pct = (price_change / first_price) * 100
+        # 基本统计：一次聚合得到全部摘要指标
+        m = metrics_dict(df)
+        latest_price = m['last_close']
+        first_price = m['first_close']
+        price_change = m['change']
+        price_change_pct = m['change_pct']
         
-        max_price = df['high'].max()
-        min_price = df['low'].min()
-        avg_price = df['close'].mean()
+        max_price = m['max_high']
+        min_price = m['min_low']
+        avg_price = m['avg_close']
         
-        total_volume = df['vol'].sum()
-        avg_volume = df['vol'].mean()
-        max_volume = df['vol'].max()
+        total_volume = m['vol_sum']
+        avg_volume = m['vol_mean']
+        max_volume = m['vol_max']
         
-        total_amount = df['amount'].sum()
-        avg_amount = df['amount'].mean()
+        total_amount = m['amount_sum']
+        avg_amount = m['amount_mean']
         
         # 波动性分析
-        daily_returns = df['pct_chg']
-        volatility = daily_returns.std()
-        max_daily_gain = daily_returns.max()
-        max_daily_loss = daily_returns.min()
+        volatility = m['volatility']
+        max_daily_gain = m['max_gain']
+        max_daily_loss = m['max_loss']
         
         # 涨跌统计
-        up_days = len(df[df['pct_chg'] > 0])
-        down_days = len(df[df['pct_chg'] < 0])
-        flat_days = len(df[df['pct_chg'] == 0])
+        up_days, down_days, flat_days = int(m['up_days']), int(m['down_days']), int(m['flat_days'])
         
         print("   统计分析完成")
         
@@ -178,26 +179,9 @@ def export_stock_daily_complete():
             summary_data.to_excel(writer, sheet_name='数据摘要', index=False)
             
             # 工作表4: 价格统计
-            price_stats = pd.DataFrame({
-                '统计项': ['开盘价', '最高价', '最低价', '收盘价', '涨跌额', '涨跌幅(%)', 
-                          '成交量', '成交额', '振幅(%)', '换手率(%)'],
-                '平均值': [df['open'].mean(), df['high'].mean(), df['low'].mean(), df['close'].mean(),
-                          df['change'].mean(), df['pct_chg'].mean(), df['vol'].mean(), df['amount'].mean(),
-                          df['amplitude'].mean(), df['turnover_rate'].mean()],
-                '最大值': [df['open'].max(), df['high'].max(), df['low'].max(), df['close'].max(),
-                          df['change'].max(), df['pct_chg'].max(), df['vol'].max(), df['amount'].max(),
-                          df['amplitude'].max(), df['turnover_rate'].max()],
-                '最小值': [df['open'].min(), df['high'].min(), df['low'].min(), df['close'].min(),
-                          df['change'].min(), df['pct_chg'].min(), df['vol'].min(), df['amount'].min(),
-                          df['amplitude'].min(), df['turnover_rate'].min()],
-                '标准差': [df['open'].std(), df['high'].std(), df['low'].std(), df['close'].std(),
-                          df['change'].std(), df['pct_chg'].std(), df['vol'].std(), df['amount'].std(),
-                          df['amplitude'].std(), df['turnover_rate'].std()]
-            })
-            
-            # 格式化数值
-            for col in ['平均值', '最大值', '最小值', '标准差']:
-                price_stats[col] = price_stats[col].round(2)
+            price_stats = summary_stats(df, ['open', 'high', 'low', 'close', 'change', 'pct_chg',
+                                             'vol', 'amount', 'amplitude', 'turnover_rate'],
+                                        labels=True).round(2).reset_index()
             
             price_stats.to_excel(writer, sheet_name='价格统计', index=False)
         
@@ -1,17 +1,33 @@
 import os
 import json
 import re
+import time
 from pathlib import Path
 from datetime import datetime
-from openai import OpenAI
-from .prompt_templates import CODE_INTERPRETER_SYSTEM_PROMPT
-from tools.code_executor import run_python_code
-from .knowledge_manager import get_knowledge_context
+from tools.code_executor import ExecutionResult, execute_python_code, new_run_id
+from .prompt_registry import get_prompt_registry
+from .conversation import ConversationMemory
+from .llm_usage import extract_usage, usage_tracker
+from .llm_backends import get_backend_pool
+from .intent_router import route_intent
+from .script_library import get_script_library
+from .event_stream import DEFAULT_MAX_FRAME_BYTES, DEFAULT_WINDOW, coalesce_events, encode_event
 from log_tools.logger import get_logger
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
 
+def _load_llm_settings():
+    """
+    从配置文件（.env 与 config.json）中读取LLM模型名称与后端配置
+    模型名称在配置中没有指定，使用默认值；API密钥与基础URL由后端池按后端读取
+    config.json 由 PromptRegistry 缓存，仅在文件修改后重新解析
+    """
+    cfg = get_prompt_registry().config()
+    model = cfg.get("llm_model") or os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
+    return model, cfg
+
+
 def _extract_code(text: str) -> str:
     """
     提取LLM的回复所生成的Python代码块
@@ -25,71 +41,117 @@ def _extract_code(text: str) -> str:
     return text
 
 
-def agent_workflow(intent: str):
+def _result_event(out: str) -> dict:
+    match = re.search(r"OUTPUT_PATH:(.*)", out)
+    if match:
+        return {"type": "result", "success": True, "data": f"任务成功完成，结果已保存至: {match.group(1).strip()}"}
+    return {"type": "result", "success": True, "data": f"任务成功完成。\n{out}"}
+
+
+def _execute(code: str, script_name: str, run_id: str, logger) -> ExecutionResult:
+    """Run a script and log its resource usage (peak RSS, CPU, I/O, limit hit)."""
+    execution = execute_python_code(code, script_name=script_name, run_id=run_id)
+    logger.info(f"Execution resources ({script_name}): {json.dumps(execution.resources)}")
+    return execution
+
+
+def _script_library(cfg: dict, history: list | None):
+    """Verified-script reuse only applies to standalone intents (no prior turns to depend on)."""
+    if history or not cfg.get("script_library", True):
+        return None
+    return get_script_library()
+
+
+def _system_prompt(cfg: dict, intent: str, history: list | None):
+    """
+    Compiled system prompt carrying only the knowledge entries the request needs
+    (topics read from the intent and earlier user turns); the whole knowledge
+    base when no topic matches or `prompt_subset` is off.
+    """
+    registry = get_prompt_registry()
+    if not cfg.get("prompt_subset", True):
+        return registry.system_prompt()
+    query = " ".join([m.get("content", "") for m in history or () if m.get("role") == "user"] + [intent])
+    return registry.system_prompt(registry.subset_for(query))
+
+
+def agent_workflow(intent: str, history: list | None = None):
     """
     Main Agent Workflow:
     1. Retrieve Knowledge
-    2. Construct Prompt
+    2. Construct Prompt (with compacted prior turns from `history`)
     3. LLM Think & Code
     4. Execute & Observe
     5. Self-Correction Loop
     """
 
-    """
-    从配置文件（.env）中读取LLM的API密钥、基础URL和模型名称
-    基础URL与模型名称在配置中没有指定，使用默认值
-    """
-    api_key = os.getenv("DEEPSEEK_API_KEY")
-    base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
-    model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
-    try:
-        with open(os.path.join(ROOT_DIR, "config.json"), "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-            m = cfg.get("llm_model")
-            if m:
-                model = m
-    except Exception:
-        pass
-    
-
+    model, cfg = _load_llm_settings()
     
     # Initialize Logger
     log_dir = os.path.join(ROOT_DIR, "core", "agent_log_record")
     os.makedirs(log_dir, exist_ok=True)
     logger = get_logger(log_dir, "agent")
     
-    # 1. Retrieve Knowledge
-    knowledge = get_knowledge_context(intent)
-    
-    # 2. Construct System Prompt
-    system_prompt = CODE_INTERPRETER_SYSTEM_PROMPT.format(knowledge_base=knowledge)
+    # 1-2. Retrieve Knowledge & Construct System Prompt (cached per knowledge subset, rebuilt only when files change)
+    compiled = _system_prompt(cfg, intent, history)
     
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": intent}
-    ]
+    memory = ConversationMemory(compiled.text, intent, history, system_tokens=compiled.token_count)
     
-    # Use OpenAI client directly as LangChain seems unstable in this env
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    # Shared pool of OpenAI-compatible backends (failover / latency routing)
+    pool = get_backend_pool(cfg)
     
     max_retries = 3
+    run_id = new_run_id()
+    
+    logger.info(f"Starting workflow for intent: {intent} (run {run_id})")
+    logger.info(f"System prompt {compiled.sha256[:12]} (~{compiled.token_count} tokens), registry={get_prompt_registry().stats()}")
+    
+    # Fast path: common intent shapes run a parameterized template without calling the LLM
+    route = route_intent(intent) if cfg.get("template_fast_path", True) else None
+    if route is not None:
+        logger.info(f"Template fast path: {route.template} (confidence={route.confidence}) params={route.params}")
+        execution = _execute(route.code, f"agent_template_{route.template}.py", run_id, logger)
+        ok, out = execution.ok, execution.output
+        if ok:
+            match = re.search(r"OUTPUT_PATH:(.*)", out)
+            return True, match.group(1).strip() if match else out
+        logger.warning(f"Template {route.template} failed, falling back to LLM: {out[:200]}")
     
-    logger.info(f"Starting workflow for intent: {intent}")
+    # Reuse a verified script from an earlier intent of the same shape
+    library = _script_library(cfg, history)
+    hit = library.lookup(intent, compiled.sha256) if library else None
+    if hit is not None:
+        logger.info(f"Script library hit: {hit.signature}")
+        execution = _execute(hit.code, "agent_library.py", run_id, logger)
+        ok, out = execution.ok, execution.output
+        if ok:
+            library.record_hit(hit)
+            match = re.search(r"OUTPUT_PATH:(.*)", out)
+            return True, match.group(1).strip() if match else out
+        library.record_failure(hit)
+        logger.warning(f"Library script failed, falling back to LLM: {out[:200]}")
     
+    llm_seconds, llm_tokens = 0.0, 0
     for attempt in range(max_retries):
         try:
             # 3. LLM Think & Code
-            logger.info(f"Invoking LLM (Attempt {attempt+1})...")
+            messages = memory.messages()
+            logger.info(f"Invoking LLM (Attempt {attempt+1}, ~{memory.prompt_tokens()} prompt tokens)...")
             
-            response = client.chat.completions.create(
+            t0 = time.perf_counter()
+            response, backend = pool.complete(
                 model=model,
                 messages=messages,
-                stream=False,
                 temperature=0
             )
             
             content = response.choices[0].message.content
-            logger.info(f"LLM Response (Attempt {attempt+1}): {content[:200]}...")
+            usage = extract_usage(response.usage, latency=time.perf_counter() - t0)
+            usage_tracker.record(usage)
+            llm_seconds += usage["latency"] or 0.0
+            llm_tokens += usage["prompt_tokens"] + usage["completion_tokens"]
+            logger.info(f"LLM Response (Attempt {attempt+1}, backend={backend}): {content[:200]}...")
+            logger.info(f"LLM Usage (Attempt {attempt+1}): {json.dumps(usage)}")
             
             code = _extract_code(content)
             
@@ -101,11 +163,14 @@ def agent_workflow(intent: str):
             
             # 4. Execute
             logger.info("Executing code...")
-            ok, out = run_python_code(code, script_name=f"agent_exec_{attempt}.py")
+            execution = _execute(code, f"agent_exec_{attempt}.py", run_id, logger)
+            ok, out = execution.ok, execution.output
             logger.info(f"Execution Result: ok={ok}, out={out[:200]}...")
             
             if ok:
                 # Success!
+                if library is not None and library.store(intent, code, compiled.sha256, llm_seconds, llm_tokens):
+                    logger.info("Script stored in library")
                 # Check for output path
                 match = re.search(r"OUTPUT_PATH:(.*)", out)
                 if match:
@@ -120,8 +185,7 @@ def agent_workflow(intent: str):
                 error_msg = f"Execution Failed:\n{out}"
                 logger.warning(error_msg)
                 
-                messages.append({"role": "assistant", "content": content})
-                messages.append({"role": "user", "content": f"The code failed to execute. Error:\n{out}\nPlease analyze the error and rewrite the COMPLETE script to fix it."})
+                memory.record_failure(attempt, content, out)
                 
         except Exception as e:
             logger.error(f"Workflow Exception: {e}")
@@ -132,105 +196,159 @@ def agent_workflow(intent: str):
     return False, f"Failed to complete task after {max_retries} attempts."
 
 
-def agent_workflow_streaming(intent: str):
+def agent_workflow_streaming(intent: str, history: list | None = None,
+                             coalesce_window: float = DEFAULT_WINDOW,
+                             max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+                             encoding: str = "json"):
+    """
+    Streaming Agent Workflow for UI, as JSON lines by default.
+    LLM deltas are coalesced into frames (by time window / byte budget)
+    so the consumer decodes and renders per frame instead of per token.
+    `encoding` ("json" | "binary" | "msgpack", see negotiate_encoding) selects
+    the wire format; binary encodings yield bytes for event_stream.EventDecoder.
+    """
+    events = workflow_events(intent, history)
+    for ev in coalesce_events(events, window=coalesce_window, max_bytes=max_frame_bytes):
+        yield encode_event(ev, encoding)
+
+
+def workflow_events(intent: str, history: list | None = None, run_id: str | None = None):
     """
-    Streaming Agent Workflow for UI:
+    Streaming Agent Workflow (event dicts):
     1. Retrieve Knowledge
     2. Construct Prompt
     3. LLM Think & Code (Streaming)
     4. Execute & Observe
     5. Self-Correction Loop
+    `run_id` names the run's script/export folders (see run_python_code);
+    a fresh one is generated when not given.
     """
-    api_key = os.getenv("DEEPSEEK_API_KEY")
-    base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com/v1")
-    model = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
-    try:
-        with open(os.path.join(ROOT_DIR, "config.json"), "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-            m = cfg.get("llm_model")
-            if m:
-                model = m
-    except Exception:
-        pass
+    model, cfg = _load_llm_settings()
     
     log_dir = os.path.join(ROOT_DIR, "core", "agent_log_record")
     os.makedirs(log_dir, exist_ok=True)
     logger = get_logger(log_dir, "agent")
     
-    knowledge = get_knowledge_context(intent)
+    compiled = _system_prompt(cfg, intent, history)
     
-    system_prompt = CODE_INTERPRETER_SYSTEM_PROMPT.format(knowledge_base=knowledge)
+    memory = ConversationMemory(compiled.text, intent, history, system_tokens=compiled.token_count)
     
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {"role": "user", "content": intent}
-    ]
-    
-    client = OpenAI(api_key=api_key, base_url=base_url)
+    pool = get_backend_pool(cfg)
     
     max_retries = 3
+    run_id = run_id or new_run_id()
+
+    logger.info(f"Starting workflow for intent: {intent} (run {run_id})")
+    logger.info(f"System prompt {compiled.sha256[:12]} (~{compiled.token_count} tokens), registry={get_prompt_registry().stats()}")
+    yield {"type": "thought", "content": "正在分析您的需求..."}
+
+    # Fast path: common intent shapes run a parameterized template without calling the LLM
+    route = route_intent(intent) if cfg.get("template_fast_path", True) else None
+    if route is not None:
+        logger.info(f"Template fast path: {route.template} (confidence={route.confidence}) params={route.params}")
+        yield {"type": "thought", "content": f"识别为常见需求（模板 {route.template}，置信度 {route.confidence:.2f}），直接执行参数化脚本..."}
+        yield {"type": "execution", "content": route.code}
+        execution = _execute(route.code, f"agent_template_{route.template}.py", run_id, logger)
+        ok, out = execution.ok, execution.output
+        yield {"type": "resources", "content": execution.resources}
+        logger.info(f"Template Execution Result: ok={ok}, out={out[:200]}...")
+        if ok:
+            yield _result_event(out)
+            return
+        logger.warning(f"Template {route.template} failed, falling back to LLM: {out[:200]}")
+        yield {"type": "thought", "content": "模板执行未成功，改由模型生成代码..."}
 
-    logger.info(f"Starting workflow for intent: {intent}")
-    yield json.dumps({"type": "thought", "content": "正在分析您的需求..."}) + "\n"
+    # Reuse a verified script from an earlier intent of the same shape
+    library = _script_library(cfg, history)
+    hit = library.lookup(intent, compiled.sha256) if library else None
+    if hit is not None:
+        logger.info(f"Script library hit: {hit.signature}")
+        yield {"type": "thought", "content": "找到同类需求已验证过的脚本，替换参数后直接执行..."}
+        yield {"type": "execution", "content": hit.code}
+        execution = _execute(hit.code, "agent_library.py", run_id, logger)
+        ok, out = execution.ok, execution.output
+        yield {"type": "resources", "content": execution.resources}
+        logger.info(f"Library Execution Result: ok={ok}, out={out[:200]}...")
+        if ok:
+            library.record_hit(hit)
+            yield _result_event(out)
+            return
+        library.record_failure(hit)
+        logger.warning(f"Library script failed, falling back to LLM: {out[:200]}")
+        yield {"type": "thought", "content": "复用脚本执行未成功，改由模型生成代码..."}
 
+    llm_seconds, llm_tokens = 0.0, 0
     for attempt in range(max_retries):
         try:
-            logger.info(f"Invoking LLM (Attempt {attempt + 1})...")
-            yield json.dumps({"type": "thought", "content": f"第 {attempt + 1} 次尝试思考..."}) + "\n"
+            messages = memory.messages()
+            logger.info(f"Invoking LLM (Attempt {attempt + 1}, ~{memory.prompt_tokens()} prompt tokens)...")
+            yield {"type": "thought", "content": f"第 {attempt + 1} 次尝试思考..."}
 
-            response = client.chat.completions.create(
+            t0 = time.perf_counter()
+            ttft = None
+            response = pool.stream(
                 model=model,
                 messages=messages,
-                stream=True,
+                stream_options={"include_usage": True},
                 temperature=0
             )
 
             content_buffer = ""
+            raw_usage = None
             for chunk in response:
+                # With include_usage the final chunk carries usage and no choices
+                if getattr(chunk, "usage", None):
+                    raw_usage = chunk.usage
+                if not chunk.choices:
+                    continue
                 chunk_content = chunk.choices[0].delta.content
                 if chunk_content:
+                    if ttft is None:
+                        ttft = time.perf_counter() - t0
                     content_buffer += chunk_content
-                    yield json.dumps({"type": "thought_stream", "content": chunk_content}) + "\n"
+                    yield {"type": "thought_stream", "content": chunk_content}
 
             content = content_buffer
-            logger.info(f"LLM Response (Attempt {attempt + 1}): {content[:200]}...")
+            usage = extract_usage(raw_usage, ttft=ttft, latency=time.perf_counter() - t0)
+            usage_tracker.record(usage)
+            llm_seconds += usage["latency"] or 0.0
+            llm_tokens += usage["prompt_tokens"] + usage["completion_tokens"]
+            logger.info(f"LLM Response (Attempt {attempt + 1}, backend={response.backend}"
+                        f"{', hedged' if response.hedged else ''}): {content[:200]}...")
+            logger.info(f"LLM Usage (Attempt {attempt + 1}): {json.dumps(usage)}")
+            yield {"type": "usage", "content": usage}
 
             code = _extract_code(content)
 
             if "```" not in content and len(code) < 50:
                 logger.info("No code generated, returning content.")
-                yield json.dumps({"type": "result", "success": True, "data": content}) + "\n"
+                yield {"type": "result", "success": True, "data": content}
                 return
 
             logger.info("Executing code...")
-            yield json.dumps({"type": "execution", "content": code}) + "\n"
-            ok, out = run_python_code(code, script_name=f"agent_exec_{attempt}.py")
+            yield {"type": "execution", "content": code}
+            execution = _execute(code, f"agent_exec_{attempt}.py", run_id, logger)
+            ok, out = execution.ok, execution.output
+            yield {"type": "resources", "content": execution.resources}
             logger.info(f"Execution Result: ok={ok}, out={out[:200]}...")
 
             if ok:
-                match = re.search(r"OUTPUT_PATH:(.*)", out)
-                if match:
-                    path = match.group(1).strip()
-                    result_data = f"任务成功完成，结果已保存至: {path}"
-                    yield json.dumps({"type": "result", "success": True, "data": result_data}) + "\n"
-                else:
-                    result_data = f"任务成功完成。\n{out}"
-                    yield json.dumps({"type": "result", "success": True, "data": result_data}) + "\n"
+                if library is not None and library.store(intent, code, compiled.sha256, llm_seconds, llm_tokens):
+                    logger.info(f"Script stored in library, stats={library.stats()}")
+                yield _result_event(out)
                 return
             else:
                 error_msg = f"Execution Failed:\n{out}"
                 logger.warning(error_msg)
-                yield json.dumps({"type": "error", "content": f"代码执行失败: {out[:200]}...\n正在尝试修正错误..."}) + "\n"
+                yield {"type": "error", "content": f"代码执行失败: {out[:200]}...\n正在尝试修正错误..."}
 
-                messages.append({"role": "assistant", "content": content})
-                messages.append({"role": "user",
-                                 "content": f"The code failed to execute. Error:\n{out}\nPlease analyze the error and rewrite the COMPLETE script to fix it."})
+                memory.record_failure(attempt, content, out)
 
         except Exception as e:
             logger.error(f"Workflow Exception: {e}")
             import traceback
             traceback.print_exc()
-            yield json.dumps({"type": "result", "success": False, "data": str(e)}) + "\n"
+            yield {"type": "result", "success": False, "data": str(e)}
             return
 
-    yield json.dumps({"type": "result", "success": False, "data": f"任务在 {max_retries} 次尝试后仍然失败。"}) + "\n"
+    yield {"type": "result", "success": False, "data": f"任务在 {max_retries} 次尝试后仍然失败。"}
@@ -0,0 +1,208 @@
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from .jobs import CANCELLED, FAILED, SUCCEEDED, Job, JobManager
+from .knowledge_manager import ROOT_DIR
+
+BATCH_DIR = os.path.join(ROOT_DIR, "workspace", "batch")
+
+LEDGER_NAME = "ledger.jsonl"
+SUMMARY_FIELDS = ["id", "intent", "status", "latency", "attempts", "prompt_tokens",
+                  "completion_tokens", "cache_hit_tokens", "cpu_seconds", "peak_rss_mb", "artifacts", "result"]
+
+
+@dataclass
+class BatchItem:
+    id: str
+    intent: str
+
+
+def _item_id(intent: str, occurrence: int) -> str:
+    digest = hashlib.sha1(intent.encode("utf-8")).hexdigest()[:12]
+    return f"{digest}-{occurrence}" if occurrence else digest
+
+
+def load_intents(path: str) -> List[BatchItem]:
+    """
+    Read intents from .txt (one per line, '#' comments), .jsonl
+    ({"intent": ..., "id": ...}) or .csv (an `intent` column, optional `id`).
+    Items without an id get a stable one derived from the text, so a rerun
+    of the same file lines up with its ledger.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    rows = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if ext == ".jsonl":
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    rows.append((rec.get("id"), rec["intent"]))
+        elif ext == ".csv":
+            for rec in csv.DictReader(f):
+                rows.append((rec.get("id") or None, rec["intent"]))
+        else:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    rows.append((None, line))
+
+    items, seen = [], {}
+    for item_id, intent in rows:
+        intent = intent.strip()
+        if not intent:
+            continue
+        if not item_id:
+            seen[intent] = seen.get(intent, -1) + 1
+            item_id = _item_id(intent, seen[intent])
+        items.append(BatchItem(str(item_id), intent))
+    return items
+
+
+class Ledger:
+    """
+    Append-only JSONL record of finished items. Each line is flushed and
+    fsync-ed, so after a crash every completed item is still known and the
+    next run only redoes the rest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def load(self) -> Dict[str, Dict]:
+        """Latest record per item id (a torn last line from a crash is ignored)."""
+        records = {}
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[rec["id"]] = rec
+        return records
+
+    def append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _record(item: BatchItem, job: Job) -> Dict:
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "cache_hit_tokens": 0}
+    attempts = 0
+    cpu_seconds, peak_rss_mb = 0.0, 0.0
+    for ev in job.events:
+        if ev.get("type") == "execution":
+            attempts += 1
+        elif ev.get("type") == "usage":
+            for k in usage:
+                usage[k] += (ev.get("content") or {}).get(k, 0) or 0
+        elif ev.get("type") == "resources":
+            res = ev.get("content") or {}
+            cpu_seconds += res.get("cpu_seconds") or 0.0
+            peak_rss_mb = max(peak_rss_mb, res.get("peak_rss_mb") or 0.0)
+    latency = (job.finished_at - job.started_at) if job.started_at and job.finished_at else None
+    return dict({
+        "id": item.id,
+        "intent": item.intent,
+        "status": job.status,
+        "latency": round(latency, 3) if latency is not None else None,
+        "attempts": attempts,
+        "cpu_seconds": round(cpu_seconds, 3),
+        "peak_rss_mb": peak_rss_mb,
+        "artifacts": list(job.artifacts),
+        "result": job.result,
+        "finished_at": job.finished_at,
+    }, **usage)
+
+
+def write_summary(out_dir: str, items: List[BatchItem], records: Dict[str, Dict], wall: float) -> Dict:
+    rows = [records.get(it.id, {"id": it.id, "intent": it.intent, "status": "not_run"}) for it in items]
+    counts: Dict[str, int] = {}
+    for r in rows:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    latencies = sorted(r["latency"] for r in rows if r.get("latency") is not None)
+    summary = {
+        "total": len(rows),
+        "statuses": counts,
+        "wall_seconds": round(wall, 3),
+        "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+        "latency_max": latencies[-1] if latencies else None,
+        "items": rows,
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, "summary.csv"), "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for r in rows:
+            writer.writerow(dict(r, artifacts=";".join(r.get("artifacts") or [])))
+    return summary
+
+
+def run_batch(path: str, out_dir: Optional[str] = None, parallel: int = 4, exec_parallel: Optional[int] = None,
+              retry_failed: bool = False, manager: Optional[JobManager] = None, progress=print) -> Dict:
+    """
+    Run every intent in `path`, `parallel` at a time.
+
+    All runs share this process's prompt registry and LLM backend pool.
+    `exec_parallel` caps how many generated scripts execute at once (defaults
+    to `parallel`). Items already succeeded in `out_dir`/ledger.jsonl are
+    skipped; failed ones too unless `retry_failed`.
+    Writes summary.json / summary.csv to `out_dir` and returns the summary.
+    """
+    from tools.code_executor import set_execution_slots
+
+    items = load_intents(path)
+    out_dir = out_dir or os.path.join(BATCH_DIR, os.path.splitext(os.path.basename(path))[0])
+    ledger = Ledger(os.path.join(out_dir, LEDGER_NAME))
+    records = ledger.load()
+
+    done_states = {SUCCEEDED} if retry_failed else {SUCCEEDED, FAILED, CANCELLED}
+    todo = [it for it in items if records.get(it.id, {}).get("status") not in done_states]
+    progress(f"[batch] {len(items)} intents, {len(items) - len(todo)} already in ledger, {len(todo)} to run")
+
+    set_execution_slots(exec_parallel or parallel)
+    manager = manager or JobManager(max_workers=parallel, max_pending=max(len(todo), 1))
+    remaining = threading.Semaphore(0)
+    counter = {"done": 0}
+    counter_lock = threading.Lock()
+
+    def finished(item: BatchItem):
+        def on_done(job: Job):
+            try:
+                rec = _record(item, job)
+                ledger.append(rec)
+                records[item.id] = rec
+                with counter_lock:
+                    counter["done"] += 1
+                    n = counter["done"]
+                progress(f"[batch] {n}/{len(todo)} {rec['status']:<9} {rec['latency']}s  {item.intent[:60]}")
+            finally:
+                remaining.release()
+        return on_done
+
+    t0 = time.perf_counter()
+    try:
+        for item in todo:
+            manager.submit(item.intent, on_done=finished(item))
+        for _ in todo:
+            remaining.acquire()
+    finally:
+        set_execution_slots(None)
+        manager.shutdown(wait=False)
+
+    summary = write_summary(out_dir, items, records, time.perf_counter() - t0)
+    progress(f"[batch] done: {summary['statuses']} -> {os.path.join(out_dir, 'summary.json')}")
+    return summary
@@ -0,0 +1,198 @@
+import re
+from typing import Dict, List, Optional
+
+# Rough token budgets. Prompt size is dominated by the static system prompt,
+# so history and retry feedback are kept within fixed envelopes.
+DEFAULT_HISTORY_BUDGET = 2000
+DEFAULT_MESSAGE_BUDGET = 600
+DEFAULT_ERROR_BUDGET = 800
+SUMMARY_LINE_CHARS = 80
+
+_CJK_RE = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+_CODE_BLOCK_RE = re.compile(r"```(?:python)?\n[\s\S]*?```")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate without a tokenizer:
+    CJK characters count as one token each, other text as ~4 chars per token.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def truncate_text(text: str, max_tokens: int, keep_tail: bool = False) -> str:
+    """
+    Cut text down to roughly max_tokens.
+    keep_tail=True keeps the end (useful for tracebacks), otherwise the start.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Binary search on the character count that fits the budget
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        part = text[-mid:] if keep_tail else text[:mid]
+        if estimate_tokens(part) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    if keep_tail:
+        return "...[已截断]...\n" + text[-lo:] if lo else ""
+    return text[:lo] + "\n...[已截断]..." if lo else ""
+
+
+def strip_code_blocks(text: str, note: str = "[代码已省略]") -> str:
+    return _CODE_BLOCK_RE.sub(note, text)
+
+
+def compact_error(out: str, max_tokens: int = DEFAULT_ERROR_BUDGET) -> str:
+    """
+    Keep the part of an execution error the LLM actually needs:
+    the final exception line plus as much of the traceback tail as fits.
+    """
+    out = (out or "").strip()
+    if estimate_tokens(out) <= max_tokens:
+        return out
+    lines = out.splitlines()
+    last = next((l for l in reversed(lines) if l.strip()), "")
+    tail = truncate_text(out, max(max_tokens - estimate_tokens(last), 0), keep_tail=True)
+    if last and not tail.rstrip().endswith(last.strip()):
+        tail = f"{tail}\n{last}"
+    return tail
+
+
+def _summary_line(msg: Dict) -> str:
+    content = " ".join(strip_code_blocks(msg.get("content", "")).split())
+    if len(content) > SUMMARY_LINE_CHARS:
+        content = content[:SUMMARY_LINE_CHARS] + "…"
+    return f"- {msg.get('role', 'user')}: {content}"
+
+
+def compact_history(history: Optional[List[Dict]],
+                    budget: int = DEFAULT_HISTORY_BUDGET,
+                    message_budget: int = DEFAULT_MESSAGE_BUDGET) -> List[Dict]:
+    """
+    Turn prior chat turns (as stored by the GUI / REPL) into LLM messages
+    that fit into `budget` tokens.
+
+    Newest turns are kept verbatim (code blocks stripped, long messages truncated);
+    turns that no longer fit are folded into one summary message at the front.
+    """
+    if not history:
+        return []
+
+    turns = [
+        {"role": m["role"], "content": m.get("content") or ""}
+        for m in history
+        if m.get("role") in ("user", "assistant") and m.get("content")
+    ]
+
+    kept: List[Dict] = []
+    used = 0
+    # Reserve a slice of the budget for the summary of older turns
+    verbatim_budget = budget * 3 // 4
+    idx = len(turns)
+    while idx > 0:
+        msg = turns[idx - 1]
+        content = truncate_text(strip_code_blocks(msg["content"]), message_budget)
+        cost = estimate_tokens(content)
+        if used + cost > verbatim_budget:
+            break
+        kept.append({"role": msg["role"], "content": content})
+        used += cost
+        idx -= 1
+    kept.reverse()
+
+    older = turns[:idx]
+    if older:
+        summary_budget = budget - used
+        lines = []
+        # Prefer the most recent of the older turns when the summary overflows
+        for msg in reversed(older):
+            line = _summary_line(msg)
+            if estimate_tokens("\n".join(lines + [line])) > summary_budget:
+                break
+            lines.append(line)
+        if lines:
+            lines.reverse()
+            kept.insert(0, {
+                "role": "user",
+                "content": "Earlier conversation (summarized):\n" + "\n".join(lines)
+            })
+
+    return _alternate(kept)
+
+
+def _alternate(msgs: List[Dict]) -> List[Dict]:
+    """
+    deepseek-reasoner rejects successive messages with the same role, so merge
+    neighbours and make the history start on a user turn and end on an assistant turn.
+    """
+    merged: List[Dict] = []
+    for m in msgs:
+        if merged and merged[-1]["role"] == m["role"]:
+            merged[-1] = {"role": m["role"], "content": merged[-1]["content"] + "\n\n" + m["content"]}
+        else:
+            merged.append(dict(m))
+    if merged and merged[0]["role"] == "assistant":
+        merged.insert(0, {"role": "user", "content": "(继续之前的对话)"})
+    if merged and merged[-1]["role"] == "user":
+        merged.append({"role": "assistant", "content": "(上一轮请求未返回结果)"})
+    return merged
+
+
+class ConversationMemory:
+    """
+    Message list for one workflow run.
+
+    Layout: system prompt, compacted prior turns, the current intent, and for
+    retries only the latest failing script plus its (truncated) error.
+    Superseded attempts are replaced by a one-line reference, so the prompt
+    does not grow with the number of retries.
+    """
+
+    def __init__(self, system_prompt: str, intent: str, history: Optional[List[Dict]] = None,
+                 history_budget: int = DEFAULT_HISTORY_BUDGET,
+                 error_budget: int = DEFAULT_ERROR_BUDGET,
+                 system_tokens: Optional[int] = None):
+        self.system_prompt = system_prompt
+        self.system_tokens = system_tokens if system_tokens is not None else estimate_tokens(system_prompt)
+        self.intent = intent
+        self.history = compact_history(history, budget=history_budget)
+        self.error_budget = error_budget
+        self.superseded: List[str] = []
+        self.last_attempt: Optional[int] = None
+        self.last_reply: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def record_failure(self, attempt: int, reply: str, error: str):
+        if self.last_reply is not None:
+            last_line = (self.last_error or "").strip().splitlines()[-1:] or [""]
+            self.superseded.append(
+                f"- 第 {self.last_attempt + 1} 次尝试的脚本已被后续版本取代（省略），错误: {last_line[0][:160]}"
+            )
+        self.last_attempt = attempt
+        self.last_reply = reply
+        self.last_error = compact_error(error, self.error_budget)
+
+    def messages(self) -> List[Dict]:
+        msgs = [{"role": "system", "content": self.system_prompt}]
+        msgs.extend(self.history)
+        msgs.append({"role": "user", "content": self.intent})
+        if self.last_reply is not None:
+            msgs.append({"role": "assistant", "content": self.last_reply})
+            feedback = ""
+            if self.superseded:
+                feedback += "Earlier failed attempts:\n" + "\n".join(self.superseded) + "\n\n"
+            feedback += (
+                f"The code failed to execute. Error:\n{self.last_error}\n"
+                "Please analyze the error and rewrite the COMPLETE script to fix it."
+            )
+            msgs.append({"role": "user", "content": feedback})
+        return msgs
+
+    def prompt_tokens(self) -> int:
+        return self.system_tokens + sum(estimate_tokens(m["content"]) for m in self.messages()[1:])
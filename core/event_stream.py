@@ -0,0 +1,207 @@
+import json
+import struct
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Event types that are incremental text and may be merged into one frame
+DELTA_TYPES = ("thought_stream",)
+
+DEFAULT_WINDOW = 0.08
+DEFAULT_MAX_FRAME_BYTES = 4096
+
+
+def coalesce_events(events: Iterable[Dict], window: float = DEFAULT_WINDOW,
+                    max_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+                    clock: Callable[[], float] = time.monotonic) -> Iterator[Dict]:
+    """
+    Merge consecutive delta events into frames.
+
+    A frame is emitted once `window` seconds have passed since the frame was
+    opened, once it holds `max_bytes` of text, or right before any non-delta
+    event (so ordering is preserved). Frames keep the original event shape
+    (`type`, `content`) and add `n`, the number of merged deltas.
+    window=0 disables coalescing.
+    """
+    if window <= 0:
+        yield from events
+        return
+
+    frame = None
+    parts = []
+    size = 0
+    opened = 0.0
+
+    def flush():
+        nonlocal frame, parts, size
+        out = dict(frame, content="".join(parts), n=len(parts))
+        frame, parts, size = None, [], 0
+        return out
+
+    for ev in events:
+        t = ev.get("type")
+        if t not in DELTA_TYPES:
+            if frame is not None:
+                yield flush()
+            yield ev
+            continue
+        if frame is not None and frame["type"] != t:
+            yield flush()
+        if frame is None:
+            frame = {"type": t}
+            opened = clock()
+        content = ev.get("content", "")
+        parts.append(content)
+        size += len(content.encode("utf-8"))
+        if size >= max_bytes or clock() - opened >= window:
+            yield flush()
+
+    if frame is not None:
+        yield flush()
+
+
+def encode_json_line(event: Dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Wire encodings
+#
+# "json"    JSON lines (default, str chunks) - what existing consumers expect.
+# "binary"  length-prefixed frames with interned type codes (bytes chunks):
+#             header  <B H I>  = type code | PAYLOAD_JSON flag, n (merged deltas), payload length
+#             payload raw UTF-8 `content` for plain text events, otherwise JSON of the other fields
+# "msgpack" msgpack maps with the type interned as an int (only if msgpack is installed).
+# ---------------------------------------------------------------------------
+
+ENCODINGS = ("json", "binary", "msgpack")
+
+EVENT_TYPES = ("thought", "thought_stream", "execution", "error", "result", "usage", "cancelled", "resources")
+TYPE_CODES = {t: i + 1 for i, t in enumerate(EVENT_TYPES)}
+CODE_TYPES = {c: t for t, c in TYPE_CODES.items()}
+
+_HEADER = struct.Struct("<BHI")
+PAYLOAD_JSON = 0x80
+_UNKNOWN_TYPE = 0x7F
+
+
+def available_encodings() -> Tuple[str, ...]:
+    try:
+        import msgpack  # noqa: F401
+        return ENCODINGS
+    except ImportError:
+        return ("json", "binary")
+
+
+def negotiate_encoding(accept: Iterable[str] | None) -> str:
+    """Pick the first encoding the consumer accepts that this process supports; JSON otherwise."""
+    supported = available_encodings()
+    for enc in accept or ():
+        if enc in supported:
+            return enc
+    return "json"
+
+
+def encode_binary_frame(event: Dict) -> bytes:
+    t = event.get("type")
+    code = TYPE_CODES.get(t, _UNKNOWN_TYPE)
+    content = event.get("content")
+    n = int(event.get("n", 0))
+    extra = set(event) - {"type", "content", "n"}
+    if code != _UNKNOWN_TYPE and isinstance(content, str) and not extra and n <= 0xFFFF:
+        payload = content.encode("utf-8")
+    else:
+        body = {k: v for k, v in event.items() if k != "type" or code == _UNKNOWN_TYPE}
+        payload = json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        code |= PAYLOAD_JSON
+        n = 0
+    return _HEADER.pack(code, n, len(payload)) + payload
+
+
+def encode_event(event: Dict, encoding: str = "json"):
+    if encoding == "json":
+        return encode_json_line(event)
+    if encoding == "binary":
+        return encode_binary_frame(event)
+    if encoding == "msgpack":
+        import msgpack
+        packed = dict(event)
+        packed["type"] = TYPE_CODES.get(event.get("type"), event.get("type"))
+        return msgpack.packb(packed, use_bin_type=True)
+    raise ValueError(f"Unknown event encoding: {encoding}")
+
+
+class EventDecoder:
+    """
+    Incremental decoder: feed() arbitrary chunks of the stream, get back the
+    complete events they finish. Partial frames/lines are buffered.
+    Malformed JSON lines are skipped, as the consumer always did.
+    """
+
+    def __init__(self, encoding: str = "json"):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown event encoding: {encoding}")
+        self.encoding = encoding
+        self._text = ""
+        self._buf = bytearray()
+        self._unpacker = None
+        if encoding == "msgpack":
+            import msgpack
+            self._unpacker = msgpack.Unpacker(raw=False)
+
+    def feed(self, chunk) -> List[Dict]:
+        if self.encoding == "json":
+            return self._feed_json(chunk)
+        if self.encoding == "binary":
+            return self._feed_binary(chunk)
+        return self._feed_msgpack(chunk)
+
+    def _feed_json(self, chunk) -> List[Dict]:
+        if isinstance(chunk, (bytes, bytearray)):
+            chunk = chunk.decode("utf-8")
+        self._text += chunk
+        *lines, self._text = self._text.split("\n")
+        events = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return events
+
+    def _feed_binary(self, chunk) -> List[Dict]:
+        buf = self._buf
+        buf += chunk
+        events = []
+        pos = 0
+        size = _HEADER.size
+        while len(buf) - pos >= size:
+            code, n, length = _HEADER.unpack_from(buf, pos)
+            end = pos + size + length
+            if end > len(buf):
+                break
+            payload = bytes(buf[pos + size:end])
+            pos = end
+            base = code & ~PAYLOAD_JSON
+            if code & PAYLOAD_JSON:
+                event = json.loads(payload)
+                if base != _UNKNOWN_TYPE:
+                    event = dict({"type": CODE_TYPES.get(base)}, **event)
+            else:
+                event = {"type": CODE_TYPES.get(base), "content": payload.decode("utf-8")}
+                if n:
+                    event["n"] = n
+            events.append(event)
+        del buf[:pos]
+        return events
+
+    def _feed_msgpack(self, chunk) -> List[Dict]:
+        self._unpacker.feed(chunk)
+        events = []
+        for event in self._unpacker:
+            t = event.get("type")
+            if isinstance(t, int):
+                event["type"] = CODE_TYPES.get(t, t)
+            events.append(event)
+        return events
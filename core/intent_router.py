@@ -0,0 +1,354 @@
+import calendar
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .knowledge_manager import ROOT_DIR
+from .script_templates import render_template
+
+ALIASES_PATH = os.path.join(ROOT_DIR, "knowledge_base", "stock_aliases.json")
+
+# Routes below this score go to the LLM
+DEFAULT_THRESHOLD = 0.8
+
+_CN_NUM = {"一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10, "半": 0.5}
+
+_TS_CODE_RE = re.compile(r"(?<![\dA-Za-z])(\d{6})(?:\.(SH|SZ|BJ))?(?![\dA-Za-z])", re.I)
+_DATE_RE = re.compile(
+    r"(?P<y>(?:19|20)\d{2})(?P<sep>[-/.])(?P<m>[01]?\d)(?P=sep)(?P<d>[0-3]?\d)(?!\d)"
+    r"|(?P<yc>(?:19|20)\d{2})年(?P<mc>[01]?\d)月(?P<dc>[0-3]?\d)[日号]"
+    r"|(?<!\d)(?P<yn>(?:19|20)\d{2})(?P<mn>[01]\d)(?P<dn>[0-3]\d)(?!\d)"
+    r"|(?P<y2>(?:19|20)\d{2})年(?P<m2>[01]?\d)月"
+    r"|(?P<y3>(?:19|20)\d{2})年"
+)
+_QUARTER_RE = re.compile(r"((?:19|20)\d{2})\s*(?:Q([1-4])|年?第?([一二三四1-4])季度)", re.I)
+# "2023年1月到3月" / "2023-01-05至3月31日" / "2023年至今": the end inherits the start's year (and month)
+_RANGE_WORD_RE = re.compile(r"\s*(?:到|至|~|～|—)\s*")
+_RANGE_END_RE = re.compile(r"(?P<m>[01]?\d)月(?:(?P<d>[0-3]?\d)[日号])?|(?P<dd>[0-3]?\d)[日号]|(?P<now>今天|今日|今|现在|目前)")
+_RELATIVE_RE = re.compile(r"(?:近|最近|过去)([一二两三四五六七八九十半\d]+)(?:个)?(年|月|周|天|日|季度)")
+
+_OUTPUT_WORDS = {
+    "chart": ("折线图", "走势图", "曲线", "图表", "画图", "绘制", "画出", "画", "可视化", "趋势", "走势", "plot", "chart"),
+    "excel": ("excel", "xlsx", "表格", "导出"),
+    "csv": ("csv",),
+}
+_INDICATORS = {
+    "GDP": ("gdp", "国内生产总值"),
+    "CPI": ("cpi", "居民消费价格指数", "消费价格指数"),
+}
+_SOFT_WORDS = ("分析",)
+# The words a template understands. Any other text left after the entities
+# (分红, PE, 换手率, K线, 资金流向, 均线, 同比, ...) sends the intent to the LLM.
+_FILLER = (
+    "请帮我", "帮我", "给我", "请", "获取", "查询", "查看", "下载", "导出", "输出", "保存", "生成", "绘制", "画出", "画",
+    "做", "一个", "一张", "一份", "的", "了", "并且", "并", "以及", "和", "及", "数据", "日线", "日k", "行情", "每日",
+    "股价", "价格", "收盘价", "走势", "趋势", "从", "至", "到", "期间", "之间", "在", "为", "成", "文件", "表格",
+    "数值", "变化", "情况", "一下", "股票", "历史", "可视化", "图", "以来", "时间", "区间", "序列", "分析",
+)
+# Only meaningful next to GDP/CPI: "平安银行月度行情" is not a daily-bar request
+_MACRO_FILLER = ("中国", "宏观", "季度", "月度", "数据")
+
+
+def _cn_number(text: str) -> float:
+    if text.isdigit():
+        return float(text)
+    if text in _CN_NUM:
+        return float(_CN_NUM[text])
+    if text.startswith("十"):
+        return 10 + _CN_NUM.get(text[1:], 0)
+    if "十" in text:
+        tens, _, ones = text.partition("十")
+        return _CN_NUM.get(tens, 1) * 10 + _CN_NUM.get(ones, 0)
+    return 0.0
+
+
+@dataclass
+class Entities:
+    """What could be recognized in an intent, plus the text left over."""
+    stocks: List[Tuple[str, str]] = field(default_factory=list)  # (name, ts_code)
+    start: Optional[date] = None
+    end: Optional[date] = None
+    quarters: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    indicator: Optional[str] = None
+    open_range: bool = False  # "X到Y" where Y could not be read
+    soft: List[str] = field(default_factory=list)
+    residual: str = ""
+    spans: List[Tuple[int, int, str, str]] = field(default_factory=list)  # (start, end, kind, value)
+
+
+@dataclass
+class RouteMatch:
+    template: str
+    params: Dict
+    confidence: float
+    code: str
+    reasons: List[str]
+
+
+def _month_end(y: int, m: int) -> date:
+    return date(y, m, calendar.monthrange(y, m)[1])
+
+
+def load_aliases(path: str = ALIASES_PATH) -> Dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _exchange(code: str) -> str:
+    if code[0] == "6":
+        return "SH"
+    if code[0] in "48":
+        return "BJ"
+    return "SZ"
+
+
+def extract_entities(intent: str, aliases: Dict[str, str], today: Optional[date] = None) -> Entities:
+    """Rule-based extraction of stocks, date range, quarters, indicator and output types."""
+    today = today or date.today()
+    text = intent.strip()
+    lower = text.lower()
+    ent = Entities()
+    taken = [False] * len(text)
+
+    def take(s: int, e: int, kind: str, value: str = ""):
+        for i in range(s, e):
+            taken[i] = True
+        ent.spans.append((s, e, kind, value))
+
+    def free(s: int, e: int) -> bool:
+        return not any(taken[s:e])
+
+    # Stock names, longest alias first
+    for name in sorted(aliases, key=len, reverse=True):
+        for m in re.finditer(re.escape(name.lower()), lower):
+            if free(m.start(), m.end()):
+                code = aliases[name]
+                if code not in [c for _, c in ent.stocks]:
+                    ent.stocks.append((name, code))
+                take(m.start(), m.end(), "stock", code)
+
+    # Quarters before dates so "2018Q1" is not read as a year
+    for m in _QUARTER_RE.finditer(text):
+        if free(m.start(), m.end()):
+            q = m.group(2) or m.group(3)
+            q = int(q) if q.isdigit() else int(_cn_number(q))
+            ent.quarters.append(f"{m.group(1)}Q{q}")
+            take(m.start(), m.end(), "quarter", ent.quarters[-1])
+
+    dates: List[Tuple[date, date]] = []
+    ends: List[Tuple[int, date]] = []  # (span end, start date) to look for "到Y" after
+    for m in _DATE_RE.finditer(text):
+        if not free(m.start(), m.end()):
+            continue
+        try:
+            ymd = next(((m.group("y" + k), m.group("m" + k), m.group("d" + k))
+                        for k in ("", "c", "n") if m.group("y" + k)), None)
+            if ymd:
+                d = date(*map(int, ymd))
+                dates.append((d, d))
+            elif m.group("y2"):
+                y, mo = int(m.group("y2")), int(m.group("m2"))
+                dates.append((date(y, mo, 1), _month_end(y, mo)))
+            else:
+                y = int(m.group("y3"))
+                dates.append((date(y, 1, 1), date(y, 12, 31)))
+        except ValueError:
+            continue
+        take(m.start(), m.end(), "date")
+        ends.append((m.end(), dates[-1][0]))
+
+    for pos, first in ends:
+        word = _RANGE_WORD_RE.match(text, pos)
+        if not word or not word.group().strip():
+            continue
+        if _DATE_RE.match(text, word.end()):  # full second date, already read
+            continue
+        m = _RANGE_END_RE.match(text, word.end())
+        try:
+            if m is None:
+                raise ValueError
+            if m.group("now"):
+                dates.append((today, today))
+            elif m.group("m"):
+                mo = int(m.group("m"))
+                dates.append((date(first.year, mo, int(m.group("d"))), date(first.year, mo, int(m.group("d"))))
+                             if m.group("d") else (date(first.year, mo, 1), _month_end(first.year, mo)))
+            else:
+                d = date(first.year, first.month, int(m.group("dd")))
+                dates.append((d, d))
+        except ValueError:
+            ent.open_range = True
+            continue
+        take(word.start(), m.end(), "date")
+
+    # ts_code / bare 6-digit code (after dates, so 20230101 is not a code)
+    for m in _TS_CODE_RE.finditer(text):
+        if free(m.start(), m.end()):
+            code = f"{m.group(1)}.{(m.group(2) or _exchange(m.group(1))).upper()}"
+            if code not in [c for _, c in ent.stocks]:
+                ent.stocks.append((code, code))
+            take(m.start(), m.end(), "stock", code)
+
+    if dates:
+        ent.start = min(s for s, _ in dates)
+        ent.end = max(e for _, e in dates)
+    else:
+        rel = _RELATIVE_RE.search(text)
+        if rel:
+            n, unit = _cn_number(rel.group(1)), rel.group(2)
+            days = {"年": 365, "月": 30.5, "季度": 91.5, "周": 7, "天": 1, "日": 1}[unit] * n
+            ent.start, ent.end = today - timedelta(days=round(days)), today
+            take(rel.start(), rel.end(), "reldate")
+        elif "今年" in text:
+            ent.start, ent.end = date(today.year, 1, 1), today
+            take(text.index("今年"), text.index("今年") + 2, "reldate")
+        elif "去年" in text:
+            ent.start, ent.end = date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+            take(text.index("去年"), text.index("去年") + 2, "reldate")
+    if ent.end and ent.end > today:
+        ent.end = today
+
+    for key, words in _INDICATORS.items():
+        for w in words:
+            i = lower.find(w)
+            if i >= 0 and free(i, i + len(w)):
+                ent.indicator = ent.indicator or key
+                take(i, i + len(w), "indicator", key)
+
+    for kind, words in _OUTPUT_WORDS.items():
+        for w in words:
+            i = lower.find(w)
+            if i >= 0 and free(i, i + len(w)):
+                if kind not in ent.outputs:
+                    ent.outputs.append(kind)
+                take(i, i + len(w), "output", kind)
+
+    ent.soft = [w for w in _SOFT_WORDS if w in lower]
+
+    residual = "".join(ch for ch, t in zip(lower, taken) if not t)
+    filler = _FILLER + _MACRO_FILLER if ent.indicator else _FILLER
+    for w in sorted(filler, key=len, reverse=True):
+        residual = residual.replace(w, "")
+    ent.residual = re.sub(r"[\s\W_]+", "", residual)
+    return ent
+
+
+class IntentRouter:
+    """
+    Maps common intent shapes to parameterized templates:
+      - one stock's daily bars over a range -> Excel / CSV / close-price line chart
+      - GDP (quarterly) or CPI (monthly) over a range -> Excel / CSV / line chart
+    Text outside the entities and the understood words, or a range whose end
+    cannot be read, means no route. route() also returns None whenever the
+    score is below `threshold`.
+    """
+
+    def __init__(self, aliases: Optional[Dict[str, str]] = None, threshold: float = DEFAULT_THRESHOLD):
+        self.aliases = aliases if aliases is not None else load_aliases()
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._stats = {"routed": 0, "fallback": 0}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def score(self, intent: str, today: Optional[date] = None) -> Optional[RouteMatch]:
+        """Best template match with its confidence (may be below threshold)."""
+        ent = extract_entities(intent, self.aliases, today)
+        reasons = []
+        confidence = 1.0
+        if ent.residual or ent.open_range:
+            return None
+        if ent.soft:
+            confidence -= 0.1
+            reasons.append(f"soft:{','.join(ent.soft)}")
+        outputs = ent.outputs or ["excel"]
+        if not ent.outputs:
+            confidence -= 0.1
+            reasons.append("default-output")
+
+        if ent.indicator and not ent.stocks:
+            return self._macro(ent, outputs, confidence, reasons, today or date.today())
+        if len(ent.stocks) == 1 and not ent.indicator and not ent.quarters:
+            if ent.start is None:
+                return None
+            name, code = ent.stocks[0]
+            params = {
+                "ts_code": code,
+                "name": name,
+                "start_date": ent.start.strftime("%Y%m%d"),
+                "end_date": ent.end.strftime("%Y%m%d"),
+                "outputs": outputs,
+                "columns": _column_names("pro.daily"),
+            }
+            return RouteMatch("stock_daily", params, round(confidence, 3),
+                              render_template("stock_daily", params), reasons)
+        return None
+
+    def _macro(self, ent: Entities, outputs: List[str], confidence: float, reasons: List[str],
+               today: date) -> Optional[RouteMatch]:
+        if ent.indicator == "GDP":
+            if ent.quarters:
+                start_q, end_q = min(ent.quarters), max(ent.quarters)
+            elif ent.start is not None:
+                start_q = f"{ent.start.year}Q{(ent.start.month - 1) // 3 + 1}"
+                end_q = f"{ent.end.year}Q{(ent.end.month - 1) // 3 + 1}"
+            else:
+                return None
+            params = {"api": "cn_gdp", "label": "GDP", "query": {"start_q": start_q, "end_q": end_q},
+                      "start": start_q, "end": end_q, "x_col": "quarter", "y_col": "gdp",
+                      "columns": _column_names("pro.cn_gdp")}
+        else:
+            if ent.quarters or ent.start is None:
+                return None
+            start_m, end_m = ent.start.strftime("%Y%m"), ent.end.strftime("%Y%m")
+            params = {"api": "cn_cpi", "label": "CPI", "query": {"start_m": start_m, "end_m": end_m},
+                      "start": start_m, "end": end_m, "x_col": "month", "y_col": "nt_yoy",
+                      "columns": _column_names("pro.cn_cpi")}
+        params["outputs"] = outputs
+        return RouteMatch("macro_series", params, round(confidence, 3),
+                          render_template("macro_series", params), reasons)
+
+    def route(self, intent: str, today: Optional[date] = None) -> Optional[RouteMatch]:
+        match = self.score(intent, today)
+        if match is None or match.confidence < self.threshold:
+            self._count("fallback")
+            return None
+        self._count("routed")
+        return match
+
+
+def _column_names(function_name: str) -> Dict[str, str]:
+    """Chinese headers from the knowledge base `output_columns`."""
+    from .prompt_registry import get_prompt_registry
+    doc = get_prompt_registry().function_doc(function_name) or {}
+    return {c["name"]: c.get("description", c["name"]) for c in doc.get("output_columns", [])}
+
+
+_router: Optional[IntentRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_intent_router() -> IntentRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = IntentRouter()
+        return _router
+
+
+def route_intent(intent: str) -> Optional[RouteMatch]:
+    return get_intent_router().route(intent)
@@ -0,0 +1,206 @@
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .event_stream import DEFAULT_MAX_FRAME_BYTES, DEFAULT_WINDOW, coalesce_events
+
+_OUTPUT_PATH_RE = re.compile(r"(?:OUTPUT_PATH:|结果已保存至:\s*)(\S.*)")
+
+PENDING, RUNNING, SUCCEEDED, FAILED, CANCELLED = "pending", "running", "succeeded", "failed", "cancelled"
+FINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when too many jobs are waiting (callers should back off)."""
+
+
+class Job:
+    """
+    One engine run. Events are appended to an in-memory log that any number
+    of readers can follow from their own cursor, so a slow reader never
+    blocks the engine or the other readers.
+    """
+
+    def __init__(self, intent: str, history: Optional[list] = None,
+                 on_done: Optional[Callable[["Job"], None]] = None):
+        self.id = uuid.uuid4().hex[:16]
+        self.intent = intent
+        self.history = history
+        self.on_done = on_done
+        self.status = PENDING
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[str] = None
+        self.artifacts: List[str] = []
+        self.events: List[Dict] = []
+        self._cancel = threading.Event()
+        self._future: Optional[Future] = None
+        self._cond = threading.Condition()
+        self._waiters: List[Callable[[], None]] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATES
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _append(self, event: Dict):
+        with self._cond:
+            self.events.append(event)
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        for notify in waiters:
+            notify()
+
+    def _finish(self, status: str):
+        with self._cond:
+            self.status = status
+            self.finished_at = time.time()
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        for notify in waiters:
+            notify()
+        if self.on_done is not None:
+            self.on_done(self)
+
+    def add_waiter(self, notify: Callable[[], None], cursor: int) -> bool:
+        """
+        Register a one-shot callback fired on the next event/finish.
+        Returns False (without registering) if there is already something past `cursor`.
+        """
+        with self._cond:
+            if cursor < len(self.events) or self.done:
+                return False
+            self._waiters.append(notify)
+            return True
+
+    def wait(self, cursor: int, timeout: Optional[float] = None) -> List[Dict]:
+        """Blocking read: events after `cursor` (empty on timeout or when the job is done)."""
+        with self._cond:
+            if cursor >= len(self.events) and not self.done:
+                self._cond.wait(timeout)
+            return self.events[cursor:]
+
+    def snapshot(self) -> Dict:
+        return {
+            "id": self.id,
+            "intent": self.intent,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "artifacts": list(self.artifacts),
+            "events": len(self.events),
+        }
+
+
+def _default_runner(intent: str, history: Optional[list], run_id: str) -> Iterable[Dict]:
+    from .agent_engine import workflow_events
+    return workflow_events(intent, history, run_id=run_id)
+
+
+class JobManager:
+    """
+    Runs engine workflows on a bounded thread pool.
+
+    Backpressure: at most `max_workers` jobs run at once and at most
+    `max_pending` wait; beyond that submit() raises QueueFull. Finished
+    jobs are kept for `retention` seconds for status/artifact lookups.
+    """
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, retention: float = 3600.0,
+                 coalesce_window: float = DEFAULT_WINDOW, max_frame_bytes: int = DEFAULT_MAX_FRAME_BYTES,
+                 runner: Callable[[str, Optional[list], str], Iterable[Dict]] = _default_runner):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retention = retention
+        self.coalesce_window = coalesce_window
+        self.max_frame_bytes = max_frame_bytes
+        self.runner = runner
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, intent: str, history: Optional[list] = None,
+               on_done: Optional[Callable[[Job], None]] = None) -> Job:
+        """Queue a run; `on_done(job)` is called from the worker thread once it finishes."""
+        with self._lock:
+            self._prune()
+            pending = sum(1 for j in self._jobs.values() if j.status == PENDING)
+            if pending >= self.max_pending:
+                raise QueueFull(f"{pending} jobs already waiting")
+            job = Job(intent, history, on_done)
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for j in self._jobs.values():
+                counts[j.status] = counts.get(j.status, 0) + 1
+        return {"max_workers": self.max_workers, "max_pending": self.max_pending, "jobs": counts}
+
+    def shutdown(self, wait: bool = True):
+        """Cancel every job; queued ones finish as CANCELLED here since _run will never see them."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel()
+            if job._future is not None and job._future.cancel():
+                job._append({"type": "cancelled", "content": "已取消"})
+                job._finish(CANCELLED)
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [k for k, j in self._jobs.items() if j.done and (j.finished_at or 0) < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, job: Job):
+        if job._cancel.is_set():
+            job._append({"type": "cancelled", "content": "已取消"})
+            job._finish(CANCELLED)
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        status = FAILED
+        stream = None
+        try:
+            events = self.runner(job.intent, job.history, job.id)
+            stream = coalesce_events(events, window=self.coalesce_window, max_bytes=self.max_frame_bytes)
+            for ev in stream:
+                job._append(ev)
+                if ev.get("type") == "result":
+                    job.result = ev.get("data")
+                    status = SUCCEEDED if ev.get("success") else FAILED
+                    job.artifacts.extend(p.strip() for p in _OUTPUT_PATH_RE.findall(str(ev.get("data") or "")))
+                if job._cancel.is_set():
+                    job._append({"type": "cancelled", "content": "已取消"})
+                    status = CANCELLED
+                    break
+        except Exception as e:
+            job.result = str(e)
+            job._append({"type": "result", "success": False, "data": str(e)})
+            status = FAILED
+        finally:
+            if stream is not None:
+                stream.close()
+            job._finish(status)
@@ -1,42 +1,111 @@
 import os
 import json
-from typing import List, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
 
-def load_knowledge_base() -> str:
+
+def canonical_json(data) -> str:
     """
-    Load all knowledge base schemas and docs into a string for the LLM context.
-    Currently loads tushare_schema.json and tool_docs.json.
+    Byte-stable serialization for prompt text: sorted keys, fixed separators,
+    no indentation. Identical data always yields identical bytes, which keeps
+    the prompt prefix cacheable on the provider side (and saves tokens).
     """
-    paths = [
-        os.path.join(ROOT_DIR, "knowledge_base/tushare_schema.json"),
-        #os.path.join(ROOT_DIR, "knowledge_base/tool_docs.json")
-    ]
-    
-    knowledge_content = []
-    
-    for p in paths:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+KNOWLEDGE_PATHS = [
+    os.path.join(ROOT_DIR, "knowledge_base/tushare_schema.json"),
+    os.path.join(ROOT_DIR, "knowledge_base/tool_docs.json"),
+]
+
+# Knowledge entries grouped by what a request mentions when it needs them:
+# topic -> (trigger words, function names or "PREFIX." prefixes). Entries in
+# no topic are always sent, so a newly documented helper is never dropped.
+KNOWLEDGE_TOPICS: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "daily": (("日线", "行情", "股价", "收盘", "开盘", "最高价", "最低价", "成交量", "成交额", "涨跌", "k线"),
+              ("pro.daily",)),
+    "chart": (("图", "画", "绘", "可视化", "走势", "趋势", "曲线", "plot", "chart"),
+              ("FIGURES.", "save_figure", "plot_series", "bar_series", "annotate_peaks")),
+    "backtest": (("回测", "策略", "买入", "卖出", "金叉", "死叉", "交叉", "持有", "持仓", "backtest"),
+                 ("price_panel", "ma_cross_signals", "backtest")),
+    "market": (("全市场", "所有股票", "全部股票", "排名", "排行", "涨幅", "跌幅", "sql", "扫描", "汇总"), ("QUERY.",)),
+    "factors": (("选股", "筛选", "因子", "波动率", "换手", "均线", "动量"), ("FACTORS.",)),
+    "gdp": (("gdp", "国内生产总值", "经济增长"), ("pro.cn_gdp",)),
+    "cpi": (("cpi", "消费价格", "通胀", "物价"), ("pro.cn_cpi",)),
+    "libor": (("libor", "拆借", "利率"), ("pro.libor",)),
+    "block_trade": (("大宗",), ("pro.block_trade",)),
+    "income": (("财务", "利润", "营收", "营业收入", "净利", "毛利", "每股收益", "eps", "income"), ("pro.income",)),
+    "fund": (("etf", "基金"), ("pro.fund_daily",)),
+}
+# Sent with every subset: most scripts start from daily bars
+ALWAYS_FUNCTIONS = ("pro.daily",)
+
+
+def _in_topic(name: str, members: Tuple[str, ...]) -> bool:
+    return any(name.startswith(m) if m.endswith(".") else name == m for m in members)
+
+
+def select_functions(docs: Dict[str, object], query: str) -> Optional[Tuple[str, ...]]:
+    """
+    Documented function names `query` needs, for render_knowledge(subset=...).
+    None (the whole knowledge base) when the query matches no topic.
+    """
+    text = query.lower()
+    matched = [members for words, members in KNOWLEDGE_TOPICS.values() if any(w in text for w in words)]
+    if not matched:
+        return None
+    topics = [members for _, members in KNOWLEDGE_TOPICS.values()]
+    names = set(ALWAYS_FUNCTIONS)
+    for data in docs.values():
+        for entry in data if isinstance(data, list) else ():
+            name = entry.get("function_name") if isinstance(entry, dict) else None
+            if name and (any(_in_topic(name, m) for m in matched) or not any(_in_topic(name, m) for m in topics)):
+                names.add(name)
+    return tuple(sorted(names))
+
+def read_knowledge_files(paths: List[str] | None = None) -> Dict[str, object]:
+    """
+    Parse the knowledge files, keyed by file name (in path order).
+    Missing or malformed files are skipped.
+    """
+    docs = {}
+    for p in paths or KNOWLEDGE_PATHS:
         if os.path.exists(p):
             try:
                 with open(p, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    # Simple formatting for readability
-                    filename = os.path.basename(p)
-                    knowledge_content.append(f"--- {filename} ---")
-                    knowledge_content.append(json.dumps(data, ensure_ascii=False, indent=2))
+                    docs[os.path.basename(p)] = json.load(f)
             except Exception as e:
                 # Log error or skip? For now skip
                 pass
-                
+    return docs
+
+def render_knowledge(docs: Dict[str, object], subset: Iterable[str] | None = None) -> str:
+    """
+    Render parsed knowledge into prompt text.
+    `subset` restricts list-style docs to entries whose `function_name` is in it.
+    """
+    wanted = set(subset) if subset is not None else None
+    knowledge_content = []
+    for filename, data in docs.items():
+        if wanted is not None and isinstance(data, list):
+            data = [d for d in data if not isinstance(d, dict) or d.get("function_name") in wanted]
+        knowledge_content.append(f"--- {filename} ---")
+        knowledge_content.append(canonical_json(data))
     return "\n\n".join(knowledge_content)
 
+def load_knowledge_base() -> str:
+    """
+    Load all knowledge base schemas and docs into a string for the LLM context.
+    Currently loads tushare_schema.json and tool_docs.json.
+    Reads from disk on every call; the workflows use the cached registry instead.
+    """
+    return render_knowledge(read_knowledge_files())
+
 def get_knowledge_context(query: str) -> str:
     """
-    Retrieve relevant knowledge based on query.
-    For MVP, we just return the full knowledge base as it's small.
-    Future: Implement vector search or keyword filtering.
+    Retrieve relevant knowledge based on query (keyword topics, see select_functions).
     """
-    # TODO: Implement retrieval logic if KB grows
-    return load_knowledge_base()
+    from .prompt_registry import get_prompt_registry
+    registry = get_prompt_registry()
+    return registry.knowledge_text(registry.subset_for(query))
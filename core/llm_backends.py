@@ -0,0 +1,372 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+from openai import OpenAI
+
+DEFAULT_BASE_URL = "https://api.deepseek.com/v1"
+
+
+@dataclass
+class BackendConfig:
+    """
+    One OpenAI-compatible endpoint/model.
+    `model=None` means "use the model selected in the settings".
+    """
+    name: str
+    base_url: str = DEFAULT_BASE_URL
+    model: Optional[str] = None
+    api_key_env: str = "DEEPSEEK_API_KEY"
+    api_key: Optional[str] = None
+    connect_timeout: float = 10.0
+    read_timeout: float = 120.0
+    first_token_timeout: float = 60.0
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BackendConfig":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class BackendState:
+    """Client plus health / latency bookkeeping for one backend."""
+
+    EWMA_ALPHA = 0.3
+    COOLDOWN_BASE = 5.0
+    COOLDOWN_MAX = 300.0
+    PRIOR_TTFT = 1.0
+
+    def __init__(self, config: BackendConfig):
+        self.config = config
+        self.ewma_ttft: Optional[float] = None
+        self.ewma_latency: Optional[float] = None
+        self.ttft_samples = deque(maxlen=200)
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.hedges_won = 0
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            api_key = self.config.api_key or os.getenv(self.config.api_key_env) or "EMPTY"
+            self._client = OpenAI(
+                api_key=api_key,
+                base_url=self.config.base_url,
+                timeout=httpx.Timeout(self.config.read_timeout, connect=self.config.connect_timeout),
+                # Failover is handled by the pool, not by per-client retries
+                max_retries=0,
+            )
+        return self._client
+
+    def is_healthy(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) >= self.down_until
+
+    def record_success(self, ttft: Optional[float], latency: float):
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+            self.down_until = 0.0
+            if ttft is not None:
+                self.ttft_samples.append(ttft)
+                self.ewma_ttft = ttft if self.ewma_ttft is None else (
+                    self.EWMA_ALPHA * ttft + (1 - self.EWMA_ALPHA) * self.ewma_ttft)
+            self.ewma_latency = latency if self.ewma_latency is None else (
+                self.EWMA_ALPHA * latency + (1 - self.EWMA_ALPHA) * self.ewma_latency)
+
+    def record_failure(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.consecutive_failures += 1
+            cooldown = min(self.COOLDOWN_BASE * 2 ** (self.consecutive_failures - 1), self.COOLDOWN_MAX)
+            self.down_until = time.monotonic() + cooldown
+
+    def record_hedge_win(self):
+        with self._lock:
+            self.hedges_won += 1
+
+    def p95_ttft(self) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self.ttft_samples)
+        if not samples:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+    def score(self) -> float:
+        return self.ewma_ttft if self.ewma_ttft is not None else self.PRIOR_TTFT
+
+    def snapshot(self) -> Dict:
+        return {
+            "name": self.config.name,
+            "model": self.config.model,
+            "healthy": self.is_healthy(),
+            "ewma_ttft": round(self.ewma_ttft, 3) if self.ewma_ttft is not None else None,
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+            "p95_ttft": self.p95_ttft(),
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedges_won": self.hedges_won,
+        }
+
+
+def _has_token(chunk) -> bool:
+    if not getattr(chunk, "choices", None):
+        return False
+    delta = chunk.choices[0].delta
+    return bool(getattr(delta, "content", None) or getattr(delta, "reasoning_content", None))
+
+
+class _StreamAttempt:
+    """A streaming request to one backend, pumped into the shared queue by a thread."""
+
+    def __init__(self, backend: BackendState, events: queue.Queue, request: Dict, hedge: bool = False):
+        self.backend = backend
+        self.events = events
+        self.request = request
+        self.hedge = hedge
+        self.cancelled = threading.Event()
+        self.buffer: List = []
+        self.started = time.perf_counter()
+        self.deadline = time.monotonic() + backend.config.first_token_timeout
+        self.ttft: Optional[float] = None
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def _run(self):
+        response = None
+        try:
+            response = self.backend.client.chat.completions.create(stream=True, **self.request)
+            for chunk in response:
+                if self.cancelled.is_set():
+                    break
+                self.events.put((self, "chunk", chunk))
+            if not self.cancelled.is_set():
+                self.events.put((self, "done", None))
+        except Exception as e:
+            if not self.cancelled.is_set():
+                self.events.put((self, "error", e))
+        finally:
+            if response is not None and self.cancelled.is_set():
+                try:
+                    response.close()
+                except Exception:
+                    pass
+
+
+class PooledStream:
+    """
+    Iterable of raw completion chunks served by whichever backend answers first.
+
+    Failover: a backend that errors (or exceeds its first-token timeout) before
+    producing a token is marked unhealthy and the next one is tried.
+    Hedging: if enabled and no token arrived after the primary's p95 TTFT,
+    a second request is fired at the next backend; the first to produce a
+    token wins and the other is cancelled.
+    `backend` holds the winning backend name once streaming has started.
+    """
+
+    def __init__(self, pool: "BackendPool", request: Dict):
+        self.pool = pool
+        self.request = request
+        self.backend: Optional[str] = None
+        self.hedged = False
+
+    def _request_for(self, backend: BackendState) -> Dict:
+        req = dict(self.request)
+        if backend.config.model:
+            req["model"] = backend.config.model
+        return req
+
+    def __iter__(self) -> Iterator:
+        events: queue.Queue = queue.Queue()
+        pending = self.pool.ranked()
+        active: List[_StreamAttempt] = []
+        last_error: Optional[Exception] = None
+
+        def launch(hedge: bool = False) -> bool:
+            if not pending:
+                return False
+            backend = pending.pop(0)
+            attempt = _StreamAttempt(backend, events, self._request_for(backend), hedge=hedge)
+            active.append(attempt)
+            attempt.start()
+            return True
+
+        launch()
+        hedge_at = None
+        if self.pool.hedge and pending:
+            hedge_at = time.monotonic() + self.pool.hedge_delay(active[0].backend)
+
+        winner: Optional[_StreamAttempt] = None
+        try:
+            while winner is None:
+                now = time.monotonic()
+                wake = min([a.deadline for a in active] + ([hedge_at] if hedge_at else []))
+                try:
+                    attempt, kind, payload = events.get(timeout=max(wake - now, 0.0))
+                except queue.Empty:
+                    now = time.monotonic()
+                    for a in list(active):
+                        if now >= a.deadline:
+                            a.cancel()
+                            a.backend.record_failure()
+                            active.remove(a)
+                            last_error = TimeoutError(f"{a.backend.config.name}: no token within first_token_timeout")
+                    if hedge_at and now >= hedge_at:
+                        hedge_at = None
+                        self.hedged = launch(hedge=True) or self.hedged
+                    if not active and not launch():
+                        raise last_error or TimeoutError("No LLM backend produced a token")
+                    continue
+
+                if attempt not in active:
+                    continue
+                if kind == "chunk":
+                    attempt.buffer.append(payload)
+                    if _has_token(payload):
+                        attempt.ttft = time.perf_counter() - attempt.started
+                        winner = attempt
+                elif kind == "done":
+                    # Finished without any content token; still a valid (empty) answer
+                    winner = attempt
+                else:
+                    attempt.backend.record_failure()
+                    active.remove(attempt)
+                    last_error = payload
+                    if not active and not launch():
+                        raise last_error
+
+            for a in active:
+                if a is not winner:
+                    a.cancel()
+            if winner.hedge:
+                winner.backend.record_hedge_win()
+            self.backend = winner.backend.config.name
+
+            buffered, winner.buffer = winner.buffer, []
+            yield from buffered
+            if kind == "done":
+                winner.backend.record_success(winner.ttft, time.perf_counter() - winner.started)
+                return
+            while True:
+                try:
+                    attempt, kind, payload = events.get(timeout=winner.backend.config.read_timeout)
+                except queue.Empty:
+                    winner.backend.record_failure()
+                    raise TimeoutError(f"{winner.backend.config.name}: no chunk within read_timeout") from None
+                if attempt is not winner:
+                    continue
+                if kind == "chunk":
+                    yield payload
+                elif kind == "done":
+                    winner.backend.record_success(winner.ttft, time.perf_counter() - winner.started)
+                    return
+                else:
+                    winner.backend.record_failure()
+                    raise payload
+        finally:
+            for a in active:
+                a.cancel()
+
+
+class BackendPool:
+    """
+    Registry of LLM backends with health tracking and EWMA-latency routing.
+    """
+
+    def __init__(self, configs: List[BackendConfig], hedge: bool = False,
+                 hedge_min_delay: float = 0.5, hedge_max_delay: float = 10.0,
+                 default_hedge_delay: float = 3.0):
+        if not configs:
+            raise ValueError("BackendPool needs at least one backend")
+        self.backends = [BackendState(c) for c in configs]
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.default_hedge_delay = default_hedge_delay
+
+    def ranked(self) -> List[BackendState]:
+        """Healthy backends by latency score (config order breaks ties), then cooling-down ones."""
+        now = time.monotonic()
+        order = {id(b): i for i, b in enumerate(self.backends)}
+        healthy = [b for b in self.backends if b.is_healthy(now)]
+        down = [b for b in self.backends if not b.is_healthy(now)]
+        healthy.sort(key=lambda b: (b.score(), order[id(b)]))
+        down.sort(key=lambda b: b.down_until)
+        return healthy + down
+
+    def hedge_delay(self, backend: BackendState) -> float:
+        p95 = backend.p95_ttft()
+        delay = p95 if p95 is not None else self.default_hedge_delay
+        return min(max(delay, self.hedge_min_delay), self.hedge_max_delay)
+
+    def complete(self, messages: List[Dict], model: Optional[str] = None, **kwargs):
+        """Non-streaming completion with failover. Returns (response, backend_name)."""
+        last_error: Optional[Exception] = None
+        for backend in self.ranked():
+            req = dict(kwargs, messages=messages, model=backend.config.model or model)
+            t0 = time.perf_counter()
+            try:
+                response = backend.client.chat.completions.create(stream=False, **req)
+            except Exception as e:
+                backend.record_failure()
+                last_error = e
+                continue
+            latency = time.perf_counter() - t0
+            backend.record_success(None, latency)
+            return response, backend.config.name
+        raise last_error
+
+    def stream(self, messages: List[Dict], model: Optional[str] = None, **kwargs) -> PooledStream:
+        return PooledStream(self, dict(kwargs, messages=messages, model=model))
+
+    def stats(self) -> List[Dict]:
+        return [b.snapshot() for b in self.backends]
+
+
+def load_backend_configs(cfg: Dict) -> List[BackendConfig]:
+    """
+    Backends come from `llm_backends` in config.json; without it a single
+    backend is built from the DEEPSEEK_* environment variables.
+    """
+    entries = cfg.get("llm_backends") or []
+    if entries:
+        return [BackendConfig.from_dict(e) for e in entries]
+    return [BackendConfig(name="deepseek", base_url=os.getenv("DEEPSEEK_BASE_URL", DEFAULT_BASE_URL))]
+
+
+_pool: Optional[BackendPool] = None
+_pool_key: Optional[str] = None
+_pool_lock = threading.Lock()
+
+
+def get_backend_pool(cfg: Optional[Dict] = None) -> BackendPool:
+    """
+    Process-wide pool, shared by all workflows so health and latency
+    statistics accumulate. Rebuilt only when the backend settings change.
+    """
+    global _pool, _pool_key
+    cfg = cfg or {}
+    key = json.dumps(
+        [cfg.get("llm_backends"), cfg.get("llm_hedge"), os.getenv("DEEPSEEK_BASE_URL")],
+        sort_keys=True, default=str)
+    with _pool_lock:
+        if _pool is None or key != _pool_key:
+            _pool = BackendPool(load_backend_configs(cfg), hedge=bool(cfg.get("llm_hedge", False)))
+            _pool_key = key
+        return _pool
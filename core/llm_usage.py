@@ -0,0 +1,82 @@
+import threading
+from typing import Dict, Optional
+
+
+def _get(obj, name, default=None):
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def extract_usage(usage, ttft: Optional[float] = None, latency: Optional[float] = None) -> Dict:
+    """
+    Normalize the `usage` field of an OpenAI-compatible response.
+
+    Cache hits are reported differently per provider:
+    - DeepSeek: `prompt_cache_hit_tokens` / `prompt_cache_miss_tokens`
+    - OpenAI style: `prompt_tokens_details.cached_tokens`
+    """
+    prompt_tokens = _get(usage, "prompt_tokens", 0) or 0
+    completion_tokens = _get(usage, "completion_tokens", 0) or 0
+    cached = _get(usage, "prompt_cache_hit_tokens")
+    if cached is None:
+        cached = _get(_get(usage, "prompt_tokens_details"), "cached_tokens")
+    cached = cached or 0
+    miss = _get(usage, "prompt_cache_miss_tokens")
+    if miss is None:
+        miss = max(prompt_tokens - cached, 0)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cache_hit_tokens": cached,
+        "cache_miss_tokens": miss,
+        "cache_hit_ratio": round(cached / prompt_tokens, 4) if prompt_tokens else 0.0,
+        "ttft": round(ttft, 3) if ttft is not None else None,
+        "latency": round(latency, 3) if latency is not None else None,
+    }
+
+
+class UsageTracker:
+    """Process-wide totals, so cache gains can be tracked across requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cache_hit_tokens = 0
+        self.ttft_total = 0.0
+        self.ttft_count = 0
+
+    def record(self, usage: Dict):
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.completion_tokens += usage.get("completion_tokens", 0)
+            self.cache_hit_tokens += usage.get("cache_hit_tokens", 0)
+            if usage.get("ttft") is not None:
+                self.ttft_total += usage["ttft"]
+                self.ttft_count += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cache_hit_tokens": self.cache_hit_tokens,
+                "cache_hit_ratio": round(self.cache_hit_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+                "avg_ttft": round(self.ttft_total / self.ttft_count, 3) if self.ttft_count else None,
+            }
+
+
+usage_tracker = UsageTracker()
+
+
+def get_usage_stats() -> Dict:
+    return usage_tracker.stats()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .conversation import estimate_tokens
+from .knowledge_manager import KNOWLEDGE_PATHS, ROOT_DIR, read_knowledge_files, render_knowledge, select_functions
+from .prompt_templates import build_system_prompt
+
+CONFIG_PATH = os.path.join(ROOT_DIR, "config.json")
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """A rendered system prompt, ready to send."""
+    key: Tuple[str, ...]
+    text: str
+    token_count: int
+    sha256: str
+
+
+class PromptRegistry:
+    """
+    Loads the knowledge files and config.json once and keeps the rendered
+    system prompt per knowledge subset in memory.
+
+    File mtimes are checked at most every `check_interval` seconds; when a
+    knowledge file changes, the parsed docs are reloaded and every rendered
+    prompt is dropped (hot reload). Requests in between never touch the disk.
+    """
+
+    def __init__(self, knowledge_paths: Optional[List[str]] = None, config_path: str = CONFIG_PATH,
+                 check_interval: float = 1.0):
+        self.knowledge_paths = list(knowledge_paths or KNOWLEDGE_PATHS)
+        self.config_path = config_path
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._docs: Optional[Dict[str, object]] = None
+        self._knowledge_sig: Optional[tuple] = None
+        self._prompts: Dict[Tuple[str, ...], CompiledPrompt] = {}
+        self._config: Dict = {}
+        self._config_sig: Optional[tuple] = None
+        self._last_check = 0.0
+        self._stats = {"knowledge_loads": 0, "config_loads": 0, "prompt_builds": 0, "prompt_hits": 0, "mtime_checks": 0}
+
+    @staticmethod
+    def _signature(paths: Iterable[str]) -> tuple:
+        sig = []
+        for p in paths:
+            try:
+                st = os.stat(p)
+                sig.append((p, st.st_mtime_ns, st.st_size))
+            except OSError:
+                sig.append((p, None, None))
+        return tuple(sig)
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if not force and self._docs is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        self._stats["mtime_checks"] += 1
+
+        sig = self._signature(self.knowledge_paths)
+        if self._docs is None or sig != self._knowledge_sig:
+            self._docs = read_knowledge_files(self.knowledge_paths)
+            self._knowledge_sig = sig
+            self._prompts.clear()
+            self._stats["knowledge_loads"] += 1
+
+        config_sig = self._signature([self.config_path])
+        if config_sig != self._config_sig:
+            try:
+                with open(self.config_path, "r", encoding="utf-8") as f:
+                    self._config = json.load(f)
+            except Exception:
+                self._config = {}
+            self._config_sig = config_sig
+            self._stats["config_loads"] += 1
+
+    def _key(self, subset: Optional[Iterable[str]]) -> Tuple[str, ...]:
+        return tuple(sorted(set(subset))) if subset is not None else ("*",)
+
+    def system_prompt(self, subset: Optional[Iterable[str]] = None) -> CompiledPrompt:
+        """
+        System prompt for the given knowledge subset (function names),
+        or for the whole knowledge base when subset is None.
+        """
+        key = self._key(subset)
+        with self._lock:
+            self._refresh()
+            compiled = self._prompts.get(key)
+            if compiled is not None:
+                self._stats["prompt_hits"] += 1
+                return compiled
+            text = build_system_prompt(render_knowledge(self._docs, None if key == ("*",) else key))
+            compiled = CompiledPrompt(
+                key=key,
+                text=text,
+                token_count=estimate_tokens(text),
+                sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            )
+            self._prompts[key] = compiled
+            self._stats["prompt_builds"] += 1
+            return compiled
+
+    def subset_for(self, query: str) -> Optional[Tuple[str, ...]]:
+        """Knowledge subset for a request (None = whole knowledge base), see select_functions."""
+        with self._lock:
+            self._refresh()
+            return select_functions(self._docs, query)
+
+    def knowledge_text(self, subset: Optional[Iterable[str]] = None) -> str:
+        with self._lock:
+            self._refresh()
+            return render_knowledge(self._docs, subset)
+
+    def function_doc(self, function_name: str) -> Optional[Dict]:
+        """Knowledge base entry for e.g. "pro.daily" (None if not documented)."""
+        with self._lock:
+            self._refresh()
+            for data in self._docs.values():
+                if isinstance(data, list):
+                    for entry in data:
+                        if isinstance(entry, dict) and entry.get("function_name") == function_name:
+                            return entry
+            return None
+
+    def config(self) -> Dict:
+        """Parsed config.json (shared dict; treat as read-only)."""
+        with self._lock:
+            self._refresh()
+            return self._config
+
+    def invalidate(self):
+        with self._lock:
+            self._refresh(force=True)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, cached_prompts=len(self._prompts))
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+        return _registry
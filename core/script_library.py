@@ -0,0 +1,220 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .intent_router import extract_entities, get_intent_router
+from .knowledge_manager import ROOT_DIR
+
+LIBRARY_PATH = os.path.join(ROOT_DIR, "workspace", "script_library", "library.json")
+
+# Placeholders in the stored code, e.g. __P_start_ymd__
+_MARK = "__P_{}__"
+_SAFE_VALUE_RE = re.compile(r"^[\w.\-\u4e00-\u9fff]+$")
+_SIGNATURE_DROP_RE = re.compile(r"[\s\W_]+")
+
+# Parameter name -> how its value is derived from the intent's entities
+_DATE_FORMATS = {"ymd": "%Y%m%d", "iso": "%Y-%m-%d", "ym": "%Y%m"}
+
+
+def intent_signature(intent: str, aliases: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+    """
+    Normalized intent with entities lifted out, plus the entity values:
+    "获取平安银行2023年1月的日线数据" -> ("获取<stock0><date>的日线数据", {...}).
+    Relative dates ("近一年") stay in the signature, since the script computes them.
+    """
+    ent = extract_entities(intent, aliases)
+    text = intent.strip().lower()
+    values: Dict[str, str] = {}
+    pieces, pos, stock_i = [], 0, 0
+
+    def plain(chunk: str) -> str:
+        return _SIGNATURE_DROP_RE.sub("", chunk)
+
+    for start, end, kind, value in sorted(ent.spans):
+        if start < pos:
+            continue
+        pieces.append(plain(text[pos:start]))
+        if kind == "stock":
+            pieces.append(f"<stock{stock_i}>")
+            values[f"code{stock_i}"] = value
+            values[f"name{stock_i}"] = intent.strip()[start:end]
+            stock_i += 1
+        elif kind == "date":
+            pieces.append("<date>")
+        elif kind == "quarter":
+            pieces.append("<quarter>")
+        else:
+            pieces.append(plain(text[start:end]))
+        pos = end
+    pieces.append(plain(text[pos:]))
+    signature = "".join(pieces)
+
+    if any(kind == "date" for _, _, kind, _ in ent.spans) and ent.start and ent.end:
+        for suffix, fmt in _DATE_FORMATS.items():
+            values[f"start_{suffix}"] = ent.start.strftime(fmt)
+            values[f"end_{suffix}"] = ent.end.strftime(fmt)
+    if ent.quarters:
+        values["q_start"], values["q_end"] = min(ent.quarters), max(ent.quarters)
+    return signature, values
+
+
+def _literal_re(value: str) -> re.Pattern:
+    # Digit boundaries keep 202301 from matching inside 20230101
+    return re.compile(r"(?<!\d)" + re.escape(value) + r"(?!\d)")
+
+
+def lift_parameters(code: str, values: Dict[str, str]) -> Tuple[Optional[str], List[str]]:
+    """
+    Replace literal entity values in `code` with placeholders.
+    Returns (template, lifted names), or (None, []) when a required entity
+    (stock code, date range, quarter) does not appear literally - such a
+    script can't be safely re-run for other values.
+    """
+    template = code
+    lifted = []
+    # Longest values first so e.g. 2023-01-31 is handled before 202301
+    for name, value in sorted(values.items(), key=lambda kv: len(kv[1]), reverse=True):
+        pattern = _literal_re(value)
+        if pattern.search(template):
+            template = pattern.sub(_MARK.format(name), template)
+            lifted.append(name)
+
+    required = [n for n in values if n.startswith(("code", "q_"))]
+    if any(n not in lifted for n in required):
+        return None, []
+    date_names = [n for n in values if n.startswith(("start_", "end_"))]
+    if date_names and not (any(n.startswith("start_") and n in lifted for n in date_names)
+                           and any(n.startswith("end_") and n in lifted for n in date_names)):
+        return None, []
+    return template, lifted
+
+
+def fill_parameters(template: str, lifted: List[str], values: Dict[str, str]) -> Optional[str]:
+    code = template
+    for name in lifted:
+        value = values.get(name)
+        if value is None or not _SAFE_VALUE_RE.match(value):
+            return None
+        code = code.replace(_MARK.format(name), value)
+    return code
+
+
+@dataclass
+class LibraryHit:
+    signature: str
+    code: str
+    entry: Dict
+
+
+class ScriptLibrary:
+    """
+    Successful LLM-generated scripts, keyed by normalized intent signature
+    with entity literals lifted into parameters. Stored in one JSON file.
+
+    Entries are tied to the system prompt hash (instructions + knowledge
+    base); when the schema changes they are dropped on lookup.
+    """
+
+    def __init__(self, path: str = LIBRARY_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._stats = {"lookups": 0, "hits": 0, "misses": 0, "stored": 0, "unliftable": 0,
+                       "invalidated": 0, "replay_failures": 0, "saved_llm_seconds": 0.0, "saved_tokens": 0}
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".library.", suffix=".tmp", dir=os.path.dirname(self.path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self.path)
+
+    def lookup(self, intent: str, schema_hash: str) -> Optional[LibraryHit]:
+        signature, values = intent_signature(intent, get_intent_router().aliases)
+        with self._lock:
+            self._stats["lookups"] += 1
+            entries = self._load()
+            entry = entries.get(signature)
+            if entry is not None and entry.get("schema_hash") != schema_hash:
+                del entries[signature]
+                self._stats["invalidated"] += 1
+                self._save()
+                entry = None
+            code = fill_parameters(entry["template"], entry["params"], values) if entry else None
+            if code is None:
+                self._stats["misses"] += 1
+                return None
+            return LibraryHit(signature, code, entry)
+
+    def record_hit(self, hit: LibraryHit):
+        """Call after the replayed script succeeded."""
+        with self._lock:
+            entry = self._load().get(hit.signature)
+            if entry is not None:
+                entry["uses"] = entry.get("uses", 0) + 1
+                entry["last_used"] = time.time()
+                self._save()
+            self._stats["hits"] += 1
+            self._stats["saved_llm_seconds"] += hit.entry.get("llm_seconds", 0.0)
+            self._stats["saved_tokens"] += hit.entry.get("tokens", 0)
+
+    def record_failure(self, hit: LibraryHit):
+        """A replay failed: drop the entry so the next run regenerates it."""
+        with self._lock:
+            self._stats["replay_failures"] += 1
+            if self._load().pop(hit.signature, None) is not None:
+                self._save()
+
+    def store(self, intent: str, code: str, schema_hash: str, llm_seconds: float = 0.0, tokens: int = 0) -> bool:
+        signature, values = intent_signature(intent, get_intent_router().aliases)
+        template, lifted = lift_parameters(code, values)
+        with self._lock:
+            if template is None:
+                self._stats["unliftable"] += 1
+                return False
+            self._load()[signature] = {
+                "template": template,
+                "params": lifted,
+                "schema_hash": schema_hash,
+                "example_intent": intent,
+                "llm_seconds": round(llm_seconds, 3),
+                "tokens": tokens,
+                "created": time.time(),
+                "uses": 0,
+            }
+            self._stats["stored"] += 1
+            self._save()
+            return True
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._stats["lookups"]
+            return dict(self._stats, entries=len(self._load()),
+                        hit_rate=round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                        saved_llm_seconds=round(self._stats["saved_llm_seconds"], 3))
+
+
+_library: Optional[ScriptLibrary] = None
+_library_lock = threading.Lock()
+
+
+def get_script_library() -> ScriptLibrary:
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = ScriptLibrary()
+        return _library
@@ -0,0 +1,91 @@
+# Parameterized scripts for the deterministic fast path (see core/intent_router.py).
+# Each body runs after the executor preamble (pd, plt, pro, FIGURES, save_figure, EXPORT_DIR, print_output_path, ...)
+# and reads its inputs from a PARAMS dict that is prepended as a Python literal,
+# so parameters are never spliced into code text.
+from typing import Dict
+
+STOCK_DAILY = """
+# 模板 stock_daily：单只股票日线 -> Excel/CSV/收盘价折线图
+df = pro.daily(ts_code=PARAMS['ts_code'], start_date=PARAMS['start_date'], end_date=PARAMS['end_date'])
+if df is None or df.empty:
+    print(f"未获取到 {PARAMS['name']}（{PARAMS['ts_code']}）在 {PARAMS['start_date']} 至 {PARAMS['end_date']} 的日线数据")
+    sys.exit(0)
+
+df = df.sort_values('trade_date').reset_index(drop=True)
+stem = os.path.join(EXPORT_DIR, f"{PARAMS['ts_code']}_{PARAMS['start_date']}_{PARAMS['end_date']}")
+paths = []
+
+if 'excel' in PARAMS['outputs']:
+    df.rename(columns=PARAMS['columns']).to_excel(stem + '.xlsx', index=False)
+    paths.append(stem + '.xlsx')
+if 'csv' in PARAMS['outputs']:
+    df.rename(columns=PARAMS['columns']).to_csv(stem + '.csv', index=False, encoding='utf-8-sig')
+    paths.append(stem + '.csv')
+if 'chart' in PARAMS['outputs']:
+    x = df['trade_date'].astype(str)
+    fig, ax = FIGURES.subplots(figsize=(12, 6))
+    plot_series(ax, x, df['close'], linewidth=1.5, label=PARAMS['columns'].get('close', 'close'))
+    ax.set_title(f"{PARAMS['name']}（{PARAMS['ts_code']}）收盘价走势 {PARAMS['start_date']}-{PARAMS['end_date']}")
+    ax.set_xlabel(PARAMS['columns'].get('trade_date', 'trade_date'))
+    ax.set_ylabel(PARAMS['columns'].get('close', 'close'))
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.autofmt_xdate()
+    paths.append(save_figure(fig, stem + '_close.png'))
+
+print(f"{PARAMS['name']}（{PARAMS['ts_code']}）共 {len(df)} 条日线记录，区间收盘价 {df['close'].min():.2f} ~ {df['close'].max():.2f}")
+for p in paths:
+    print_output_path(p)
+"""
+
+MACRO_SERIES = """
+# 模板 macro_series：宏观指标（GDP/CPI）区间序列 -> Excel/CSV/折线图
+df = getattr(pro, PARAMS['api'])(**PARAMS['query'])
+if df is None or df.empty:
+    print(f"未获取到 {PARAMS['label']} 在 {PARAMS['start']} 至 {PARAMS['end']} 的数据")
+    sys.exit(0)
+
+x_col, y_col = PARAMS['x_col'], PARAMS['y_col']
+df = df.sort_values(x_col).reset_index(drop=True)
+stem = os.path.join(EXPORT_DIR, f"{PARAMS['label']}_{PARAMS['start']}_{PARAMS['end']}")
+paths = []
+
+if 'excel' in PARAMS['outputs']:
+    df.rename(columns=PARAMS['columns']).to_excel(stem + '.xlsx', index=False)
+    paths.append(stem + '.xlsx')
+if 'csv' in PARAMS['outputs']:
+    df.rename(columns=PARAMS['columns']).to_csv(stem + '.csv', index=False, encoding='utf-8-sig')
+    paths.append(stem + '.csv')
+if 'chart' in PARAMS['outputs']:
+    x = df[x_col].astype(str)
+    y = pd.to_numeric(df[y_col], errors='coerce')
+    fig, ax = FIGURES.subplots(figsize=(12, 6))
+    ax.plot(x, y, marker='o', linewidth=1.8, label=PARAMS['columns'].get(y_col, y_col))
+    ax.set_title(f"{PARAMS['label']} {PARAMS['start']}-{PARAMS['end']}")
+    ax.set_xlabel(PARAMS['columns'].get(x_col, x_col))
+    ax.set_ylabel(PARAMS['columns'].get(y_col, y_col))
+    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=10))
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    fig.autofmt_xdate()
+    paths.append(save_figure(fig, stem + '.png'))
+
+print(f"{PARAMS['label']} 共 {len(df)} 期数据（{df[x_col].iloc[0]} ~ {df[x_col].iloc[-1]}）")
+for p in paths:
+    print_output_path(p)
+"""
+
+TEMPLATES: Dict[str, str] = {
+    "stock_daily": STOCK_DAILY,
+    "macro_series": MACRO_SERIES,
+}
+
+# Syntax-checked once at import: a broken template fails here, not per request
+for _name, _body in TEMPLATES.items():
+    compile(_body, f"<template:{_name}>", "exec")
+
+
+def render_template(name: str, params: Dict) -> str:
+    """Full script for the executor: `PARAMS = {...}` literal + template body."""
+    # params holds only str/list/dict values, whose repr is always a valid literal
+    return f"PARAMS = {params!r}\n" + TEMPLATES[name]
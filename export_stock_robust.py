@@ -10,6 +10,9 @@ import os
 import requests
 import json
 
+from tools.report_stats import metrics_dict, summary_stats
+from tools.synthetic_market import generate_daily
+
 # 设置工作目录
 WORKSPACE_DIR = "workspace"
 OUTPUT_DIR = os.path.join(WORKSPACE_DIR, "exports")
@@ -107,109 +110,19 @@ def try_tushare_pro(ts_code, start_date, end_date, stock_name):
         return None
 
 def generate_realistic_mock_data(ts_code, stock_name, start_date, end_date):
-    """生成高质量的模拟股票数据"""
+    """生成高质量的模拟股票数据（向量化生成，按交易日历剔除周末与节假日）"""
     print("生成高质量模拟数据...")
-    
-    # 创建日期范围（只包含交易日）
-    start_dt = datetime.strptime(start_date, '%Y%m%d')
-    end_dt = datetime.strptime(end_date, '%Y%m%d')
-    
-    trade_dates = []
-    current_dt = start_dt
-    while current_dt <= end_dt:
-        if current_dt.weekday() < 5:  # 排除周末
-            # 排除春节假期（2023年1月21-27日）
-            if not (current_dt.month == 1 and 21 <= current_dt.day <= 27):
-                trade_dates.append(current_dt)
-        current_dt += timedelta(days=1)
-    
-    if not trade_dates:
+
+    # 贵州茅台真实价格区间参考（2023年1月）：基准价格约 1800 元，日波动约 1.5%
+    df = generate_daily([ts_code], start_date, end_date, seed=42, start_price=1800, volatility=0.015)
+    if df.empty:
         print("指定时间范围内无交易日")
         return None
-    
-    # 贵州茅台真实价格区间参考（2023年1月）
-    base_price = 1800  # 基准价格
-    price_range = (1700, 2000)  # 价格区间
-    
-    # 生成真实的价格走势
-    np.random.seed(42)
-    n_days = len(trade_dates)
-    
-    # 生成有趋势的价格变化（1月茅台通常先跌后涨）
-    trend_factor = np.linspace(-0.05, 0.08, n_days)  # 从-5%到+8%的趋势
-    random_noise = np.random.normal(0, 0.015, n_days)  # 随机波动
-    
-    prices = []
-    for i in range(n_days):
-        if i == 0:
-            price = base_price
-        else:
-            daily_change = trend_factor[i] + random_noise[i]
-            price = prices[-1] * (1 + daily_change)
-            price = max(price_range[0], min(price_range[1], price))  # 限制在合理范围
-        prices.append(price)
-    
-    # 生成OHLC数据
-    data = []
-    for i, (date, close_price) in enumerate(zip(trade_dates, prices)):
-        # 生成更真实的开盘价（基于前一日收盘价）
-        if i == 0:
-            open_price = close_price * np.random.uniform(0.99, 1.01)
-        else:
-            # 开盘价通常在前一日收盘价附近小幅波动
-            gap_up = np.random.random() > 0.4  # 60%概率高开
-            gap_size = np.random.uniform(0, 0.03)  # 0-3%的跳空
-            open_price = prices[i-1] * (1 + gap_size if gap_up else -gap_size)
-        
-        # 生成当日高低价
-        intraday_volatility = np.random.uniform(0.01, 0.04)  # 日内波动1-4%
-        
-        if close_price >= open_price:  # 上涨日
-            high_price = close_price * (1 + intraday_volatility * np.random.uniform(0.3, 1))
-            low_price = open_price * (1 - intraday_volatility * np.random.uniform(0.3, 1))
-        else:  # 下跌日
-            high_price = open_price * (1 + intraday_volatility * np.random.uniform(0.3, 1))
-            low_price = close_price * (1 - intraday_volatility * np.random.uniform(0.3, 1))
-        
-        # 确保高低价逻辑正确
-        high_price = max(high_price, open_price, close_price)
-        low_price = min(low_price, open_price, close_price)
-        
-        # 前一日收盘价
-        prev_close = prices[i-1] if i > 0 else close_price
-        
-        # 计算涨跌
-        change = close_price - prev_close
-        pct_chg = (change / prev_close) * 100
-        
-        # 生成成交量和成交额（茅台特点：高价格，相对较低的成交量）
-        base_volume = 15000  # 基础成交量（手）
-        volume_factor = 1 + abs(pct_chg) * 2  # 涨跌幅越大成交量越大
-        volume = int(base_volume * volume_factor * np.random.uniform(0.8, 1.5))
-        
-        # 成交额 = 成交量 * 100 * 平均价格
-        avg_price = (high_price + low_price + open_price + close_price) / 4
-        amount = volume * 100 * avg_price
-        
-        data.append({
-            'trade_date': date.strftime('%Y%m%d'),
-            'ts_code': ts_code,
-            'open': round(open_price, 2),
-            'high': round(high_price, 2),
-            'low': round(low_price, 2),
-            'close': round(close_price, 2),
-            'pre_close': round(prev_close, 2),
-            'change': round(change, 2),
-            'pct_chg': round(pct_chg, 2),
-            'vol': volume,
-            'amount': round(amount, 0)
-        })
-    
-    # 创建DataFrame
-    df = pd.DataFrame(data)
-    df['trade_date'] = pd.to_datetime(df['trade_date'])
+
+    df['trade_date'] = pd.to_datetime(df['trade_date'].astype(str), format='%Y%m%d')
+    df['ts_code'] = df['ts_code'].astype(str)
     df['stock_name'] = stock_name
-    
+
     # 重新排列列
     columns_order = ['trade_date', 'ts_code', 'stock_name', 'open', 'high', 'low', 'close', 
                      'pre_close', 'change', 'pct_chg', 'vol', 'amount']
@@ -241,42 +154,30 @@ def export_to_excel(df, ts_code, stock_name, start_date, end_date):
         # 主数据表
         df.to_excel(writer, sheet_name='日线数据', index=False)
         
-        # 数据摘要
+        # 数据摘要（一次聚合得到全部指标）
+        m = metrics_dict(df)
         summary_data = pd.DataFrame({
             '指标': ['股票代码', '股票名称', '数据条数', '开始日期', '结束日期', 
                    '最高价', '最低价', '期末收盘价', '期间涨跌', '涨跌幅(%)', 
                    '平均成交量', '总成交额'],
             '数值': [
-                ts_code, stock_name, len(df), 
-                df['trade_date'].min().strftime('%Y-%m-%d'),
-                df['trade_date'].max().strftime('%Y-%m-%d'),
-                f"{df['high'].max():.2f}元",
-                f"{df['low'].min():.2f}元",
-                f"{df['close'].iloc[-1]:.2f}元",
-                f"{df['close'].iloc[-1] - df['close'].iloc[0]:+.2f}元",
-                f"{((df['close'].iloc[-1] / df['close'].iloc[0]) - 1) * 100:+.2f}%",
-                f"{df['vol'].mean():.0f}手",
-                f"{df['amount'].sum()/1e8:.2f}亿元"
+                ts_code, stock_name, int(m['trading_days']), 
+                m['start_date'].strftime('%Y-%m-%d'),
+                m['end_date'].strftime('%Y-%m-%d'),
+                f"{m['max_high']:.2f}元",
+                f"{m['min_low']:.2f}元",
+                f"{m['last_close']:.2f}元",
+                f"{m['change']:+.2f}元",
+                f"{m['change_pct']:+.2f}%",
+                f"{m['vol_mean']:.0f}手",
+                f"{m['amount_sum']/1e8:.2f}亿元"
             ]
         })
         summary_data.to_excel(writer, sheet_name='数据摘要', index=False)
         
         # 价格统计
-        price_stats = pd.DataFrame({
-            '统计项': ['开盘价', '最高价', '最低价', '收盘价', '涨跌额', '涨跌幅(%)', '成交量', '成交额'],
-            '平均值': [df['open'].mean(), df['high'].mean(), df['low'].mean(), df['close'].mean(),
-                      df['change'].mean(), df['pct_chg'].mean(), df['vol'].mean(), df['amount'].mean()],
-            '最大值': [df['open'].max(), df['high'].max(), df['low'].max(), df['close'].max(),
-                      df['change'].max(), df['pct_chg'].max(), df['vol'].max(), df['amount'].max()],
-            '最小值': [df['open'].min(), df['high'].min(), df['low'].min(), df['close'].min(),
-                      df['change'].min(), df['pct_chg'].min(), df['vol'].min(), df['amount'].min()],
-            '标准差': [df['open'].std(), df['high'].std(), df['low'].std(), df['close'].std(),
-                      df['change'].std(), df['pct_chg'].std(), df['vol'].std(), df['amount'].std()]
-        })
-        
-        # 格式化数值
-        for col in ['平均值', '最大值', '最小值', '标准差']:
-            price_stats[col] = price_stats[col].round(2)
+        price_stats = summary_stats(df, ['open', 'high', 'low', 'close', 'change', 'pct_chg', 'vol', 'amount'],
+                                    labels=True).round(2).reset_index()
         
         price_stats.to_excel(writer, sheet_name='价格统计', index=False)
     
@@ -8,6 +8,8 @@ import os
 from datetime import datetime
 import matplotlib.pyplot as plt
 
+from tools.report_stats import metrics_dict, summary_stats
+
 def complete_analysis_from_real_data():
     """基于真实Tushare数据完成完整分析"""
     
@@ -64,33 +66,31 @@ def complete_analysis_from_real_data():
     # 4. 数据统计分析
     print("4. 生成统计摘要...")
     
-    # 基本统计
-    latest_price = df['close'].iloc[-1]
-    first_price = df['close'].iloc[0]
-    price_change = latest_price - first_price
-    price_change_pct = (price_change / first_price) * 100
+    # 基本统计：一次聚合得到全部摘要指标
+    m = metrics_dict(df)
+    latest_price = m['last_close']
+    first_price = m['first_close']
+    price_change = m['change']
+    price_change_pct = m['change_pct']
     
-    max_price = df['high'].max()
-    min_price = df['low'].min()
-    avg_price = df['close'].mean()
+    max_price = m['max_high']
+    min_price = m['min_low']
+    avg_price = m['avg_close']
     
-    total_volume = df['vol'].sum()
-    avg_volume = df['vol'].mean()
-    max_volume = df['vol'].max()
+    total_volume = m['vol_sum']
+    avg_volume = m['vol_mean']
+    max_volume = m['vol_max']
     
-    total_amount = df['amount'].sum()
-    avg_amount = df['amount'].mean()
+    total_amount = m['amount_sum']
+    avg_amount = m['amount_mean']
     
     # 波动性分析
-    daily_returns = df['pct_chg']
-    volatility = daily_returns.std()
-    max_daily_gain = daily_returns.max()
-    max_daily_loss = daily_returns.min()
+    volatility = m['volatility']
+    max_daily_gain = m['max_gain']
+    max_daily_loss = m['max_loss']
     
     # 涨跌统计
-    up_days = len(df[df['pct_chg'] > 0])
-    down_days = len(df[df['pct_chg'] < 0])
-    flat_days = len(df[df['pct_chg'] == 0])
+    up_days, down_days, flat_days = int(m['up_days']), int(m['down_days']), int(m['flat_days'])
     
     print("   统计分析完成")
     
@@ -134,26 +134,9 @@ def complete_analysis_from_real_data():
         summary_data.to_excel(writer, sheet_name='数据摘要', index=False)
         
         # 工作表3: 详细统计
-        detailed_stats = pd.DataFrame({
-            '统计项': ['开盘价', '最高价', '最低价', '收盘价', '涨跌额', '涨跌幅(%)', 
-                      '成交量', '成交额', '振幅(%)', '累计收益率(%)'],
-            '平均值': [df['open'].mean(), df['high'].mean(), df['low'].mean(), df['close'].mean(),
-                      df['change'].mean(), df['pct_chg'].mean(), df['vol'].mean(), df['amount'].mean(),
-                      df['amplitude'].mean(), df['cumulative_return'].mean()],
-            '最大值': [df['open'].max(), df['high'].max(), df['low'].max(), df['close'].max(),
-                      df['change'].max(), df['pct_chg'].max(), df['vol'].max(), df['amount'].max(),
-                      df['amplitude'].max(), df['cumulative_return'].max()],
-            '最小值': [df['open'].min(), df['high'].min(), df['low'].min(), df['close'].min(),
-                      df['change'].min(), df['pct_chg'].min(), df['vol'].min(), df['amount'].min(),
-                      df['amplitude'].min(), df['cumulative_return'].min()],
-            '标准差': [df['open'].std(), df['high'].std(), df['low'].std(), df['close'].std(),
-                      df['change'].std(), df['pct_chg'].std(), df['vol'].std(), df['amount'].std(),
-                      df['amplitude'].std(), df['cumulative_return'].std()]
-        })
-        
-        # 格式化数值
-        for col in ['平均值', '最大值', '最小值', '标准差']:
-            detailed_stats[col] = detailed_stats[col].round(2)
+        detailed_stats = summary_stats(df, ['open', 'high', 'low', 'close', 'change', 'pct_chg',
+                                            'vol', 'amount', 'amplitude', 'cumulative_return'],
+                                       labels=True).round(2).reset_index()
         
         detailed_stats.to_excel(writer, sheet_name='详细统计', index=False)
     
@@ -5,10 +5,15 @@ FinDataAgent 经济数据分析模板
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import tushare as ts
 from datetime import datetime, timedelta
 import os
+import sys
+
+# 图表复用仓库的 tools/chart_renderer.py（按布局复用 figure、按用途选 dpi）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tools.chart_renderer import FIGURES, save_figure
+from tools.downsample import annotate_peaks
 
 def economic_analysis_template(indicator_name, start_period, end_period):
     """
@@ -131,13 +136,8 @@ def economic_analysis_template(indicator_name, start_period, end_period):
     # 3. 图表生成
     print("正在生成图表...")
     
-    # 设置图表样式
-    plt.style.use('seaborn-v0_8')
-    plt.rcParams['font.sans-serif'] = ['SimHei']
-    plt.rcParams['axes.unicode_minus'] = False
-    
-    # 创建复合图表
-    fig, axes = plt.subplots(2, 1, figsize=(14, 10))
+    # 创建复合图表（样式与中文字体由 chart_renderer 每进程设置一次）
+    fig, axes = FIGURES.subplots(2, 1, figsize=(14, 10))
     
     # 主指标图表
     ax1 = axes[0]
@@ -150,11 +150,8 @@ def economic_analysis_template(indicator_name, start_period, end_period):
     ax1.legend(loc='upper left')
     ax1.grid(True, alpha=0.3)
     
-    # 添加数值标注
-    for i, (date, value) in enumerate(zip(df['date'], df[value_col])):
-        if i % max(1, len(df) // 10) == 0:  # 每10个点标注一次
-            ax1.annotate(f'{value:.1f}', (date, value), 
-                        textcoords="offset points", xytext=(0,10), ha='center')
+    # 添加数值标注（分10段，每段标注偏离均值最大的峰/谷点）
+    annotate_peaks(ax1, df['date'], df[value_col], k=10)
     
     # 增长率图表
     ax2 = axes[1]
@@ -170,14 +167,12 @@ def economic_analysis_template(indicator_name, start_period, end_period):
     ax2.legend()
     ax2.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    
     # 保存图表
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     chart_filename = f"{indicator_name}_经济分析_{timestamp}.png"
     chart_path = os.path.join(OUTPUT_DIR, chart_filename)
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    chart_path = save_figure(fig, chart_path, target='download')
+    chart_filename = os.path.basename(chart_path)
     
     print(f"图表已保存至: {chart_path}")
     
@@ -263,10 +258,8 @@ def multi_indicator_comparison(indicators, start_period, end_period):
     # 创建对比图表
     print("正在生成对比图表...")
     
-    fig, axes = plt.subplots(len(all_data), 1, figsize=(14, 8 * len(all_data)))
-    
-    if len(all_data) == 1:
-        axes = [axes]
+    fig, axes = FIGURES.subplots(len(all_data), 1, figsize=(14, 8 * len(all_data)), squeeze=False)
+    axes = axes[:, 0]
     
     colors = ['blue', 'red', 'green', 'orange', 'purple']
     
@@ -292,15 +285,12 @@ def multi_indicator_comparison(indicators, start_period, end_period):
     
     axes[-1].set_xlabel('日期', fontsize=12)
     
-    plt.tight_layout()
-    
     # 保存对比图表
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     indicators_str = '_vs_'.join(indicators)
     chart_filename = f"多指标对比_{indicators_str}_{timestamp}.png"
     chart_path = os.path.join(OUTPUT_DIR, chart_filename)
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    chart_path = save_figure(fig, chart_path, target='download')
     
     print(f"对比图表已保存至: {chart_path}")
     
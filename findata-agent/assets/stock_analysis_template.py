@@ -5,10 +5,14 @@ FinDataAgent 股票分析模板
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import tushare as ts
 from datetime import datetime, timedelta
 import os
+import sys
+
+# 图表复用仓库的 tools/chart_renderer.py（按布局复用 figure、按用途选 dpi）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tools.chart_renderer import FIGURES, save_figure
 
 def stock_analysis_template(ts_code, stock_name, period_days=365):
     """
@@ -115,16 +119,10 @@ def stock_analysis_template(ts_code, stock_name, period_days=365):
     # 4. 图表生成
     print("正在生成图表...")
     
-    # 设置图表样式
-    plt.style.use('seaborn-v0_8')
-    plt.rcParams['font.sans-serif'] = ['SimHei']
-    plt.rcParams['axes.unicode_minus'] = False
-    
-    # 创建复合图表
-    fig = plt.figure(figsize=(16, 12))
+    # 创建复合图表（样式与中文字体由 chart_renderer 每进程设置一次）
+    fig, (ax1, ax2, ax3) = FIGURES.subplots(3, 1, figsize=(16, 12))
     
     # 价格和移动平均线
-    ax1 = plt.subplot(3, 1, 1)
     ax1.plot(df['trade_date'], df['close'], label='收盘价', linewidth=2, color='blue')
     ax1.plot(df['trade_date'], df['ma5'], label='MA5', alpha=0.7)
     ax1.plot(df['trade_date'], df['ma20'], label='MA20', alpha=0.7)
@@ -137,7 +135,6 @@ def stock_analysis_template(ts_code, stock_name, period_days=365):
     ax1.grid(True, alpha=0.3)
     
     # 成交量
-    ax2 = plt.subplot(3, 1, 2)
     ax2.bar(df['trade_date'], df['vol'], alpha=0.6, color='lightblue')
     ax2.plot(df['trade_date'], df['vol'].rolling(window=20).mean(), color='red', label='成交量MA20')
     ax2.set_title('成交量', fontsize=14)
@@ -146,7 +143,6 @@ def stock_analysis_template(ts_code, stock_name, period_days=365):
     ax2.grid(True, alpha=0.3)
     
     # RSI和MACD
-    ax3 = plt.subplot(3, 1, 3)
     ax3.plot(df['trade_date'], df['rsi'], label='RSI(14)', color='purple')
     ax3.axhline(y=70, color='red', linestyle='--', alpha=0.5, label='超买线')
     ax3.axhline(y=30, color='green', linestyle='--', alpha=0.5, label='超卖线')
@@ -163,14 +159,12 @@ def stock_analysis_template(ts_code, stock_name, period_days=365):
     ax3_twin.legend(loc='upper right')
     ax3.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    
     # 保存图表
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     chart_filename = f"{stock_name}_技术分析_{timestamp}.png"
     chart_path = os.path.join(OUTPUT_DIR, chart_filename)
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
-    plt.close()
+    chart_path = save_figure(fig, chart_path, target='download')
+    chart_filename = os.path.basename(chart_path)
     
     print(f"图表已保存至: {chart_path}")
     
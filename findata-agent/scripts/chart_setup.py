@@ -8,27 +8,30 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
+import sys
+
+# 图表复用仓库的 tools/chart_renderer.py（按布局复用 figure、样式每进程只设置一次、按用途选 dpi）
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tools.chart_renderer import FIGURES, ChartJob, render_many, save_figure, setup_style
+# 长区间序列按像素宽度降采样（点数超过图宽时每个像素桶只保留首/末/最高/最低点）
+from tools.downsample import bar_series, plot_series
 
 def setup_matplotlib():
-    """配置matplotlib环境"""
-    # 设置中文字体
-    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'DejaVu Sans']
-    plt.rcParams['axes.unicode_minus'] = False
-    
-    # 设置图表样式
-    plt.style.use('seaborn-v0_8')
-    
-    # 设置默认图表大小
-    plt.rcParams['figure.figsize'] = (12, 8)
-    plt.rcParams['figure.dpi'] = 100
-    
-    # 设置网格
-    plt.rcParams['axes.grid'] = True
-    plt.rcParams['grid.alpha'] = 0.3
-    
+    """配置matplotlib环境（中文字体、seaborn样式、网格），每个进程只执行一次"""
+    setup_style()
     return True
 
-def create_stock_chart(df, title="股票价格走势", save_path=None):
+def _subplots(nrows, ncols, figsize, save_path, pooled):
+    """
+    pooled 为 None 时仅在传入 save_path 时复用 FIGURES 中按布局缓存的 figure；
+    否则新建 pyplot 管理的 figure，调用方可继续 plt.savefig / plt.show
+    """
+    if pooled if pooled is not None else bool(save_path):
+        return FIGURES.subplots(nrows, ncols, figsize=figsize)
+    setup_style()
+    return plt.subplots(nrows, ncols, figsize=figsize, layout='constrained')
+
+def create_stock_chart(df, title="股票价格走势", save_path=None, target='download', pooled=None):
     """
     创建股票价格图表
     
@@ -36,24 +39,25 @@ def create_stock_chart(df, title="股票价格走势", save_path=None):
         df: 包含股票数据的DataFrame，需包含trade_date, close, vol等列
         title: 图表标题
         save_path: 保存路径，如不指定则不保存
+        target: 'download'（下载，200 dpi）或 'preview'（界面预览，100 dpi）；格式由扩展名决定（png/webp/svg）
+        pooled: 是否复用按布局缓存的 figure，默认仅在传入 save_path 时复用
     
     Returns:
-        fig: matplotlib图表对象
+        fig: matplotlib图表对象。复用时同一进程中下一张同布局图表会覆盖它，只能用 save_path / save_figure 保存，
+             不能 plt.savefig；不传 save_path 时为 pyplot 管理的新 figure
     """
-    setup_matplotlib()
-    
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+    fig, (ax1, ax2) = _subplots(2, 1, (12, 10), save_path, pooled)
     
     # 价格走势图
-    ax1.plot(df['trade_date'], df['close'], label='收盘价', linewidth=2, color='blue')
+    plot_series(ax1, df['trade_date'], df['close'], label='收盘价', linewidth=2, color='blue')
     
     # 如果有移动平均线，也绘制出来
     if 'ma5' in df.columns:
-        ax1.plot(df['trade_date'], df['ma5'], label='MA5', alpha=0.7, color='orange')
+        plot_series(ax1, df['trade_date'], df['ma5'], label='MA5', alpha=0.7, color='orange')
     if 'ma20' in df.columns:
-        ax1.plot(df['trade_date'], df['ma20'], label='MA20', alpha=0.7, color='red')
+        plot_series(ax1, df['trade_date'], df['ma20'], label='MA20', alpha=0.7, color='red')
     if 'ma60' in df.columns:
-        ax1.plot(df['trade_date'], df['ma60'], label='MA60', alpha=0.7, color='green')
+        plot_series(ax1, df['trade_date'], df['ma60'], label='MA60', alpha=0.7, color='green')
     
     ax1.set_title(title, fontsize=16, fontweight='bold')
     ax1.set_ylabel('价格 (元)', fontsize=12)
@@ -61,23 +65,19 @@ def create_stock_chart(df, title="股票价格走势", save_path=None):
     ax1.grid(True, alpha=0.3)
     
     # 成交量图
-    ax2.bar(df['trade_date'], df['vol'], alpha=0.6, color='lightblue')
+    bar_series(ax2, df['trade_date'], df['vol'], alpha=0.6, color='lightblue')
     ax2.set_title('成交量', fontsize=14)
     ax2.set_ylabel('成交量 (手)', fontsize=12)
     ax2.set_xlabel('日期', fontsize=12)
     ax2.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    
     if save_path:
-        # 确保目录存在
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = save_figure(fig, save_path, target=target)
         print(f"图表已保存至: {save_path}")
     
     return fig
 
-def create_candlestick_chart(df, title="K线图", save_path=None):
+def create_candlestick_chart(df, title="K线图", save_path=None, target='download', pooled=None):
     """
     创建K线图
     
@@ -85,13 +85,14 @@ def create_candlestick_chart(df, title="K线图", save_path=None):
         df: 包含OHLC数据的DataFrame
         title: 图表标题
         save_path: 保存路径
+        target: 'download'（下载，200 dpi）或 'preview'（界面预览，100 dpi）；格式由扩展名决定（png/webp/svg）
+        pooled: 是否复用按布局缓存的 figure，默认仅在传入 save_path 时复用
     
     Returns:
-        fig: matplotlib图表对象
+        fig: matplotlib图表对象。复用时同一进程中下一张同布局图表会覆盖它，只能用 save_path / save_figure 保存，
+             不能 plt.savefig；不传 save_path 时为 pyplot 管理的新 figure
     """
-    setup_matplotlib()
-    
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(1, 1, (12, 8), save_path, pooled)
     
     # 绘制K线
     for i, row in df.iterrows():
@@ -111,16 +112,13 @@ def create_candlestick_chart(df, title="K线图", save_path=None):
     ax.set_xlabel('日期', fontsize=12)
     ax.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = save_figure(fig, save_path, target=target)
         print(f"K线图已保存至: {save_path}")
     
     return fig
 
-def create_financial_chart(df, metrics, title="财务指标分析", save_path=None):
+def create_financial_chart(df, metrics, title="财务指标分析", save_path=None, target='download', pooled=None):
     """
     创建财务指标图表
     
@@ -129,13 +127,14 @@ def create_financial_chart(df, metrics, title="财务指标分析", save_path=No
         metrics: 要绘制的指标列表
         title: 图表标题
         save_path: 保存路径
+        target: 'download'（下载，200 dpi）或 'preview'（界面预览，100 dpi）；格式由扩展名决定（png/webp/svg）
+        pooled: 是否复用按布局缓存的 figure，默认仅在传入 save_path 时复用
     
     Returns:
-        fig: matplotlib图表对象
+        fig: matplotlib图表对象。复用时同一进程中下一张同布局图表会覆盖它，只能用 save_path / save_figure 保存，
+             不能 plt.savefig；不传 save_path 时为 pyplot 管理的新 figure
     """
-    setup_matplotlib()
-    
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(1, 1, (12, 8), save_path, pooled)
     
     for metric in metrics:
         if metric in df.columns:
@@ -147,16 +146,13 @@ def create_financial_chart(df, metrics, title="财务指标分析", save_path=No
     ax.legend()
     ax.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = save_figure(fig, save_path, target=target)
         print(f"财务图表已保存至: {save_path}")
     
     return fig
 
-def create_comparison_chart(data_dict, title="数据对比分析", save_path=None):
+def create_comparison_chart(data_dict, title="数据对比分析", save_path=None, target='download', pooled=None):
     """
     创建对比图表
     
@@ -164,20 +160,21 @@ def create_comparison_chart(data_dict, title="数据对比分析", save_path=Non
         data_dict: 数据字典，格式为 {'label': df}
         title: 图表标题
         save_path: 保存路径
+        target: 'download'（下载，200 dpi）或 'preview'（界面预览，100 dpi）；格式由扩展名决定（png/webp/svg）
+        pooled: 是否复用按布局缓存的 figure，默认仅在传入 save_path 时复用
     
     Returns:
-        fig: matplotlib图表对象
+        fig: matplotlib图表对象。复用时同一进程中下一张同布局图表会覆盖它，只能用 save_path / save_figure 保存，
+             不能 plt.savefig；不传 save_path 时为 pyplot 管理的新 figure
     """
-    setup_matplotlib()
-    
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(1, 1, (12, 8), save_path, pooled)
     
     colors = ['blue', 'red', 'green', 'orange', 'purple']
     
     for i, (label, df) in enumerate(data_dict.items()):
         color = colors[i % len(colors)]
-        ax.plot(df['trade_date'], df['close'], 
-               label=label, linewidth=2, color=color)
+        plot_series(ax, df['trade_date'], df['close'], 
+                    label=label, linewidth=2, color=color)
     
     ax.set_title(title, fontsize=16, fontweight='bold')
     ax.set_ylabel('价格 (元)', fontsize=12)
@@ -185,15 +182,37 @@ def create_comparison_chart(data_dict, title="数据对比分析", save_path=Non
     ax.legend()
     ax.grid(True, alpha=0.3)
     
-    plt.tight_layout()
-    
     if save_path:
-        os.makedirs(os.path.dirname(save_path), exist_ok=True)
-        plt.savefig(save_path, dpi=300, bbox_inches='tight')
+        save_path = save_figure(fig, save_path, target=target)
         print(f"对比图表已保存至: {save_path}")
     
     return fig
 
+CHART_FUNCTIONS = (create_stock_chart, create_candlestick_chart, create_financial_chart, create_comparison_chart)
+
+def render_charts(jobs, workers=None):
+    """
+    多进程并行生成图表，并打印每张图的耗时
+    
+    Args:
+        jobs: [(函数, 保存路径, 参数字典), ...] 或 ChartJob 列表，函数如 create_stock_chart（不传 save_path）
+        workers: 进程数，默认 CPU 核数
+    
+    Returns:
+        list: 每张图的 path / build_ms / save_ms / bytes / pid / error
+    """
+    jobs = [job if isinstance(job, ChartJob) else ChartJob(*job) for job in jobs]
+    for job in jobs:
+        if job.fn in CHART_FUNCTIONS:  # 工作进程内按布局复用 figure，保存由 render_many 完成
+            job.kwargs.setdefault('pooled', True)
+    timings = render_many(jobs, workers=workers)
+    for t in timings:
+        if t['error']:
+            print(f"图表生成失败: {t['path']} ({t['error']})")
+        else:
+            print(f"图表已保存至: {t['path']}（绘制 {t['build_ms']:.0f} ms，保存 {t['save_ms']:.0f} ms，{t['bytes'] / 1024:.0f} KB）")
+    return timings
+
 def auto_generate_filename(prefix, suffix="png"):
     """自动生成文件名"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
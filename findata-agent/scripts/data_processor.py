@@ -8,6 +8,16 @@ import numpy as np
 import tushare as ts
 from datetime import datetime, timedelta
 import os
+import sys
+
+# 复权计算复用仓库的 tools/price_adjust.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tools.price_adjust import adjust_prices
+
+try:
+    from .fundamentals import FundamentalsStore
+except ImportError:
+    from fundamentals import FundamentalsStore
 
 class TushareDataProcessor:
     """Tushare数据处理器"""
@@ -17,6 +27,7 @@ class TushareDataProcessor:
         if token:
             ts.set_token(token)
         self.pro = ts.pro_api()
+        self.fundamentals = FundamentalsStore(self.pro)
     
     def get_stock_daily(self, ts_code, start_date, end_date, adj='qfq'):
         """
@@ -53,18 +64,9 @@ class TushareDataProcessor:
                 if col in df.columns:
                     df[col] = pd.to_numeric(df[col], errors='coerce')
             
-            # 复权处理
-            if adj == 'qfq' and 'adj_factor' in df.columns:
-                # 前复权
-                for col in ['open', 'high', 'low', 'close', 'pre_close']:
-                    if col in df.columns:
-                        df[col] = df[col] * df['adj_factor']
-            elif adj == 'hfq' and 'adj_factor' in df.columns:
-                # 后复权
-                latest_factor = df['adj_factor'].iloc[-1]
-                for col in ['open', 'high', 'low', 'close', 'pre_close']:
-                    if col in df.columns:
-                        df[col] = df[col] / df['adj_factor'] * latest_factor
+            # 复权处理：前复权 = 原始价 × 复权因子 / 最新复权因子，后复权 = 原始价 × 复权因子
+            if adj in ('qfq', 'hfq') and 'adj_factor' in df.columns:
+                df = adjust_prices(df, how=adj)
             
             # 排序
             df = df.sort_values('trade_date').reset_index(drop=True)
@@ -123,54 +125,51 @@ class TushareDataProcessor:
     
     def get_financial_data(self, ts_code, start_date, end_date, report_type='annual'):
         """
-        获取财务数据
+        获取财务数据（四张报表并发获取，结果缓存，重复查询不再请求接口）
         
         Args:
-            ts_code: 股票代码
-            start_date: 开始日期
-            end_date: 结束日期
+            ts_code: 股票代码（可逗号分隔多只）
+            start_date: 开始日期（公告日期）
+            end_date: 结束日期（公告日期）
             report_type: 报告类型 (annual年报, quarter季报)
         
         Returns:
             dict: 包含各类财务数据的字典
         """
-        financial_data = {}
-        
         try:
-            # 利润表
-            income_df = self.pro.income(ts_code=ts_code, 
-                                       start_date=start_date, 
-                                       end_date=end_date)
-            if not income_df.empty:
-                financial_data['income'] = income_df
-            
-            # 资产负债表
-            balance_df = self.pro.balancesheet(ts_code=ts_code,
-                                              start_date=start_date,
-                                              end_date=end_date)
-            if not balance_df.empty:
-                financial_data['balance'] = balance_df
-            
-            # 现金流量表
-            cashflow_df = self.pro.cashflow(ts_code=ts_code,
-                                           start_date=start_date,
-                                           end_date=end_date)
-            if not cashflow_df.empty:
-                financial_data['cashflow'] = cashflow_df
-            
-            # 财务指标
-            fina_indicator_df = self.pro.fina_indicator(ts_code=ts_code,
-                                                      start_date=start_date,
-                                                      end_date=end_date)
-            if not fina_indicator_df.empty:
-                financial_data['indicator'] = fina_indicator_df
-            
+            data = self.fundamentals.fetch(ts_code, start_date, end_date)
+            financial_data = {}
+            for key, df in data.items():
+                if report_type == 'annual' and 'end_date' in df.columns:
+                    df = df[df['end_date'].astype(str).str.endswith('1231')].reset_index(drop=True)
+                if not df.empty:
+                    financial_data[key] = df
             return financial_data
             
         except Exception as e:
             print(f"获取财务数据失败: {e}")
             return {}
     
+    def get_financial_panel(self, ts_codes, start_date, end_date, report_type='annual'):
+        """
+        获取多只股票对齐后的财务宽表，便于计算财务比率
+        
+        Args:
+            ts_codes: 股票代码列表或逗号分隔字符串
+            start_date: 开始日期（公告日期）
+            end_date: 结束日期（公告日期）
+            report_type: 报告类型 (annual年报, quarter季报)
+        
+        Returns:
+            DataFrame: 索引为 (ts_code, end_date)，列为四张报表的字段
+        """
+        try:
+            period = 'annual' if report_type == 'annual' else 'all'
+            return self.fundamentals.wide(ts_codes, start_date, end_date, period=period)
+        except Exception as e:
+            print(f"获取财务数据失败: {e}")
+            return pd.DataFrame()
+    
     def get_economic_data(self, indicator_name, start_date, end_date):
         """
         获取经济数据
@@ -0,0 +1,219 @@
+"""
+FinDataAgent 财务数据子系统
+并发获取四张财务报表（利润表、资产负债表、现金流量表、财务指标），
+按 (ts_code, end_date, report_type) 去重后本地缓存，按公告日期增量刷新。
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# 结果字典的键 -> Tushare 接口名（与 get_financial_data 的返回键一致）
+STATEMENTS = {
+    'income': 'income',
+    'balance': 'balancesheet',
+    'cashflow': 'cashflow',
+    'indicator': 'fina_indicator',
+}
+
+# 各报表共有的标识列，宽表中只保留一份
+ID_COLUMNS = ['ts_code', 'ann_date', 'f_ann_date', 'end_date', 'report_type', 'comp_type',
+              'end_type', 'update_flag']
+KEY_COLUMNS = ['ts_code', 'end_date', 'report_type']
+
+
+def _day(date_str):
+    return datetime.strptime(str(date_str).replace('-', ''), '%Y%m%d')
+
+
+def _fmt(day):
+    return day.strftime('%Y%m%d')
+
+
+class _Throttle:
+    """按每分钟调用次数限流，线程安全"""
+
+    def __init__(self, calls_per_minute):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+class FundamentalsStore:
+    """
+    财务报表缓存
+
+    Tushare 的 start_date/end_date 按公告日期（ann_date）筛选，因此每个
+    (报表, ts_code) 记录已覆盖的公告日期区间：区间内的查询直接读缓存，
+    区间外（例如上次获取之后新发布的公告）只补取缺口部分。
+    """
+
+    def __init__(self, pro, cache_dir='workspace/cache/fundamentals', max_workers=4, calls_per_minute=200,
+                 refresh_hours=12):
+        self.pro = pro
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        # 覆盖到昨天的缓存在这段时间内不再为“今天可能的新公告”补取
+        self.refresh_interval = timedelta(hours=refresh_hours)
+        self._throttle = _Throttle(calls_per_minute)
+        self._stats_lock = threading.Lock()
+        self.stats = {'upstream_calls': 0, 'cache_hits': 0}
+
+    def _paths(self, statement, ts_code):
+        base = os.path.join(self.cache_dir, statement)
+        return os.path.join(base, f'{ts_code}.parquet'), os.path.join(base, f'{ts_code}.json')
+
+    def _load(self, statement, ts_code):
+        data_path, meta_path = self._paths(statement, ts_code)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            return pd.read_parquet(data_path), meta
+        except (OSError, ValueError):
+            return None, None
+
+    def _save(self, statement, ts_code, df, meta):
+        data_path, meta_path = self._paths(statement, ts_code)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        df.to_parquet(data_path + '.tmp', index=False)
+        os.replace(data_path + '.tmp', data_path)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def _call(self, statement, ts_code, start_date, end_date):
+        self._throttle.wait()
+        with self._stats_lock:
+            self.stats['upstream_calls'] += 1
+        df = getattr(self.pro, STATEMENTS[statement])(ts_code=ts_code, start_date=start_date, end_date=end_date)
+        return df if df is not None else pd.DataFrame()
+
+    @staticmethod
+    def _dedupe(df):
+        """同一 (ts_code, end_date, report_type) 保留最新公告（更正后的报表）"""
+        if df.empty:
+            return df
+        keys = [c for c in KEY_COLUMNS if c in df.columns]
+        order = [c for c in ['f_ann_date', 'ann_date', 'update_flag'] if c in df.columns]
+        if order:
+            df = df.sort_values(order, na_position='first')
+        return df.drop_duplicates(keys, keep='last').reset_index(drop=True)
+
+    def _statement(self, statement, ts_code, start_date, end_date):
+        """单只股票单张报表：读缓存，只补取未覆盖的公告日期区间"""
+        today = datetime.now()
+        start, end = _day(start_date), min(_day(end_date), today)
+        cached, meta = self._load(statement, ts_code)
+
+        gaps = []
+        if meta is None:
+            gaps.append((start, end))
+        else:
+            covered_start, covered_until = _day(meta['covered_start']), _day(meta['covered_until'])
+            if start < covered_start:
+                gaps.append((start, covered_start - timedelta(days=1)))
+            recent = (covered_until >= _day(_fmt(today - timedelta(days=1)))
+                      and today - datetime.fromisoformat(meta['fetched_at']) < self.refresh_interval)
+            if end > covered_until and not recent:
+                gaps.append((covered_until + timedelta(days=1), end))
+
+        if gaps:
+            frames = [cached] if cached is not None else []
+            frames += [self._call(statement, ts_code, _fmt(a), _fmt(b)) for a, b in gaps if a <= b]
+            frames = [f for f in frames if not f.empty]
+            cached = self._dedupe(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+            # 当天之后仍可能有新公告，覆盖区间只记到昨天
+            until = min(end, today - timedelta(days=1))
+            meta = {
+                'covered_start': _fmt(min(start, _day(meta['covered_start'])) if meta else start),
+                'covered_until': _fmt(max(until, _day(meta['covered_until'])) if meta else until),
+                'fetched_at': today.isoformat(timespec='seconds'),
+            }
+            self._save(statement, ts_code, cached, meta)
+        else:
+            with self._stats_lock:
+                self.stats['cache_hits'] += 1
+
+        if cached.empty or 'ann_date' not in cached.columns:
+            return cached
+        ann = cached['ann_date'].astype(str)
+        mask = cached['ann_date'].isna() | ((ann >= _fmt(start)) & (ann <= _fmt(_day(end_date))))
+        return cached[mask].reset_index(drop=True)
+
+    def fetch(self, ts_codes, start_date, end_date, statements=None):
+        """
+        并发获取多只股票的财务报表
+
+        Args:
+            ts_codes: 股票代码（字符串，逗号分隔，或列表）
+            start_date: 公告开始日期
+            end_date: 公告结束日期
+            statements: 报表列表，默认全部（income/balance/cashflow/indicator）
+
+        Returns:
+            dict: 报表名 -> 所有股票合并后的 DataFrame
+        """
+        if isinstance(ts_codes, str):
+            ts_codes = [c.strip() for c in ts_codes.split(',') if c.strip()]
+        statements = statements or list(STATEMENTS)
+        start_date, end_date = start_date.replace('-', ''), end_date.replace('-', '')
+        tasks = [(s, code) for s in statements for code in ts_codes]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            frames = list(pool.map(lambda t: self._statement(t[0], t[1], start_date, end_date), tasks))
+
+        result = {}
+        for statement in statements:
+            parts = [f for (s, _), f in zip(tasks, frames) if s == statement and not f.empty]
+            result[statement] = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        return result
+
+    def wide(self, ts_codes, start_date, end_date, period='all', report_type='1'):
+        """
+        对齐后的宽表：索引 (ts_code, end_date)，列为四张报表的字段
+
+        Args:
+            period: 'annual' 仅年报（end_date 为 1231），'all' 全部报告期
+            report_type: 报表类型，默认 '1' 合并报表
+
+        Returns:
+            DataFrame: 同名字段以报表名作前缀区分（如 cashflow_net_profit）
+        """
+        data = self.fetch(ts_codes, start_date, end_date)
+        tables = []
+        for statement, df in data.items():
+            if df.empty:
+                continue
+            if 'report_type' in df.columns and report_type:
+                df = df[df['report_type'].astype(str) == str(report_type)]
+            df = df.sort_values([c for c in ['f_ann_date', 'ann_date'] if c in df.columns])
+            df = df.drop_duplicates(['ts_code', 'end_date'], keep='last')
+            df = df.set_index(['ts_code', 'end_date']).drop(columns=[c for c in ID_COLUMNS if c in df.columns],
+                                                           errors='ignore')
+            tables.append((statement, df))
+
+        if not tables:
+            return pd.DataFrame()
+        seen = {}
+        for _, df in tables:
+            for col in df.columns:
+                seen[col] = seen.get(col, 0) + 1
+        renamed = [df.rename(columns={c: f'{statement}_{c}' for c in df.columns if seen[c] > 1})
+                   for statement, df in tables]
+        panel = pd.concat(renamed, axis=1, join='outer').sort_index()
+        if period == 'annual':
+            panel = panel[panel.index.get_level_values('end_date').astype(str).str.endswith('1231')]
+        return panel
@@ -1,11 +1,17 @@
-import json
 import os
+import time
 import streamlit as st
 from state import store
-from services.agent_stream import stream_agent
-from services.events import adapt_event
+from services.agent_stream import stream_agent, EventDecoder
+from services.events import adapt_event, RenderMeter
 from services.config_manager import get_avatars
 
+# 日志面板最短刷新间隔（秒），避免每一帧都重新读取日志文件
+LOG_REFRESH_INTERVAL = 0.5
+
+# 事件流编码偏好（按顺序协商，引擎不支持时回退到 JSON lines）
+STREAM_ENCODINGS = ("msgpack", "binary", "json")
+
 
 def render_messages():
     avatars = get_avatars()
@@ -98,6 +104,53 @@ def render_agent_status(status_container, events, logs_only=False):
         if logs:
             log_placeholder.code(logs, language="text")
 
+_BLOCK_RE = re.compile(r"```|\n\n")
+
+
+class AppendOnlyMarkdown:
+    """
+    流式 Markdown 渲染：已完成的段落（代码块外的空行处切分）各自写入一次后不再重绘，
+    只重绘末尾正在增长的段落，避免每帧对整段思考内容重新渲染 Markdown。
+    """
+
+    def __init__(self, placeholder, header: str, meter: RenderMeter | None = None):
+        self.meter = meter
+        self.text = ""
+        self.committed = 0
+        with placeholder.container():
+            st.markdown(header)
+            self.body = st.container()
+        with self.body:
+            self.tail = st.empty()
+        self._count_render()
+
+    def _count_render(self):
+        if self.meter:
+            self.meter.render()
+
+    def append(self, delta: str):
+        self.text += delta
+        pending = self.text[self.committed:]
+        boundary = 0
+        in_fence = False
+        for m in _BLOCK_RE.finditer(pending):
+            if m.group() == "```":
+                in_fence = not in_fence
+            elif not in_fence:
+                boundary = m.end()
+        if boundary:
+            # 段落已完整：最终渲染写入当前尾部元素，并在其后新建尾部占位
+            self.tail.markdown(pending[:boundary])
+            self._count_render()
+            self.committed += boundary
+            with self.body:
+                self.tail = st.empty()
+        rest = self.text[self.committed:]
+        if rest:
+            self.tail.markdown(rest)
+            self._count_render()
+
+
 def process_response(prompt: str):
     # Clear previous events for new run
     store.clear_events()
@@ -114,8 +167,15 @@ def process_response(prompt: str):
     store.set_running(True)
     store.set_stop(False)
     
+    meter = RenderMeter()
+    streaming_md = None
+    last_log_refresh = 0.0
+    
     try:
-        stream = stream_agent(prompt)
+        # 当前输入已在 render() 中追加到消息列表，历史上下文不包含它
+        history = store.get_messages()[:-1]
+        stream, encoding = stream_agent(prompt, history=history, accept=STREAM_ENCODINGS)
+        decoder = EventDecoder(encoding)
         
         for output in stream:
             if store.get_stop():
@@ -123,71 +183,77 @@ def process_response(prompt: str):
                 status_container.update(label=":material/stop_circle: 已取消", state="error", expanded=False)
                 full_response = "任务已取消"
                 break
-            for line in output.split('\n'):
-                if not line.strip():
-                    continue
-                try:
-                    data = json.loads(line)
-                    msg_type = data.get('type')
-                    content = data.get('content', '')
-                    result_data = data.get('data', '')
-                    ev = adapt_event(data)
-                    
-                    # 更新日志
+            for data in decoder.feed(output):
+                msg_type = data.get('type')
+                content = data.get('content', '')
+                result_data = data.get('data', '')
+                ev = adapt_event(data)
+                meter.frame(data)
+                
+                # 更新日志（节流：流式帧之间不必每次重读日志文件）
+                now = time.monotonic()
+                if msg_type != 'thought_stream' or now - last_log_refresh >= LOG_REFRESH_INTERVAL:
+                    last_log_refresh = now
                     logs = read_formatted_logs()
                     if logs:
                         log_placeholder.code(logs, language="text")
+                        meter.render()
 
-                    if msg_type == 'thought_stream':
-                        # 流式更新思考内容
-                        events = store.get_events()
-                        if events and events[-1]['type'] == 'thought':
-                            events[-1]['content'] += content
-                            thought_placeholder.markdown(f"### :material/psychology: 思考中...\n{events[-1]['content']}")
-                        else:
-                            # 异常情况处理：如果流式内容前没有 thought 事件
-                            ev['type'] = 'thought'
-                            store.append_event(ev)
-                            thought_placeholder.markdown(f"### :material/psychology: 思考中...\n{content}")
-                            
+                if msg_type == 'thought_stream':
+                    # 流式更新思考内容：只追加新帧
+                    events = store.get_events()
+                    if events and events[-1]['type'] == 'thought':
+                        events[-1]['content'] += content
                     else:
+                        # 异常情况处理：如果流式内容前没有 thought 事件
+                        ev['type'] = 'thought'
                         store.append_event(ev)
+                    if streaming_md is None:
+                        streaming_md = AppendOnlyMarkdown(thought_placeholder, "### :material/psychology: 思考中...", meter)
+                    streaming_md.append(content)
+                        
+                else:
+                    store.append_event(ev)
+                    if msg_type not in ('usage', 'resources'):
+                        streaming_md = None
 
-                        if msg_type == 'thought':
-                            thought_placeholder.markdown(f"### :material/psychology: 思考中...\n{content}")
-                            status_container.update(label=f":material/sync: {ev.get('stage', '处理中')}")
-                            
-                        elif msg_type == 'execution':
-                            thought_placeholder.markdown(f"### :material/terminal: 执行代码\n正在执行 Python 代码...")
-                            code_placeholder.code(content, language="python")
-                            status_container.update(label=f":material/terminal: 执行代码 ({int(ev.get('progress',0)*100)}%)")
+                    if msg_type == 'thought':
+                        streaming_md = AppendOnlyMarkdown(thought_placeholder, f"### :material/psychology: 思考中...\n{content}", meter)
+                        status_container.update(label=f":material/sync: {ev.get('stage', '处理中')}")
+                        
+                    elif msg_type == 'execution':
+                        thought_placeholder.markdown(f"### :material/terminal: 执行代码\n正在执行 Python 代码...")
+                        code_placeholder.code(content, language="python")
+                        status_container.update(label=f":material/terminal: 执行代码 ({int(ev.get('progress',0)*100)}%)")
+                    
+                    elif msg_type == 'error':
+                        thought_placeholder.markdown(f"### :material/error: 发生错误\n{content}")
+                        status_container.update(label=":material/error: 出错了", state="error")
                         
-                        elif msg_type == 'error':
-                            thought_placeholder.markdown(f"### :material/error: 发生错误\n{content}")
-                            status_container.update(label=":material/error: 出错了", state="error")
-                            
-                        elif msg_type == 'result':
-                            if data.get('success'):
-                                full_response = result_data
-                                status_container.update(label=":material/check_circle: 分析完成", state="complete", expanded=False)
-                                # 任务完成后，保留最后的日志在 status 中
-                                thought_placeholder.empty()
-                                code_placeholder.empty()
-                                # 最终结果显示在 status 外部，或者在 status 内部最后更新
-                                status_container.write(full_response)
-                            else:
-                                full_response = f"⚠️ 任务失败: {result_data}"
-                                status_container.update(label=":material/cancel: 任务中止", state="error")
-                                status_container.write(full_response)
-                            
-                except json.JSONDecodeError:
-                    continue
+                    elif msg_type == 'result':
+                        if data.get('success'):
+                            full_response = result_data
+                            status_container.update(label=":material/check_circle: 分析完成", state="complete", expanded=False)
+                            # 任务完成后，保留最后的日志在 status 中
+                            thought_placeholder.empty()
+                            code_placeholder.empty()
+                            # 最终结果显示在 status 外部，或者在 status 内部最后更新
+                            status_container.write(full_response)
+                        else:
+                            full_response = f"⚠️ 任务失败: {result_data}"
+                            status_container.update(label=":material/cancel: 任务中止", state="error")
+                            status_container.write(full_response)
     except Exception as e:
         status_container.update(label=":material/error: 系统异常", state="error")
         full_response = f"系统错误: {str(e)}"
         status_container.write(full_response)
     
     store.set_running(False)
+    stats = meter.snapshot()
+    store.set_render_stats(stats)
+    status_container.caption(
+        f"渲染 {stats['renders']} 次 / {stats['frames']} 帧（{stats['deltas']} 个增量），{stats['renders_per_sec']} 次/秒"
+    )
     return full_response
 
 def render():
@@ -18,7 +18,7 @@ def render_file_card(file_path: str):
             </div>
         </div>
         """, unsafe_allow_html=True)
-        if ext == 'png':
+        if ext in ('png', 'jpg', 'jpeg', 'webp', 'svg'):
             st.image(file_path, caption=filename, width='stretch')
         elif ext in ['xlsx', 'csv']:
             with st.expander(f"预览数据: {filename}"):
@@ -5,6 +5,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from core.agent_engine import agent_workflow_streaming
+from core.event_stream import EventDecoder, negotiate_encoding
 
-def stream_agent(intent: str):
-    return agent_workflow_streaming(intent)
+def stream_agent(intent: str, history: list | None = None, accept=None):
+    """
+    Without `accept`, returns the JSON-lines generator (unchanged behaviour).
+    With `accept` (encodings in preference order), returns (stream, encoding);
+    decode the chunks with EventDecoder(encoding).
+    """
+    if accept is None:
+        return agent_workflow_streaming(intent, history=history)
+    encoding = negotiate_encoding(accept)
+    return agent_workflow_streaming(intent, history=history, encoding=encoding), encoding
@@ -1,7 +1,12 @@
 import json
 import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config.json")
+LOCK_PATH = CONFIG_PATH + ".lock"
 
 DEFAULT_CONFIG = {
     "theme": "Warm Peach",
@@ -10,60 +15,149 @@ DEFAULT_CONFIG = {
     "llm_model": "deepseek-chat"
 }
 
+# Getters run on every render/rerun, so the parsed config is kept in memory.
+# The file is stat()-ed at most once per CHECK_INTERVAL to pick up changes made
+# by other Streamlit sessions or processes.
+CHECK_INTERVAL = 1.0
+
+_cache = {"config": None, "sig": None, "checked": 0.0}
+_thread_lock = threading.RLock()
+
+
+@contextmanager
+def _file_lock():
+    """Cross-process exclusive lock on a sidecar file (fcntl on POSIX, msvcrt on Windows)."""
+    with open(LOCK_PATH, "a+b") as lock_file:
+        if os.name == "nt":
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _signature():
+    try:
+        st = os.stat(CONFIG_PATH)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
+def _read_from_disk():
+    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    # Ensure defaults exist for new keys
+    for k, v in DEFAULT_CONFIG.items():
+        if k not in config:
+            config[k] = v
+    return config
+
+
+def _cached_config():
+    with _thread_lock:
+        now = time.monotonic()
+        if _cache["config"] is not None and now - _cache["checked"] < CHECK_INTERVAL:
+            return _cache["config"]
+        _cache["checked"] = now
+        sig = _signature()
+        if _cache["config"] is not None and sig == _cache["sig"]:
+            return _cache["config"]
+        if sig is None:
+            save_config(DEFAULT_CONFIG)
+            return _cache["config"] or DEFAULT_CONFIG
+        try:
+            _cache["config"] = _read_from_disk()
+        except Exception:
+            # Unreadable (e.g. hand-edited) file: fall back to defaults until it changes again
+            _cache["config"] = dict(DEFAULT_CONFIG)
+        _cache["sig"] = sig
+        return _cache["config"]
+
+
 def load_config():
-    if not os.path.exists(CONFIG_PATH):
-        save_config(DEFAULT_CONFIG)
-        return DEFAULT_CONFIG
-    
+    return dict(_cached_config())
+
+
+def _write_atomic(config):
+    """Write to a temp file in the same directory, then rename over config.json."""
+    fd, tmp_path = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=os.path.dirname(CONFIG_PATH))
     try:
-        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-            config = json.load(f)
-            # Ensure defaults exist for new keys
-            for k, v in DEFAULT_CONFIG.items():
-                if k not in config:
-                    config[k] = v
-            return config
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CONFIG_PATH)
     except Exception:
-        return DEFAULT_CONFIG
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
 
 def save_config(config):
     try:
-        with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=4, ensure_ascii=False)
+        with _thread_lock, _file_lock():
+            _write_atomic(config)
+            _cache["config"] = dict(config)
+            _cache["sig"] = _signature()
+            _cache["checked"] = time.monotonic()
     except Exception as e:
         print(f"Error saving config: {e}")
 
+
+def _update(key, value):
+    """
+    Read-modify-write under the cross-process lock. The current file is
+    re-read inside the lock so concurrent sessions don't drop each other's keys.
+    """
+    try:
+        with _thread_lock, _file_lock():
+            try:
+                config = _read_from_disk()
+            except Exception:
+                config = dict(_cache["config"] or DEFAULT_CONFIG)
+            config[key] = value
+            _write_atomic(config)
+            _cache["config"] = config
+            _cache["sig"] = _signature()
+            _cache["checked"] = time.monotonic()
+    except Exception as e:
+        print(f"Error saving config: {e}")
+
+
 def get_theme():
-    config = load_config()
-    return config.get("theme", "Warm Peach")
+    return _cached_config().get("theme", "Warm Peach")
 
 def set_theme(theme_name):
-    config = load_config()
-    config["theme"] = theme_name
-    save_config(config)
+    _update("theme", theme_name)
 
 def get_avatars():
-    config = load_config()
+    config = _cached_config()
     return {
         "user": config.get("user_avatar", "👤"),
         "agent": config.get("agent_avatar", "🤖")
     }
 
 def set_user_avatar(avatar):
-    config = load_config()
-    config["user_avatar"] = avatar
-    save_config(config)
+    _update("user_avatar", avatar)
 
 def set_agent_avatar(avatar):
-    config = load_config()
-    config["agent_avatar"] = avatar
-    save_config(config)
+    _update("agent_avatar", avatar)
 
 def get_llm_model():
-    config = load_config()
-    return config.get("llm_model", "deepseek-chat")
+    return _cached_config().get("llm_model", "deepseek-chat")
 
 def set_llm_model(model_name):
-    config = load_config()
-    config["llm_model"] = model_name
-    save_config(config)
+    _update("llm_model", model_name)
@@ -1,5 +1,6 @@
 import os
 import re
+import time
 
 def adapt_event(data: dict) -> dict:
     t = data.get('type')
@@ -8,20 +9,24 @@ def adapt_event(data: dict) -> dict:
     stage_map = {
         'thought': 'plan',
         'thought_stream': 'plan',
+        'usage': 'plan',
         'execution': 'run',
+        'resources': 'run',
         'error': 'run',
         'result': 'done'
     }
     progress_map = {
         'thought': 0.1,
         'thought_stream': 0.2,
+        'usage': 0.3,
         'execution': 0.5,
+        'resources': 0.55,
         'error': 0.6,
         'result': 1.0
     }
     attachments = []
     if t == 'result':
-        paths = re.findall(r'([A-Za-z]:\\[^:\n]*\.(?:xlsx|csv|png)|workspace[\\/][^:\n]*\.(?:xlsx|csv|png))', result_data)
+        paths = re.findall(r'([A-Za-z]:\\[^:\n]*\.(?:xlsx|csv|png|webp|svg)|workspace[\\/][^:\n]*\.(?:xlsx|csv|png|webp|svg))', result_data)
         for p in paths:
             ap = os.path.abspath(p.strip())
             if os.path.exists(ap) and ap not in attachments:
@@ -34,3 +39,39 @@ def adapt_event(data: dict) -> dict:
         'success': True if (t == 'result' and data.get('success')) else (False if t == 'result' else None),
         'attachments': attachments
     }
+
+
+class RenderMeter:
+    """
+    Render-rate metric for the streaming UI: frames received, deltas merged
+    into them, and how many times the page was actually re-rendered.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.frames = 0
+        self.deltas = 0
+        self.renders = 0
+        self.bytes = 0
+
+    def frame(self, data: dict):
+        self.frames += 1
+        if data.get('type') == 'thought_stream':
+            self.deltas += int(data.get('n', 1))
+            self.bytes += len(data.get('content', '').encode('utf-8'))
+
+    def render(self, n: int = 1):
+        self.renders += n
+
+    def snapshot(self) -> dict:
+        elapsed = max(self.clock() - self.started, 1e-6)
+        return {
+            'frames': self.frames,
+            'deltas': self.deltas,
+            'renders': self.renders,
+            'bytes': self.bytes,
+            'elapsed': round(elapsed, 2),
+            'renders_per_sec': round(self.renders / elapsed, 1),
+            'deltas_per_frame': round(self.deltas / self.frames, 1) if self.frames else 0.0,
+        }
@@ -11,6 +11,8 @@ def init():
         st.session_state.running = False
     if 'stop' not in st.session_state:
         st.session_state.stop = False
+    if 'render_stats' not in st.session_state:
+        st.session_state.render_stats = {}
 
 def get_messages():
     return st.session_state.get('messages', [])
@@ -48,3 +50,9 @@ def set_stop(val: bool):
 
 def request_stop():
     st.session_state.stop = True
+
+def get_render_stats():
+    return st.session_state.get('render_stats', {})
+
+def set_render_stats(stats: dict):
+    st.session_state.render_stats = dict(stats)
@@ -1,3 +1,4 @@
+import argparse
 import sys
 import os
 from dotenv import load_dotenv
@@ -18,6 +19,9 @@ def main():
     print("Example: 获取平安银行2023年1月的日线数据并画图")
     print("--------------------------------------------------")
 
+    # Prior turns, so follow-up questions keep their context
+    history = []
+
     while True:
         try:
             user_input = input("\nUser> ").strip()
@@ -30,7 +34,9 @@ def main():
                 
             print(f"\n[Agent] Processing: {user_input}...")
             
-            success, result = agent_workflow(user_input)
+            success, result = agent_workflow(user_input, history=history)
+            history.append({"role": "user", "content": user_input})
+            history.append({"role": "assistant", "content": result if success else f"任务失败: {result}"})
             
             if success:
                 print(f"\n[SUCCESS] Result:\n{result}")
@@ -43,5 +49,20 @@ def main():
         except Exception as e:
             print(f"\n[ERROR] {e}")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FinDataAgent")
+    parser.add_argument("--batch", metavar="FILE", help="run intents from a .txt/.jsonl/.csv file instead of the REPL")
+    parser.add_argument("--parallel", type=int, default=4, help="intents processed concurrently")
+    parser.add_argument("--exec-parallel", type=int, default=None, help="generated scripts running at once (default: --parallel)")
+    parser.add_argument("--out", default=None, help="ledger/summary directory (default: workspace/batch/<file name>)")
+    parser.add_argument("--retry-failed", action="store_true", help="rerun items the ledger records as failed")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    args = parse_args()
+    if args.batch:
+        from core.batch import run_batch
+        summary = run_batch(args.batch, out_dir=args.out, parallel=args.parallel,
+                            exec_parallel=args.exec_parallel, retry_failed=args.retry_failed)
+        sys.exit(0 if summary["statuses"].get("succeeded", 0) == summary["total"] else 1)
     main()
@@ -0,0 +1,27 @@
+import argparse
+import os
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FinDataAgent HTTP/SSE service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="concurrent jobs (FINDATA_MAX_WORKERS)")
+    parser.add_argument("--max-pending", type=int, default=None, help="queued jobs before 429 (FINDATA_MAX_PENDING)")
+    parser.add_argument("--keepalive", type=float, default=5.0, help="HTTP keep-alive timeout in seconds")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        os.environ["FINDATA_MAX_WORKERS"] = str(args.workers)
+    if args.max_pending:
+        os.environ["FINDATA_MAX_PENDING"] = str(args.max_pending)
+
+    import uvicorn
+    from service.app import app
+
+    uvicorn.run(app, host=args.host, port=args.port, timeout_keep_alive=args.keepalive,
+                lifespan="on", log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
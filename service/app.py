@@ -0,0 +1,271 @@
+"""
+Headless HTTP entry point for the agent engine (plain ASGI, no framework).
+
+    POST   /v1/jobs                          {"intent": "...", "history": [...]}  -> 202 job
+    GET    /v1/jobs/{id}                     job status
+    DELETE /v1/jobs/{id}                     cancel
+    GET    /v1/jobs/{id}/events              Server-Sent Events (resumable via Last-Event-ID / ?from=N)
+    GET    /v1/jobs/{id}/artifacts           artifact list
+    GET    /v1/jobs/{id}/artifacts/{n}       artifact download
+    GET    /healthz                          liveness + pool/job/usage stats
+
+Run with `python -m service` (uvicorn). Jobs run on core.jobs.JobManager;
+when its queue is full, POST returns 429 with Retry-After.
+"""
+import asyncio
+import json
+import mimetypes
+import os
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote
+
+from core.jobs import JobManager, QueueFull
+from core.knowledge_manager import ROOT_DIR
+from tools.code_executor import active_runs
+from tools.workspace_sweeper import ensure_sweeper
+
+WORKSPACE_DIR = os.path.join(ROOT_DIR, "workspace")
+
+# SSE comment sent when a job has been quiet this long, so proxies keep the connection open
+KEEPALIVE_INTERVAL = 15.0
+# Upper bound on one SSE write when a reader is catching up on a backlog
+MAX_SSE_BATCH_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+DOWNLOAD_CHUNK = 64 * 1024
+
+
+def _json_body(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+async def _send_json(send, status: int, payload, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+    body = _json_body(payload)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode())] + (headers or []),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise ConnectionError("client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def sse_event(index: int, event: Dict) -> bytes:
+    data = json.dumps(event, ensure_ascii=False)
+    return f"id: {index}\nevent: {event.get('type', 'message')}\ndata: {data}\n\n".encode("utf-8")
+
+
+def _resolve_artifact(path: str) -> Optional[str]:
+    """Only files under workspace/ may be downloaded."""
+    full = os.path.realpath(path if os.path.isabs(path) else os.path.join(ROOT_DIR, path))
+    if os.path.commonpath([full, os.path.realpath(WORKSPACE_DIR)]) != os.path.realpath(WORKSPACE_DIR):
+        return None
+    return full if os.path.isfile(full) else None
+
+
+class AgentService:
+    """ASGI application; one instance per process."""
+
+    def __init__(self, manager: Optional[JobManager] = None, keepalive: float = KEEPALIVE_INTERVAL):
+        self.manager = manager or JobManager(
+            max_workers=int(os.getenv("FINDATA_MAX_WORKERS", "4")),
+            max_pending=int(os.getenv("FINDATA_MAX_PENDING", "32")),
+        )
+        self.keepalive = keepalive
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method = scope["method"]
+        parts = [p for p in scope["path"].split("/") if p]
+        try:
+            if parts == ["healthz"] and method == "GET":
+                await self._health(send)
+            elif parts == ["v1", "jobs"] and method == "POST":
+                await self._submit(receive, send)
+            elif len(parts) >= 3 and parts[:2] == ["v1", "jobs"]:
+                job = self.manager.get(parts[2])
+                if job is None:
+                    await _send_json(send, 404, {"error": "job not found"})
+                elif len(parts) == 3 and method == "GET":
+                    await _send_json(send, 200, job.snapshot())
+                elif len(parts) == 3 and method == "DELETE":
+                    job.cancel()
+                    await _send_json(send, 202, job.snapshot())
+                elif parts[3:] == ["events"] and method == "GET":
+                    await self._events(scope, receive, send, job)
+                elif parts[3:] == ["artifacts"] and method == "GET":
+                    await _send_json(send, 200, {"artifacts": job.artifacts})
+                elif len(parts) == 5 and parts[3] == "artifacts" and method == "GET":
+                    await self._download(send, job, parts[4])
+                else:
+                    await _send_json(send, 405, {"error": "method not allowed"})
+            else:
+                await _send_json(send, 404, {"error": "not found"})
+        except ConnectionError:
+            pass
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                ensure_sweeper(protect=active_runs)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.manager.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _health(self, send):
+        from core.llm_backends import get_backend_pool
+        from core.llm_usage import get_usage_stats
+        from core.prompt_registry import get_prompt_registry
+        from core.intent_router import get_intent_router
+        from core.script_library import get_script_library
+        await _send_json(send, 200, {
+            "status": "ok",
+            "jobs": self.manager.stats(),
+            "backends": get_backend_pool(get_prompt_registry().config()).stats(),
+            "usage": get_usage_stats(),
+            "router": get_intent_router().stats(),
+            "script_library": get_script_library().stats(),
+            "workspace": ensure_sweeper(protect=active_runs).stats(),
+        })
+
+    async def _submit(self, receive, send):
+        try:
+            payload = json.loads(await _read_body(receive) or b"{}")
+        except (ValueError, UnicodeDecodeError) as e:
+            await _send_json(send, 400, {"error": f"invalid body: {e}"})
+            return
+        intent = payload.get("intent") if isinstance(payload, dict) else None
+        if not isinstance(intent, str) or not intent.strip():
+            await _send_json(send, 400, {"error": "`intent` is required"})
+            return
+        history = payload.get("history")
+        if history is not None and not isinstance(history, list):
+            await _send_json(send, 400, {"error": "`history` must be a list of messages"})
+            return
+        try:
+            job = self.manager.submit(intent.strip(), history)
+        except QueueFull as e:
+            await _send_json(send, 429, {"error": f"busy: {e}"}, headers=[(b"retry-after", b"1")])
+            return
+        snapshot = job.snapshot()
+        snapshot["events_url"] = f"/v1/jobs/{job.id}/events"
+        await _send_json(send, 202, snapshot, headers=[(b"location", f"/v1/jobs/{job.id}".encode())])
+
+    async def _events(self, scope, receive, send, job):
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        cursor = 0
+        try:
+            if "last-event-id" in headers:
+                cursor = int(headers["last-event-id"]) + 1
+            elif "from" in query:
+                cursor = int(query["from"][0])
+        except ValueError:
+            cursor = 0
+
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/event-stream; charset=utf-8"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-accel-buffering", b"no")],
+        })
+
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+        disconnected = False
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass
+
+        async def watch_disconnect():
+            nonlocal disconnected
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected = True
+                    wake.set()
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            while not disconnected:
+                pending = job.events[cursor:]
+                if pending:
+                    # Catch-up: batch the backlog into few writes. `send` awaits the
+                    # transport, so a slow reader only slows its own loop.
+                    batch, size = [], 0
+                    for ev in pending:
+                        chunk = sse_event(cursor, ev)
+                        batch.append(chunk)
+                        size += len(chunk)
+                        cursor += 1
+                        if size >= MAX_SSE_BATCH_BYTES:
+                            break
+                    await send({"type": "http.response.body", "body": b"".join(batch), "more_body": True})
+                    continue
+                if job.done:
+                    end = {"type": "end", "status": job.status, "result": job.result, "artifacts": job.artifacts}
+                    await send({"type": "http.response.body", "body": sse_event(cursor, end), "more_body": False})
+                    return
+                wake.clear()
+                if job.add_waiter(notify, cursor):
+                    try:
+                        await asyncio.wait_for(wake.wait(), self.keepalive)
+                    except asyncio.TimeoutError:
+                        await send({"type": "http.response.body", "body": b": keep-alive\n\n", "more_body": True})
+        finally:
+            watcher.cancel()
+
+    async def _download(self, send, job, index: str):
+        try:
+            path = _resolve_artifact(job.artifacts[int(index)])
+        except (ValueError, IndexError):
+            path = None
+        if path is None:
+            await _send_json(send, 404, {"error": "artifact not found"})
+            return
+        ctype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        name = os.path.basename(path)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", ctype.encode()),
+                        (b"content-length", str(os.path.getsize(path)).encode()),
+                        (b"content-disposition", f"attachment; filename*=UTF-8''{quote(name)}".encode())],
+        })
+        with open(path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, DOWNLOAD_CHUNK)
+                more = len(chunk) == DOWNLOAD_CHUNK
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+                if not more:
+                    break
+
+
+app = AgentService()
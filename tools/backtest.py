@@ -0,0 +1,172 @@
+"""
+Vectorized backtests over (trade_date x ts_code) price panels.
+
+Signals and prices are aligned matrices, so positions, turnover, fees and
+PnL are whole-array NumPy operations instead of `iterrows` loops:
+
+    prices = price_panel(adjust_prices(MARKET.daily(start_date='20200101'), factors))
+    signals = ma_cross_signals(prices, fast=5, slow=20)
+    result = backtest(prices, signals)                      # equal-weight portfolio
+    result = backtest(prices, signals, mode='per_symbol')   # each symbol on its own
+    result.metrics, result.equity
+
+Timing: a signal observed at the close of day t is executed at the close
+of day t + lag (default lag=1, no look-ahead) and earns returns from the
+following day on. Target weights are rebalanced daily; costs are a
+commission on both sides plus stamp tax on sells, charged on turnover.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+PERIODS_PER_YEAR = 252
+COMMISSION = 0.0003   # per side
+STAMP_TAX = 0.0005    # sells only (A-share rate since 2023-08-28)
+MODES = ("portfolio", "per_symbol")
+WEIGHTINGS = ("equal", "signal")
+
+
+@dataclass
+class BacktestResult:
+    equity: object                 # Series (portfolio) or DataFrame (per_symbol), starts at `capital`
+    returns: object                # net daily returns, same shape as equity
+    positions: pd.DataFrame        # weights held during each day's return
+    costs: object                  # daily cost as a fraction of equity
+    metrics: object                # dict (portfolio) or DataFrame indexed by ts_code (per_symbol)
+    trades: pd.Series = field(default=None)  # entries per ts_code
+
+    def summary(self) -> pd.DataFrame:
+        """Metrics as a table, one row per portfolio/symbol."""
+        if isinstance(self.metrics, dict):
+            return pd.DataFrame([self.metrics], index=["portfolio"])
+        return self.metrics
+
+
+def price_panel(df: pd.DataFrame, value: str = "close", index: str = "trade_date",
+                columns: str = "ts_code") -> pd.DataFrame:
+    """Long daily bars (pro.daily / MARKET.daily / adjust_prices output) -> dates x symbols matrix."""
+    panel = df.pivot_table(index=index, columns=columns, values=value, aggfunc="last", observed=True)
+    panel.columns = panel.columns.astype(str)
+    return panel.sort_index()
+
+
+def ma_cross_signals(prices: pd.DataFrame, fast: int = 5, slow: int = 20) -> pd.DataFrame:
+    """1 while the fast moving average is above the slow one, else 0 (NaN warm-up -> 0)."""
+    fast_ma = prices.rolling(fast, min_periods=fast).mean()
+    slow_ma = prices.rolling(slow, min_periods=slow).mean()
+    return (fast_ma > slow_ma).astype("float64")
+
+
+def _shift_rows(values: np.ndarray, n: int) -> np.ndarray:
+    if n <= 0:
+        return values
+    out = np.zeros_like(values)
+    out[n:] = values[:-n]
+    return out
+
+
+def performance(returns: np.ndarray, positions: Optional[np.ndarray] = None,
+                periods_per_year: int = PERIODS_PER_YEAR, risk_free: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Standard metrics of each column of a (days x n) net-return matrix:
+    total_return, cagr, annual_vol, sharpe, sortino, max_drawdown, calmar,
+    win_rate (share of non-zero days that were positive) and exposure.
+    """
+    r = np.atleast_2d(returns.T).T
+    days = r.shape[0]
+    equity = np.cumprod(1.0 + r, axis=0)
+    total = equity[-1] - 1.0 if days else np.zeros(r.shape[1])
+    years = days / periods_per_year
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cagr = np.where(equity[-1] > 0, equity[-1] ** (1.0 / years) - 1.0, -1.0) if days else total
+        excess = r - risk_free / periods_per_year
+        std = r.std(axis=0, ddof=1) if days > 1 else np.full(r.shape[1], np.nan)
+        downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2, axis=0))
+        sharpe = excess.mean(axis=0) / std * np.sqrt(periods_per_year)
+        sortino = excess.mean(axis=0) / downside * np.sqrt(periods_per_year)
+        drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+        max_dd = drawdown.min(axis=0) if days else np.zeros(r.shape[1])
+        calmar = cagr / np.abs(max_dd)
+        active = (r != 0).sum(axis=0)
+        win_rate = (r > 0).sum(axis=0) / active
+    metrics = {
+        "total_return": total, "cagr": cagr, "annual_vol": std * np.sqrt(periods_per_year),
+        "sharpe": sharpe, "sortino": sortino, "max_drawdown": max_dd, "calmar": calmar, "win_rate": win_rate,
+    }
+    if positions is not None:
+        metrics["exposure"] = (np.abs(np.atleast_2d(positions.T).T) > 0).mean(axis=0)
+    return {k: np.where(np.isfinite(v), v, np.nan) for k, v in metrics.items()}
+
+
+def backtest(prices: pd.DataFrame, signals: pd.DataFrame, mode: str = "portfolio", weighting: str = "equal",
+             lag: int = 1, commission: float = COMMISSION, stamp_tax: float = STAMP_TAX, capital: float = 1.0,
+             periods_per_year: int = PERIODS_PER_YEAR, risk_free: float = 0.0) -> BacktestResult:
+    """
+    Backtest long-only `signals` (dates x symbols; >0 = hold) on `prices`
+    (adjusted closes, same layout; use `price_panel`).
+
+    mode="portfolio": one book; held symbols get equal weights
+    (weighting="equal") or weights proportional to the signal values
+    (weighting="signal"). mode="per_symbol": every column is an
+    independent all-in/all-out strategy. A symbol without a price on a
+    day (suspension) cannot be traded that day and keeps its holding.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"weighting must be one of {WEIGHTINGS}, got {weighting!r}")
+    prices = prices.sort_index()
+    signals = signals.reindex(index=prices.index, columns=prices.columns)
+
+    px = prices.to_numpy(dtype="float64")
+    # returns across a suspension land on the day trading resumes
+    filled = prices.ffill().to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        asset_returns = np.zeros_like(px)
+        asset_returns[1:] = filled[1:] / filled[:-1] - 1.0
+    asset_returns[~np.isfinite(asset_returns)] = 0.0
+
+    raw = np.clip(np.nan_to_num(signals.to_numpy(dtype="float64"), nan=0.0), 0.0, None)
+    held = raw if mode == "portfolio" and weighting == "signal" else (raw > 0).astype("float64")
+    # a symbol without a price on the execution day (suspended) can be neither
+    # bought nor sold: it keeps the previous holding until it trades again
+    tradable = np.ones_like(px, dtype=bool)
+    tradable[:len(px) - lag] = np.isfinite(px[lag:])
+    held = pd.DataFrame(np.where(tradable, held, np.nan)).ffill().fillna(0.0).to_numpy()
+    if mode == "per_symbol":
+        target = held
+    else:
+        total = held.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            target = np.where(total > 0, held / total, 0.0)
+
+    # target decided at close t, traded at close t+lag, earning from day t+lag+1
+    weights = _shift_rows(target, lag + 1)
+    change = np.diff(weights, axis=0, prepend=0.0)
+    costs = np.clip(change, 0.0, None) * commission + np.clip(-change, 0.0, None) * (commission + stamp_tax)
+    gross = weights * asset_returns
+
+    index, columns = prices.index, prices.columns
+    positions = pd.DataFrame(weights, index=index, columns=columns)
+    trades = pd.Series(((change > 0) & (weights > 0) & (_shift_rows(weights, 1) == 0)).sum(axis=0),
+                       index=columns, name="trades")
+    if mode == "portfolio":
+        net = gross.sum(axis=1) - costs.sum(axis=1)
+        stats = performance(net, (weights.sum(axis=1) > 0).astype("float64"), periods_per_year, risk_free)
+        metrics = {k: float(v[0]) for k, v in stats.items()}
+        metrics["trades"] = int(trades.sum())
+        metrics["turnover"] = float(np.abs(change).sum() / max(len(index) / periods_per_year, 1e-12))
+        returns = pd.Series(net, index=index, name="return")
+        return BacktestResult(equity=capital * (1.0 + returns).cumprod().rename("equity"), returns=returns,
+                              positions=positions, costs=pd.Series(costs.sum(axis=1), index=index, name="cost"),
+                              metrics=metrics, trades=trades)
+
+    net = gross - costs
+    stats = performance(net, weights, periods_per_year, risk_free)
+    metrics = pd.DataFrame(stats, index=columns)
+    metrics["trades"] = trades
+    returns = pd.DataFrame(net, index=index, columns=columns)
+    return BacktestResult(equity=capital * (1.0 + returns).cumprod(), returns=returns, positions=positions,
+                          costs=pd.DataFrame(costs, index=index, columns=columns), metrics=metrics, trades=trades)
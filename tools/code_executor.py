@@ -1,12 +1,27 @@
 import os
+import re
+import signal
 import subprocess
 import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Tuple
+from typing import Dict, List, Optional, Set, Tuple
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+from .workspace_sweeper import ensure_sweeper
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
 TEMP_DIR = os.path.join(ROOT_DIR, "workspace", "temp_scripts")
+EXPORTS_DIR = os.path.join(ROOT_DIR, "workspace", "exports")
 
 DEFAULT_PREAMBLE = """
 import os
@@ -28,18 +43,58 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-# Initialize Tushare
+# Initialize Tushare (FINDATA_STUB_TUSHARE=1 swaps in the offline stub for load tests/demos)
 token = os.getenv('TUSHARE_TOKEN')
-if token:
+if os.getenv('FINDATA_STUB_TUSHARE', '').strip().lower() in ('1', 'true', 'yes', 'on'):
+    from tools.stub_tushare import pro_api as _stub_pro_api
+    pro = _stub_pro_api()
+elif token:
     ts.set_token(token)
     pro = ts.pro_api()
 else:
     print("Warning: TUSHARE_TOKEN not found in environment variables.")
     pro = None
 
-# Ensure workspace directories exist
-os.makedirs('workspace/exports', exist_ok=True)
-os.makedirs('workspace/temp_scripts', exist_ok=True)
+# Shared reference datasets (REF.stock_basic / REF.trade_cal / REF.daily_recent), loaded on first access
+from tools.reference_data import ReferenceData
+REF = ReferenceData(pro)
+
+# Vectorized qfq/hfq adjustment from pro.adj_factor
+from tools.price_adjust import adjust_prices
+
+# One-pass report statistics (价格统计 / 数据摘要 sheets)
+from tools.report_stats import report_metrics, summary_stats
+
+# Vectorized backtests over dates x symbols panels
+from tools.backtest import backtest, ma_cross_signals, price_panel
+
+# Local whole-market daily store (tools/market_store.py), same call shape as pro.daily
+from tools.market_store import MarketStore
+MARKET = MarketStore()
+
+# Pushed-down scans/SQL over the market store (QUERY.sql / scan / aggregate / period_return)
+from tools.market_query import MarketQuery, field
+QUERY = MarketQuery(MARKET)
+
+# Precomputed cross-sectional factors (tools/factor_store.py): FACTORS.screen / history
+from tools.factor_store import FactorStore
+FACTORS = FactorStore(MARKET)
+
+# Pooled figures and target-sized chart output (tools/chart_renderer.py): FIGURES.subplots / save_figure
+from tools.chart_renderer import FIGURES, save_figure
+
+# Pixel-bounded line/bar/annotation helpers for long series (tools/downsample.py)
+from tools.downsample import annotate_peaks, bar_series, plot_series
+
+# Lean dtypes for pro.* results: datetime64 dates, category text (FINDATA_DTYPE_POLICY=off|lean|compact|arrow)
+from tools.frame_dtypes import LeanPro, concat_frames, normalize_frame
+pro = LeanPro.wrap(pro)
+# Same dtypes from the local readers (QUERY/FACTORS above were built on the raw store)
+MARKET, QUERY, FACTORS, REF = (LeanPro.wrap(reader) for reader in (MARKET, QUERY, FACTORS, REF))
+
+# Per-run output folder (workspace/exports/<run_id>), set by the executor
+EXPORT_DIR = os.environ.get('FINDATA_EXPORT_DIR', 'workspace/exports')
+os.makedirs(EXPORT_DIR, exist_ok=True)
 
 # Helper to print last file path clearly for the Agent to pick up
 def print_output_path(path):
@@ -47,47 +102,247 @@ def print_output_path(path):
 
 """
 
-def run_python_code(code_str: str, script_name: str | None = None, preamble: str = DEFAULT_PREAMBLE) -> Tuple[bool, str]:
+# Optional cap on concurrently running scripts (set by batch runs); None = unlimited
+_execution_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def set_execution_slots(limit: Optional[int]):
+    """Limit how many generated scripts run at once in this process (None/0 lifts the limit)."""
+    global _execution_slots
+    _execution_slots = threading.BoundedSemaphore(limit) if limit else None
+
+
+@dataclass
+class ExecutionLimits:
+    """Per-run limits; 0 disables one. rlimits only apply where `resource.prlimit` exists (Linux)."""
+    timeout: float = 600
+    memory_mb: int = 8192      # RLIMIT_AS
+    cpu_seconds: int = 300     # RLIMIT_CPU
+    open_files: int = 256      # RLIMIT_NOFILE
+    file_size_mb: int = 512    # RLIMIT_FSIZE, per written file
+
+    @classmethod
+    def from_env(cls) -> "ExecutionLimits":
+        """FINDATA_LIMIT_TIMEOUT / _MEMORY_MB / _CPU_SECONDS / _OPEN_FILES / _FILE_SIZE_MB override the defaults."""
+        values = {}
+        for name, default in asdict(cls()).items():
+            raw = os.getenv(f"FINDATA_LIMIT_{name.upper()}")
+            try:
+                values[name] = type(default)(float(raw)) if raw else default
+            except ValueError:
+                values[name] = default
+        return cls(**values)
+
+
+@dataclass
+class ExecutionResult:
+    ok: bool
+    output: str
+    # wall_seconds, cpu_seconds, peak_rss_mb, read_bytes, write_bytes, disk_write_bytes, exit_code, limit
+    resources: Dict = field(default_factory=dict)
+
+
+def _apply_limits(pid: int, limits: ExecutionLimits):
+    if resource is None or not hasattr(resource, "prlimit"):
+        return
+    mb = 1024 * 1024
+    wanted = [
+        (resource.RLIMIT_AS, limits.memory_mb * mb),
+        (resource.RLIMIT_CPU, limits.cpu_seconds),
+        (resource.RLIMIT_NOFILE, limits.open_files),
+        (resource.RLIMIT_FSIZE, limits.file_size_mb * mb),
+    ]
+    for which, value in wanted:
+        if not value:
+            continue
+        try:
+            _, hard = resource.getrlimit(which)
+            value = value if hard == resource.RLIM_INFINITY else min(value, hard)
+            # Set right after spawn: the interpreter is still starting up, before any user code runs
+            resource.prlimit(pid, which, (value, hard))
+        except (OSError, ValueError):
+            pass
+
+
+def _proc_io(pid: int) -> Dict[str, int]:
+    """Byte counters from /proc/<pid>/io (readable until the child is reaped)."""
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {k.strip(): int(v) for k, v in fields.items()}
+    except (OSError, ValueError):
+        return {}
+
+
+def _limit_hit(returncode: int, stderr: str, timed_out: bool) -> Optional[str]:
+    if timed_out:
+        return "timeout"
+    if returncode == -getattr(signal, "SIGXCPU", -1):
+        return "cpu"
+    if returncode == -getattr(signal, "SIGXFSZ", -1) or "File too large" in stderr:
+        return "file_size"
+    if "MemoryError" in stderr or "Cannot allocate memory" in stderr:
+        return "memory"
+    if "Too many open files" in stderr:
+        return "open_files"
+    return None
+
+
+_LIMIT_MESSAGES = {
+    "timeout": "Execution timed out after {l.timeout:g} seconds.",
+    "cpu": "Execution stopped: CPU time limit of {l.cpu_seconds} s exceeded.",
+    "file_size": "Execution stopped: output file size limit of {l.file_size_mb} MB exceeded.",
+    "memory": "Execution ran out of memory (limit {l.memory_mb} MB); process data in smaller chunks.",
+    "open_files": "Execution hit the open file limit ({l.open_files}).",
+}
+
+
+def _run_limited(cmd: List[str], env: Dict[str, str], limits: ExecutionLimits) -> ExecutionResult:
+    """
+    Run `cmd` under `limits` and account its resource usage. On POSIX the
+    child is reaped with os.wait4, so the rusage is exactly this child's,
+    even with other scripts running concurrently in the same process.
+    """
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    _apply_limits(proc.pid, limits)
+
+    chunks = {"out": [], "err": []}
+    readers = [threading.Thread(target=lambda s=stream, k=key: chunks[k].append(s.read()), daemon=True)
+               for stream, key in ((proc.stdout, "out"), (proc.stderr, "err"))]
+    for r in readers:
+        r.start()
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(limits.timeout, kill) if limits.timeout else None
+    if timer:
+        timer.start()
+    io: Dict[str, int] = {}
+    usage = None
+    try:
+        if hasattr(os, "wait4") and hasattr(os, "waitid"):
+            # Wait without reaping so /proc/<pid>/io is still there, then reap with rusage
+            os.waitid(os.P_PID, proc.pid, os.WEXITED | os.WNOWAIT)
+            io = _proc_io(proc.pid)
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        else:
+            proc.wait()
+    finally:
+        if timer:
+            timer.cancel()
+    for r in readers:
+        r.join()
+    proc.stdout.close()
+    proc.stderr.close()
+
+    stdout, stderr = "".join(chunks["out"]), "".join(chunks["err"])
+    resources = {"wall_seconds": round(time.perf_counter() - t0, 3), "exit_code": proc.returncode}
+    if usage is not None:
+        resources.update({
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            "peak_rss_mb": round(usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+            "read_bytes": io.get("rchar", usage.ru_inblock * 512),
+            "write_bytes": io.get("wchar", usage.ru_oublock * 512),
+            "disk_write_bytes": io.get("write_bytes", usage.ru_oublock * 512),
+        })
+    limit = _limit_hit(proc.returncode, stderr, timed_out.is_set())
+    resources["limit"] = limit
+
+    if proc.returncode == 0:
+        return ExecutionResult(True, stdout.strip(), resources)
+    output = (stdout + "\n" + stderr).strip()
+    if limit:
+        output = (output + "\n" + _LIMIT_MESSAGES[limit].format(l=limits)).strip()
+    return ExecutionResult(False, output, resources)
+
+
+_RUN_ID_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+# Runs currently executing; the workspace sweeper leaves their folders alone
+_active_runs: Set[str] = set()
+_active_lock = threading.Lock()
+
+
+def new_run_id() -> str:
+    """Sortable, collision-free id, e.g. 20240105_142233_3f9a1c2e."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def run_dirs(run_id: str) -> Tuple[str, str]:
+    """(script dir, export dir) of a run."""
+    if not _RUN_ID_RE.match(run_id) or run_id.strip(".") == "":
+        raise ValueError(f"invalid run id: {run_id!r}")
+    return os.path.join(TEMP_DIR, run_id), os.path.join(EXPORTS_DIR, run_id)
+
+
+def active_runs() -> Set[str]:
+    with _active_lock:
+        return set(_active_runs)
+
+
+@contextmanager
+def _track(run_id: str):
+    with _active_lock:
+        _active_runs.add(run_id)
+    try:
+        yield
+    finally:
+        with _active_lock:
+            _active_runs.discard(run_id)
+
+
+def execute_python_code(code_str: str, script_name: str | None = None, preamble: str = DEFAULT_PREAMBLE,
+                        run_id: str | None = None, limits: Optional[ExecutionLimits] = None) -> ExecutionResult:
     """
     Executes Python code string in a subprocess.
     Injects preamble before the code.
+
+    Each run gets its own folders: the script goes to
+    workspace/temp_scripts/<run_id>/ and outputs to workspace/exports/<run_id>/
+    (EXPORT_DIR in the preamble). Attempts of one agent run share a run_id;
+    without one, every call gets a fresh id.
+
+    The script runs under `limits` (ExecutionLimits.from_env() by default);
+    the result carries its resource usage.
     """
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    
-    # Clean up old scripts (optional, maybe keep them for debug)
-    # for name in os.listdir(TEMP_DIR):
-    #     p = os.path.join(TEMP_DIR, name)
-    #     try:
-    #         if os.path.isfile(p):
-    #             os.remove(p)
-    #     except Exception:
-    #         pass
-            
-    if not script_name:
-        script_name = f"gen_{datetime.now().strftime('%Y%m%d_%H%M%S')}.py"
-    
-    script_path = os.path.join(TEMP_DIR, script_name)
-    
+    run_id = run_id or new_run_id()
+    script_dir, export_dir = run_dirs(run_id)
+    os.makedirs(script_dir, exist_ok=True)
+    os.makedirs(export_dir, exist_ok=True)
+    ensure_sweeper(protect=active_runs)
+
+    script_path = os.path.join(script_dir, os.path.basename(script_name or "script.py"))
+
     full_code = preamble + "\n" + code_str
-    
+
     with open(script_path, "w", encoding="utf-8") as f:
         f.write(full_code)
 
     cmd = [sys.executable, script_path]
     env = os.environ.copy()
     env["PYTHONPATH"] = ROOT_DIR + os.pathsep + env.get("PYTHONPATH", "")
-    
+    env["FINDATA_RUN_ID"] = run_id
+    env["FINDATA_EXPORT_DIR"] = export_dir
+
     try:
-        # Increased timeout for data fetching
-        proc = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True, timeout=600, env=env)
-        if proc.returncode == 0:
-            return True, proc.stdout.strip()
-        else:
-            return False, (proc.stdout + "\n" + proc.stderr).strip()
-    except subprocess.TimeoutExpired:
-        return False, "Execution timed out after 600 seconds."
+        with _track(run_id), _execution_slots or nullcontext():
+            return _run_limited(cmd, env, limits or ExecutionLimits.from_env())
     except Exception as e:
-        return False, str(e)
+        return ExecutionResult(False, str(e))
+
+
+def run_python_code(code_str: str, script_name: str | None = None, preamble: str = DEFAULT_PREAMBLE,
+                    run_id: str | None = None) -> Tuple[bool, str]:
+    """execute_python_code() without the resource accounting: (ok, output)."""
+    result = execute_python_code(code_str, script_name, preamble, run_id)
+    return result.ok, result.output
 
 def run_python_file(script_path: str) -> Tuple[bool, str]:
     if not os.path.isabs(script_path):
@@ -0,0 +1,236 @@
+"""
+Downsampling for long line charts.
+
+A chart is ~1,200-2,400 pixels wide, so a multi-year daily or minute series
+carries far more points than can be drawn. The helpers below keep what is
+visible and draw a bounded number of points whatever the series length:
+
+    plot_series(ax, df['trade_date'], df['close'], label='收盘价')   # ax.plot
+    bar_series(ax, df['trade_date'], df['vol'], alpha=0.6)           # ax.bar
+    annotate_peaks(ax, df['date'], df['value'], k=10)                # ax.annotate
+
+- The pixel budget is the axes width at the download dpi (axes_pixels).
+  Below it the helpers pass every point to matplotlib.
+- Above it, lines keep the first, min, max and last point of every pixel
+  bucket (method='minmax', M4) or use LTTB (method='lttb'). Bars become a
+  per-bucket max envelope.
+- Annotations go to the peak or trough of each of k segments, chosen with
+  array operations instead of a loop over every point.
+- String x (YYYYMMDD trade_date) is drawn by position in one label index per
+  axes with ~10 ticks, so non-trading days leave no gaps and series of
+  different ranges line up. The index is sorted while every series is
+  ascending (first-seen order otherwise); when a later series inserts labels
+  the helpers' earlier artists move with it. An axes already made categorical
+  by a plain ax.plot keeps string x instead; a plain ax.plot of strings after
+  the helpers is not aligned.
+"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from matplotlib.category import UnitData
+from matplotlib.collections import PolyCollection
+from matplotlib.container import BarContainer
+from matplotlib.lines import Line2D
+from matplotlib.patches import Rectangle
+from matplotlib.text import Annotation
+from matplotlib.ticker import Formatter, MaxNLocator
+
+from tools.chart_renderer import TARGETS
+
+METHODS = ("minmax", "lttb")
+
+
+def axes_pixels(ax, dpi: Optional[int] = None) -> int:
+    """Width of `ax` in pixels when saved at `dpi` (default: the download target)."""
+    width = ax.get_position().width * ax.figure.get_figwidth()
+    return max(1, int(width * (dpi or TARGETS["download"])))
+
+
+def minmax_indices(y, buckets: int) -> np.ndarray:
+    """Sorted indices of the first/min/max/last point of `buckets` equal slices (NaN gaps kept)."""
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if n <= buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    pad = rows * size - n
+    missing = np.isnan(y)
+    low = np.concatenate([np.where(missing, np.inf, y), np.full(pad, np.inf)]).reshape(rows, size)
+    high = np.concatenate([np.where(missing, -np.inf, y), np.full(pad, -np.inf)]).reshape(rows, size)
+    gaps = np.concatenate([missing, np.zeros(pad, dtype=bool)]).reshape(rows, size)
+    starts = np.arange(rows) * size
+    parts = [starts, starts + low.argmin(axis=1), starts + high.argmax(axis=1),
+             np.minimum(starts + size - 1, n - 1)]
+    has_gap = gaps.any(axis=1)
+    if has_gap.any():  # one NaN per bucket keeps the line broken where the data is
+        parts.append(starts[has_gap] + gaps[has_gap].argmax(axis=1))
+    return np.unique(np.concatenate(parts))
+
+
+def lttb_indices(y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over positions 0..n-1; returns `n_out` sorted indices."""
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # bucket i spans [edges[i], edges[i + 1]); the last point is its own bucket
+    edges = np.r_[(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1, n]
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    filled = np.where(np.isnan(y), np.nanmean(y) if (~np.isnan(y)).any() else 0.0, y)
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi, stop = edges[i], edges[i + 1], edges[i + 2]
+        cx, cy = (hi + stop - 1) / 2, filled[hi:stop].mean()
+        area = np.abs((a - cx) * (filled[lo:hi] - filled[a]) - (a - np.arange(lo, hi)) * (cy - filled[a]))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+
+def peak_indices(y, k: int = 10) -> np.ndarray:
+    """In each of `k` equal segments, the point farthest from the segment mean (its peak or trough)."""
+    y = np.asarray(y, dtype="float64")
+    n = len(y)
+    valid = ~np.isnan(y)
+    if n <= k:
+        return np.flatnonzero(valid)
+    size = -(-n // k)
+    starts = np.arange(0, n, size)
+    counts = np.add.reduceat(valid.astype("float64"), starts)
+    means = np.add.reduceat(np.where(valid, y, 0.0), starts) / np.maximum(counts, 1)
+    deviation = np.where(valid, np.abs(y - np.repeat(means, np.diff(np.r_[starts, n]))), -1.0)
+    deviation = np.r_[deviation, np.full(len(starts) * size - n, -1.0)].reshape(len(starts), size)
+    idx = starts + deviation.argmax(axis=1)
+    return idx[valid[idx]]
+
+
+def _take(values, idx):
+    return values.iloc[idx] if hasattr(values, "iloc") else np.asarray(values)[idx]
+
+
+def _is_text(x) -> bool:
+    kind = getattr(getattr(x, "dtype", None), "kind", None)
+    if kind is None:
+        x = np.asarray(x)
+        kind = x.dtype.kind
+        if kind == "O" and len(x):
+            return isinstance(x[0], str)
+    return kind in ("O", "U", "S", "T")
+
+
+class _LabelAxis(Formatter):
+    """
+    Positional string x for one axes: the label index, tick text, and the
+    artists drawn on it (moved when a later series re-sorts the index).
+    """
+
+    def __init__(self):
+        self.labels = pd.Index([], dtype=object)
+        self.artists = []
+
+    def __call__(self, value, pos=None):
+        i = int(round(value))
+        return str(self.labels[i]) if 0 <= i < len(self.labels) else ""
+
+    def positions(self, ax, labels: np.ndarray) -> np.ndarray:
+        seen = pd.Index(pd.unique(labels), dtype=object)
+        added = seen[self.labels.get_indexer(seen) < 0]
+        if len(added):
+            old = self.labels
+            self.labels = old.append(added)
+            # Ascending series (trade dates) share one sorted index; others keep first-seen order
+            if old.is_monotonic_increasing and seen.is_monotonic_increasing:
+                self.labels = self.labels.sort_values()
+                if len(old) and not self.labels[:len(old)].equals(old):
+                    self._move(ax, self.labels.get_indexer(old))
+        return self.labels.get_indexer(labels)
+
+    def _move(self, ax, mapping: np.ndarray):
+        """Re-place the artists drawn so far after the index was re-sorted (old position -> new)."""
+        def at(x):
+            return mapping[np.rint(x).astype(np.int64)]
+
+        for artist in self.artists:
+            if isinstance(artist, Line2D):
+                artist.set_xdata(at(np.asarray(artist.get_xdata(), dtype="float64")))
+            elif isinstance(artist, Rectangle):
+                w = artist.get_width()
+                artist.set_x(at(artist.get_x() + w / 2) - w / 2)
+            elif isinstance(artist, Annotation):
+                artist.xy = (at(artist.xy[0]), artist.xy[1])
+            elif isinstance(artist, PolyCollection):
+                artist.set_verts([np.column_stack([at(p.vertices[:, 0]), p.vertices[:, 1]]) for p in artist.get_paths()])
+        ax.relim()  # lines and bars; relim() skips collections
+        for artist in self.artists:
+            if isinstance(artist, PolyCollection):
+                for p in artist.get_paths():
+                    ax.update_datalim(p.vertices)
+        ax.autoscale_view()
+
+    def track(self, artists):
+        if isinstance(artists, (list, tuple, BarContainer)):
+            self.artists.extend(artists)
+        else:
+            self.artists.append(artists)
+        return artists
+
+
+def _x_for(ax, x, pixels: int):
+    """(x to draw, label axis to track the artists on); text x becomes shared positions."""
+    if not len(x) or not _is_text(x):
+        return x, None
+    labels = np.asarray(x).astype(str)
+    if isinstance(ax.xaxis.get_units(), UnitData):  # already categorical from a plain ax.plot
+        ax.xaxis.update_units(labels)  # every label gets its slot before a subset of them is drawn
+        if len(labels) > pixels:
+            ax.xaxis.set_major_locator(MaxNLocator(nbins=10, integer=True))
+        return labels, None
+    axis = ax.xaxis.get_major_formatter()
+    if not isinstance(axis, _LabelAxis):  # ax.clear() puts the default formatter back
+        axis = _LabelAxis()
+        ax.xaxis.set_major_formatter(axis)
+        ax.xaxis.set_major_locator(MaxNLocator(nbins=10, integer=True))
+    return axis.positions(ax, labels), axis
+
+
+def _track(axis, artists):
+    return axis.track(artists) if axis is not None else artists
+
+
+def plot_series(ax, x, y, *args, method: str = "minmax", pixels: Optional[int] = None, **kwargs):
+    """ax.plot(x, y, ...) drawing at most ~4 points per pixel of the axes width."""
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    pixels = pixels or axes_pixels(ax)
+    x, axis = _x_for(ax, x, pixels)
+    if len(y) <= pixels:
+        return _track(axis, ax.plot(x, y, *args, **kwargs))
+    idx = minmax_indices(y, pixels) if method == "minmax" else lttb_indices(y, pixels)
+    return _track(axis, ax.plot(_take(x, idx), _take(y, idx), *args, **kwargs))
+
+
+def bar_series(ax, x, y, pixels: Optional[int] = None, **kwargs):
+    """ax.bar(x, y, ...) below the pixel budget, else the per-bucket max as a stepped area."""
+    pixels = pixels or axes_pixels(ax)
+    n = len(y)
+    x, axis = _x_for(ax, x, pixels)
+    if n <= pixels:
+        return _track(axis, ax.bar(x, y, **kwargs))
+    starts = np.arange(0, n, -(-n // pixels))
+    peaks = np.fmax.reduceat(np.asarray(y, dtype="float64"), starts)
+    for key in ("width", "align", "bottom", "tick_label"):
+        kwargs.pop(key, None)
+    return _track(axis, ax.fill_between(_take(x, starts), 0, peaks, step="post", linewidth=0, **kwargs))
+
+
+def annotate_peaks(ax, x, y, k: int = 10, fmt: str = "{:.1f}", pixels: Optional[int] = None, **kwargs):
+    """Label the `k` points from peak_indices with their values; returns their indices."""
+    idx = peak_indices(y, k)
+    x, axis = _x_for(ax, x, pixels or axes_pixels(ax))
+    options = {"textcoords": "offset points", "xytext": (0, 10), "ha": "center", **kwargs}
+    for xi, yi in zip(_take(x, idx), _take(y, idx)):
+        _track(axis, ax.annotate(fmt.format(yi), (xi, yi), **options))
+    return idx
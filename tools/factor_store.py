@@ -0,0 +1,332 @@
+"""
+Precomputed cross-sectional factors over the local market store.
+
+A nightly stage runs after `market_store ingest` (and `ingest --api
+daily_basic` for valuation/turnover). It turns the stored snapshots into one
+factor row per (trade_date, ts_code), in the same day-partitioned Parquet
+layout under workspace/market/factors/:
+
+    python -m tools.factor_store build                    # stored days not factored yet
+    python -m tools.factor_store build --start 20200101 --force
+    python -m tools.factor_store info
+
+Screens then filter one small file per day instead of fetching and joining
+interfaces per symbol at query time (`FACTORS` in the preamble):
+
+    FACTORS.screen("pe_ttm < 15 and ret_20 > 10", sort_by="ret_20", top=50)
+    FACTORS.screen(pe_ttm=(0, 15), ret_20=(10, None))
+    FACTORS.history(ts_code='600519.SH', start_date='20240101')
+
+Returns compound pct_chg, which Tushare computes against the ex-rights
+pre_close, so they are adjusted for dividends and splits. Moving averages
+use that adjusted series, expressed in the day's own price level (qfq
+anchored at the day itself), so `close > ma_20` compares like with like.
+"""
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from .market_store import MARKET_DIR, MarketStore
+
+FACTOR_DIR = os.path.join(MARKET_DIR, "factors")
+
+RETURN_WINDOWS = (5, 20, 60, 120, 250)
+VOLATILITY_WINDOWS = (20, 60)
+MA_WINDOWS = (5, 10, 20, 60)
+AVERAGE_WINDOW = 20
+# Trading days of history needed before the first day being computed
+LOOKBACK = max(RETURN_WINDOWS + VOLATILITY_WINDOWS + MA_WINDOWS + (AVERAGE_WINDOW,))
+# Days computed per pass of a backfill (bounds the size of the dates x symbols matrices)
+BLOCK_DAYS = 250
+PERIODS_PER_YEAR = 252
+
+DAILY_COLUMNS = ("close", "pct_chg", "amount")
+BASIC_COLUMNS = ("turnover_rate", "volume_ratio", "pe", "pe_ttm", "pb", "ps_ttm", "dv_ttm", "total_mv", "circ_mv")
+FACTOR_COLUMNS = (
+    ("close", "pct_chg", "amount")
+    + tuple(f"ret_{n}" for n in RETURN_WINDOWS)
+    + tuple(f"vol_{n}" for n in VOLATILITY_WINDOWS)
+    + tuple(f"ma_{n}" for n in MA_WINDOWS)
+    + (f"amount_{AVERAGE_WINDOW}", f"turnover_{AVERAGE_WINDOW}")
+    + BASIC_COLUMNS
+)
+CACHED_DAYS = 8
+
+
+def _panels(store: MarketStore, days: Sequence[str], columns: Sequence[str], codes=None):
+    """
+    {column: (days x symbols) float64 matrix} from the stored snapshots of
+    `days`, NaN where a symbol has no row; symbols are `codes` (sorted) or
+    every ts_code present.
+    """
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    from .market_query import MarketQuery
+
+    present = [d for d in days if store.has(d)]
+    table = None
+    if present:
+        dataset = MarketQuery(store).dataset(present)
+        table = dataset.to_table(columns=["ts_code", "trade_date"] + [c for c in columns if c in dataset.schema.names])
+    if codes is None:
+        uniques = pc.unique(table["ts_code"]).to_numpy(zero_copy_only=False) if table is not None else []
+        codes = pd.Index(np.sort(np.asarray(uniques, dtype=object)))
+    out = {c: np.full((len(days), len(codes)), np.nan) for c in columns}
+    if table is None:
+        return codes, out
+    # positions looked up inside Arrow: no per-row Python strings are created
+    rows = pc.index_in(table["trade_date"], value_set=pa.array(list(days), pa.string())).fill_null(-1)
+    cols = pc.index_in(table["ts_code"], value_set=pa.array(list(codes), pa.string())).fill_null(-1)
+    rows, cols = rows.to_numpy(), cols.to_numpy()
+    keep = (rows >= 0) & (cols >= 0)
+    for column in columns:
+        if column in table.column_names:
+            values = table[column].cast(pa.float64()).to_numpy()
+            out[column][rows[keep], cols[keep]] = values[keep]
+    return codes, out
+
+
+def _lagged(values, n: int, fill=None):
+    """values[t - n] aligned to row t (`fill`, default NaN/False, for t < n)."""
+    import numpy as np
+
+    if fill is None:
+        fill = np.nan if values.dtype.kind == "f" else False
+    out = np.full_like(values, fill)
+    out[n:] = values[:-n]
+    return out
+
+
+def _window_sums(values, n: int):
+    """Per-column sums of the finite values, their squares and their count over the last n rows."""
+    import numpy as np
+
+    valid = np.isfinite(values)
+    x = np.where(valid, values, 0.0)
+    sums = []
+    for v in (x, x * x, valid.astype("float64")):
+        total = np.cumsum(v, axis=0)
+        sums.append(total - _lagged(total, n, 0.0))
+    return sums
+
+
+def _rolling_mean(values, n: int, min_periods: int):
+    import numpy as np
+
+    total, _, count = _window_sums(values, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count >= min_periods, total / count, np.nan)
+
+
+def _rolling_std(values, n: int, min_periods: int):
+    """Sample std over the last n rows, NaN rows skipped."""
+    import numpy as np
+
+    total, squares, count = _window_sums(values, n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = (squares - total * total / count) / (count - 1)
+        return np.where(count >= max(2, min_periods), np.sqrt(np.clip(var, 0.0, None)), np.nan)
+
+
+def compute_factors(daily: Dict, basic: Dict):
+    """
+    Price/liquidity factor matrices (days x symbols) from aligned panels of
+    daily bars and daily_basic turnover (`build` adds the day's valuation
+    columns as stored).
+
+    ret_N    % return over the last N trading days (needs a bar N days back)
+    vol_N    annualized std of pct_chg over N days (suspended days skipped)
+    ma_N     N-day moving average of the adjusted close, at today's price level
+    amount_20 / turnover_20  average amount (千元) / turnover_rate over 20 days
+    """
+    import numpy as np
+
+    close, pct = daily["close"], daily["pct_chg"]
+    traded = np.isfinite(close)
+    listed = np.maximum.accumulate(traded, axis=0)
+    with np.errstate(invalid="ignore"):
+        log_ret = np.where(traded & np.isfinite(pct), np.log1p(pct / 100.0), 0.0)
+    cum = np.cumsum(log_ret, axis=0)
+
+    factors = {"close": close, "pct_chg": pct, "amount": daily["amount"]}
+    for n in RETURN_WINDOWS:
+        ret = (np.exp(cum - _lagged(cum, n)) - 1.0) * 100.0
+        factors[f"ret_{n}"] = np.where(_lagged(listed, n), ret, np.nan)
+    for n in VOLATILITY_WINDOWS:
+        std = _rolling_std(np.where(traded, pct, np.nan), n, n * 3 // 4)
+        factors[f"vol_{n}"] = std * np.sqrt(PERIODS_PER_YEAR)
+    # adjusted level (1.0 at the window start, flat through suspensions)
+    level = np.exp(cum)
+    for n in MA_WINDOWS:
+        mean = _rolling_mean(level, n, n)
+        factors[f"ma_{n}"] = np.where(_lagged(listed, n - 1) if n > 1 else listed, mean / level * close, np.nan)
+    half = max(1, AVERAGE_WINDOW // 2)
+    factors[f"amount_{AVERAGE_WINDOW}"] = _rolling_mean(daily["amount"], AVERAGE_WINDOW, half)
+    factors[f"turnover_{AVERAGE_WINDOW}"] = _rolling_mean(basic["turnover_rate"], AVERAGE_WINDOW, half)
+    return factors
+
+
+class FactorStore:
+    """Day-partitioned factor table plus a screener over it."""
+
+    def __init__(self, market: Optional[MarketStore] = None, basic: Optional[MarketStore] = None,
+                 root: Optional[str] = None):
+        self.market = market or MarketStore()
+        parent = os.path.dirname(self.market.root)
+        self.basic = basic or MarketStore(os.path.join(parent, "daily_basic"))
+        self.store = MarketStore(root or os.path.join(parent, "factors"))
+        self._frames: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def dates(self) -> List[str]:
+        return self.store.dates()
+
+    def build(self, start_date: Optional[str] = None, end_date: Optional[str] = None, force: bool = False,
+              progress=print) -> Dict:
+        """
+        Compute factors for stored market days in range that have none yet
+        (all of them with `force`). Each block of BLOCK_DAYS days loads
+        LOOKBACK extra days of history once and computes every factor as
+        whole-matrix operations.
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        days = self.market.dates()
+        selected = [d for d in days if (not start_date or d >= start_date) and (not end_date or d <= end_date)]
+        todo = [d for d in selected if force or not self.store.has(d)]
+        result = {"days": len(selected), "skipped": len(selected) - len(todo), "written": 0, "rows": 0,
+                  "seconds": 0.0}
+        progress(f"[factors] {len(selected)} market days, {result['skipped']} already factored, {len(todo)} to build")
+        t0 = time.perf_counter()
+        position = {d: i for i, d in enumerate(days)}
+        for b in range(0, len(todo), BLOCK_DAYS):
+            block = todo[b:b + BLOCK_DAYS]
+            window = days[max(0, position[block[0]] - LOOKBACK):position[block[-1]] + 1]
+            codes, daily = _panels(self.market, window, DAILY_COLUMNS)
+            # only turnover needs history; valuation columns are read for the block's own days
+            _, basic = _panels(self.basic, window, ("turnover_rate",), codes)
+            _, valuation = _panels(self.basic, block, BASIC_COLUMNS, codes)
+            factors = compute_factors(daily, basic)
+            row_of = {d: i for i, d in enumerate(window)}
+            block_row = {d: i for i, d in enumerate(block)}
+            names = pa.array(codes.to_numpy(dtype=object), pa.string())
+            for day in block:
+                i = row_of[day]
+                mask = np.isfinite(daily["close"][i])
+                values = {c: factors[c][i][mask] for c in FACTOR_COLUMNS if c not in BASIC_COLUMNS}
+                values.update({c: valuation[c][block_row[day]][mask] for c in BASIC_COLUMNS})
+                table = pa.table({"ts_code": names.filter(mask), **{c: values[c] for c in FACTOR_COLUMNS}})
+                result["rows"] += self.store.write_day(day, table)
+                result["written"] += 1
+            progress(f"[factors] {min(b + BLOCK_DAYS, len(todo))}/{len(todo)} days built")
+        result["seconds"] = round(time.perf_counter() - t0, 3)
+        return result
+
+    def _latest(self) -> str:
+        dates = self.dates()
+        if not dates:
+            raise RuntimeError("the factor store is empty; run `python -m tools.factor_store build` first")
+        return dates[-1]
+
+    def frame(self, trade_date: Optional[str] = None):
+        """All factor rows of one day (default: the latest), cached in memory until the file changes."""
+        import pyarrow.parquet as pq
+
+        day = trade_date or self._latest()
+        path = self.store.partition_path(day)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            raise KeyError(f"no factors stored for {day}; stored days end at {self._latest()}") from None
+        with self._lock:
+            cached = self._frames.get(day)
+            if cached and cached[0] == mtime:
+                self._frames.move_to_end(day)
+                return cached[1]
+        df = pq.read_table(path).to_pandas()
+        df["ts_code"] = df["ts_code"].astype(str)
+        df.insert(1, "trade_date", day)
+        with self._lock:
+            self._frames[day] = (mtime, df)
+            while len(self._frames) > CACHED_DAYS:
+                self._frames.popitem(last=False)
+        return df
+
+    def screen(self, where=None, trade_date: Optional[str] = None, columns: Optional[Sequence[str]] = None,
+               sort_by: Optional[str] = None, ascending: bool = False, top: Optional[int] = None, **ranges):
+        """
+        Symbols of one day (default: the latest factored day) matching every
+        condition. `where` is a pandas query string ("pe_ttm < 15 and
+        ret_20 > 10", columns may be compared with each other: "close >
+        ma_20"); each keyword is an inclusive (low, high) range with None for
+        an open end, e.g. pe_ttm=(0, 15). Returns ts_code, trade_date and
+        `columns` (default: all factors), sorted by `sort_by` and cut to `top`.
+        """
+        import numpy as np
+
+        df = self.frame(trade_date)
+        unknown = [c for c in list(ranges) + list(columns or []) + [sort_by] if c and c not in df.columns]
+        if unknown:
+            raise KeyError(f"unknown factor(s) {unknown}; available: {list(FACTOR_COLUMNS)}")
+        mask = np.ones(len(df), dtype=bool)
+        for column, (low, high) in ranges.items():
+            values = df[column].to_numpy()
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        out = df[mask]
+        if where is not None:
+            out = out.query(where)
+        if sort_by:
+            out = out.sort_values(sort_by, ascending=ascending, na_position="last")
+        if columns:
+            out = out[["ts_code", "trade_date"] + [c for c in columns if c not in ("ts_code", "trade_date")]]
+        out = out.reset_index(drop=True)
+        return out.head(top) if top else out
+
+    def history(self, columns: Optional[Sequence[str]] = None, start_date: Optional[str] = None,
+                end_date: Optional[str] = None, ts_code=None, where=None):
+        """
+        Factor rows over a date range, indexed by (trade_date, ts_code).
+        `where` is a pyarrow expression (`field('pe_ttm') < 15`) evaluated
+        inside the scan, like QUERY.scan.
+        """
+        from .market_query import MarketQuery
+
+        df = MarketQuery(self.store).scan(columns, start_date, end_date, ts_code=ts_code, where=where)
+        return df.set_index(["trade_date", "ts_code"]).sort_index()
+
+    def info(self) -> Dict:
+        return {**self.store.info(), "market_last": (self.market.dates() or [None])[-1],
+                "basic_days": len(self.basic.dates())}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Precomputed cross-sectional factors over the market store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_build = sub.add_parser("build", help="compute factors for stored days not factored yet")
+    p_build.add_argument("--start", help="YYYYMMDD; default: every stored market day")
+    p_build.add_argument("--end", help="YYYYMMDD")
+    p_build.add_argument("--force", action="store_true", help="recompute days already built")
+    sub.add_parser("info", help="show what the factor store holds")
+    args = parser.parse_args(argv)
+
+    factors = FactorStore()
+    if args.command == "info":
+        print(factors.info())
+        return
+    result = factors.build(args.start, args.end, force=args.force)
+    print(f"[factors] written={result['written']} rows={result['rows']} skipped={result['skipped']} "
+          f"seconds={result['seconds']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Memory-lean dtypes for frames returned by Tushare.
+
+`pro.*` results arrive as object columns (ts_code, YYYYMMDD date strings)
+and float64 numbers; a whole-market history then spends most of its memory
+on Python string objects. `normalize_frame` converts a frame once, right
+after the fetch, following a per-interface policy derived from the
+`output_columns` types in knowledge_base/tushare_schema.json:
+
+    ts_code / *_code           -> unchanged at "lean"; sorted ordered category at
+                                  "compact" (Arrow: dictionary<int32, string>)
+    date columns (YYYYMMDD)    -> datetime64, or int32 with dates="int32"
+    other str columns          -> category when at most half the values are distinct
+    float columns              -> float64; float32 at level "compact"/"arrow"
+                                  when every value is below FLOAT32_MAX_ABS
+
+Levels: "off" (unchanged), "lean" (dates and text; codes stay strings so
+range comparisons like `ts_code > '000500.SZ'` keep working, floats stay
+float64 so exported numbers print exactly), "compact" (lean + float32), "arrow"
+(compact with pandas ArrowDtype columns). `LeanPro` wraps a pro client so
+every call is normalized; the executor preamble applies it with the level
+from FINDATA_DTYPE_POLICY (default "lean") to `pro` and to the local readers
+(MARKET, QUERY, FACTORS, REF), so all of them hand out the same dtypes.
+"""
+import json
+import os
+import threading
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
+SCHEMA_PATH = os.path.join(ROOT_DIR, "knowledge_base", "tushare_schema.json")
+
+LEVELS = ("off", "lean", "compact", "arrow")
+DEFAULT_LEVEL = os.getenv("FINDATA_DTYPE_POLICY", "lean").strip().lower()
+
+# Column names that hold YYYYMMDD dates in interfaces the schema does not describe
+DATE_COLUMNS = {"trade_date", "cal_date", "pretrade_date", "ann_date", "f_ann_date", "end_date", "date",
+                "list_date", "delist_date", "ex_date", "record_date", "pay_date", "div_listdate", "imp_ann_date"}
+# float32 keeps 2-decimal prices and 4-decimal ratios exact (after rounding) below 2**15
+FLOAT32_MAX_ABS = 2.0 ** 15
+
+
+@lru_cache(maxsize=4)
+def load_policies(path: str = SCHEMA_PATH) -> Dict[str, Dict[str, str]]:
+    """interface name (without "pro.") -> {column: kind}, kind in code/date/str/float/int."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    policies = {}
+    for entry in entries:
+        name = str(entry.get("function_name", "")).split(".")[-1]
+        time_field = entry.get("time_field")
+        kinds = {}
+        for col in entry.get("output_columns", []):
+            kinds[col["name"]] = _kind(col["name"], col.get("type", "str"), time_field)
+        if name:
+            policies[name] = kinds
+    return policies
+
+
+def _kind(column: str, declared: str, time_field: Optional[str] = None) -> str:
+    if declared == "float":
+        return "float"
+    if declared == "int":
+        return "int"
+    if column == "ts_code" or column.endswith("_code"):
+        return "code"
+    if column == time_field or column in DATE_COLUMNS:
+        return "date"
+    return "str"
+
+
+def _inferred_kinds(df) -> Dict[str, str]:
+    """Kinds for an interface missing from the schema, from column names and dtypes."""
+    kinds = {}
+    for column, dtype in df.dtypes.items():
+        if dtype.kind == "f":
+            kinds[column] = "float"
+        elif dtype.kind in "iu":
+            kinds[column] = "int"
+        elif _is_text_dtype(dtype):
+            kinds[column] = _kind(column, "str")
+    return kinds
+
+
+def _is_text_dtype(dtype) -> bool:
+    import pandas as pd
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+
+def _convert_date(series, dates: str, arrow: bool):
+    import pandas as pd
+
+    parsed = pd.to_datetime(series, format="%Y%m%d", errors="coerce")
+    if parsed.isna().sum() != series.isna().sum():
+        return None  # quarters ("2020Q1"), months ("202001"), free text: leave alone
+    if dates == "int32":
+        values = parsed.dt.year * 10000 + parsed.dt.month * 100 + parsed.dt.day
+        return values.astype("Int32" if values.isna().any() else "int32")
+    if arrow:
+        import pyarrow as pa
+        return parsed.astype(pd.ArrowDtype(pa.date32()))
+    return parsed
+
+
+def _convert_float(series, level: str):
+    import numpy as np
+    import pandas as pd
+
+    values = series if series.dtype.kind == "f" else pd.to_numeric(series, errors="coerce")
+    values = values.astype("float64", copy=False)
+    if level in ("compact", "arrow"):
+        peak = np.nanmax(np.abs(values.to_numpy())) if len(values) and values.notna().any() else 0.0
+        if peak < FLOAT32_MAX_ABS:
+            values = values.astype("float32")
+    if level == "arrow":
+        import pyarrow as pa
+        return values.astype(pd.ArrowDtype(pa.float32() if values.dtype == "float32" else pa.float64()))
+    return values
+
+
+_shared_dtypes: Dict[str, object] = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_code_dtype(column: str, series):
+    """
+    One ordered CategoricalDtype per code column, shared by every frame
+    converted in this process: per-call frames then carry no categories of
+    their own and concatenate as categorical directly. Categories stay
+    sorted (new codes are merged in, not appended), so sort_values, groupby,
+    min/max and range comparisons on ts_code order like the strings do.
+    """
+    import pandas as pd
+
+    with _shared_lock:
+        dtype = _shared_dtypes.get(column)
+        uniques = pd.Index(series.dropna().unique())
+        if dtype is not None:
+            missing = uniques[dtype.categories.get_indexer(uniques) < 0]
+            if len(missing):
+                dtype = pd.CategoricalDtype(dtype.categories.append(missing).sort_values(), ordered=True)
+        else:
+            dtype = pd.CategoricalDtype(uniques.sort_values(), ordered=True)
+        _shared_dtypes[column] = dtype
+        return dtype
+
+
+def _convert_text(series, kind: str, level: str):
+    import pandas as pd
+
+    arrow = level == "arrow"
+    if kind == "code" and level == "lean":
+        return None
+
+    if kind == "str" and series.nunique(dropna=True) * 2 > len(series):
+        if arrow:
+            import pyarrow as pa
+            return series.astype(pd.ArrowDtype(pa.string()))
+        return None
+    if arrow:
+        import pyarrow as pa
+        return series.astype(pd.ArrowDtype(pa.dictionary(pa.int32(), pa.string())))
+    if kind == "code":
+        return series.astype(_shared_code_dtype(series.name, series))
+    return series.astype("category")
+
+
+def normalize_frame(df, interface: Optional[str] = None, level: Optional[str] = None, dates: str = "datetime"):
+    """
+    Return `df` with lean dtypes (a new frame; the input is not modified).
+
+    `interface` is the Tushare api name ("daily" or "pro.daily") used to look
+    up the schema policy; unknown interfaces fall back to name/dtype rules.
+    `dates` is "datetime" (datetime64) or "int32" (YYYYMMDD as integers).
+    """
+    import pandas as pd
+
+    level = (level or DEFAULT_LEVEL).lower()
+    if level not in LEVELS:
+        raise ValueError(f"level must be one of {LEVELS}, got {level!r}")
+    if level == "off" or not isinstance(df, pd.DataFrame) or df.empty:
+        return df
+    if level == "arrow":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            level = "compact"
+    arrow = level == "arrow"
+
+    policy = load_policies().get(str(interface or "").split(".")[-1]) or {}
+    kinds = {**_inferred_kinds(df), **{c: k for c, k in policy.items() if c in df.columns}}
+    converted = {}
+    for column, kind in kinds.items():
+        series = df[column]
+        if kind == "float":
+            new = _convert_float(series, level)
+        elif kind == "int":
+            new = pd.to_numeric(series, errors="coerce") if _is_text_dtype(series.dtype) else None
+        elif not _is_text_dtype(series.dtype):
+            new = None
+        elif kind == "date":
+            new = _convert_date(series, dates, arrow)
+        else:
+            new = _convert_text(series, kind, level)
+        if new is not None:
+            converted[column] = new
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+
+def concat_frames(frames, ignore_index: bool = True):
+    """
+    pd.concat that keeps category columns categorical: per-call frames (e.g.
+    one pro.daily per trade_date) have different category sets, for which
+    plain concat falls back to object strings.
+    """
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    categorical = [c for c, dtype in frames[0].dtypes.items()
+                   if isinstance(dtype, pd.CategoricalDtype)
+                   and all(c in f.columns and isinstance(f[c].dtype, pd.CategoricalDtype) for f in frames)]
+    if not categorical:
+        return pd.concat(frames, ignore_index=ignore_index)
+    # union_categoricals recodes without materializing each frame in the unified dtype;
+    # ordered code columns converted before a later extension get the sorted union
+    merged = {}
+    for c in categorical:
+        parts = [f[c] for f in frames]
+        if all(p.cat.ordered for p in parts):
+            merged[c] = union_categoricals(parts, sort_categories=True, ignore_order=True).as_ordered()
+        else:
+            merged[c] = union_categoricals(parts, ignore_order=True)
+    out = pd.concat([f.drop(columns=categorical) for f in frames], ignore_index=ignore_index)
+    for c in categorical:
+        out[c] = merged[c]
+    return out[list(frames[0].columns) + [c for c in out.columns if c not in frames[0].columns]]
+
+
+def _api_value(value):
+    """Dates taken from a normalized frame go back to Tushare as YYYYMMDD strings."""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y%m%d")
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()  # numpy scalars (e.g. an int32 date)
+    return value
+
+
+class LeanPro:
+    """
+    Proxy for a Tushare pro client whose calls return `normalize_frame`d
+    results: `pro.daily(...)`, `pro.query('daily', ...)` and any other api.
+    Also wraps the local readers (`MARKET.daily`, `QUERY.scan`,
+    `FACTORS.screen`, ...) and DataFrame attributes such as `REF.stock_basic`;
+    the method or attribute name is the interface looked up in the schema.
+    """
+
+    def __init__(self, pro, level: Optional[str] = None, dates: str = "datetime"):
+        self._pro = pro
+        self._level = level or DEFAULT_LEVEL
+        self._dates = dates
+        self._frames: Dict[str, tuple] = {}
+
+    @classmethod
+    def wrap(cls, pro, level: Optional[str] = None):
+        """`pro` itself when there is no client or the policy is "off"."""
+        level = (level or DEFAULT_LEVEL).lower()
+        if pro is None or level == "off" or isinstance(pro, cls):
+            return pro
+        return cls(pro, level)
+
+    def _call(self, interface: str, fn, args, kwargs):
+        kwargs = {k: _api_value(v) for k, v in kwargs.items()}
+        return normalize_frame(fn(*args, **kwargs), interface, self._level, self._dates)
+
+    def query(self, api_name: str, *args, **kwargs):
+        return self._call(api_name, self._pro.query, (api_name,) + args, kwargs)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._pro, name)
+        if name.startswith("_"):
+            return attr
+        if callable(attr):
+            return lambda *args, **kwargs: self._call(name, attr, args, kwargs)
+        cached = self._frames.get(name)
+        if cached is None or cached[0] is not attr:  # normalize a frame attribute once
+            cached = self._frames[name] = (attr, normalize_frame(attr, name, self._level, self._dates))
+        return cached[1]
+
+    def __repr__(self):
+        return f"LeanPro({self._pro!r}, level={self._level!r})"
@@ -0,0 +1,181 @@
+"""
+Pushed-down queries over the local market store (tools/market_store.py).
+
+Generated scripts get `QUERY = MarketQuery(MARKET)` from the preamble, so
+filters and aggregations run inside the Parquet scan instead of on frames
+loaded into pandas first:
+
+    partition pruning   start_date/end_date/trade_date (and `days`) open only
+                        the matching trade_date=YYYYMMDD partitions
+    predicate pushdown  `ts_code` and `where` filters are evaluated by the
+                        scanner; ts_code filters skip row groups by their
+                        min/max statistics
+    projection          only the requested columns are decoded
+
+`QUERY.sql(...)` runs DuckDB over the same files (view `daily`, with the
+partition column trade_date as VARCHAR), which applies the same pushdowns:
+
+    QUERY.sql('''
+        SELECT ts_code, arg_max(close, trade_date) / arg_min(close, trade_date) - 1 AS ret
+        FROM daily WHERE trade_date >= '20240101'
+        GROUP BY ts_code ORDER BY ret DESC LIMIT 20''')
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .market_store import PARTITION_PREFIX, PART_NAME, MarketStore
+
+
+def field(name: str):
+    """pyarrow.dataset.field, for `where=` expressions: field('pct_chg') > 9.5."""
+    import pyarrow.dataset as ds
+    return ds.field(name)
+
+
+def _duckdb():
+    """duckdb, imported on first use; None when not installed."""
+    try:
+        import duckdb
+        return duckdb
+    except ImportError:
+        return None
+
+
+class MarketQuery:
+    """Scanner/SQL front end for a `MarketStore`."""
+
+    def __init__(self, store: Optional[MarketStore] = None):
+        self.store = store or MarketStore()
+
+    def days(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             trade_date: Optional[str] = None, days: Optional[int] = None) -> List[str]:
+        """Stored trading days in the range; `days` keeps the last N of them."""
+        start, end = (trade_date, trade_date) if trade_date else (start_date, end_date)
+        selected = [d for d in self.store.dates() if (not start or d >= start) and (not end or d <= end)]
+        return selected[-days:] if days else selected
+
+    def dataset(self, days: Sequence[str]):
+        """pyarrow dataset over the given day partitions only, ts_code read as plain strings."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        paths = [self.store.partition_path(d) for d in days]
+        partitioning = ds.partitioning(pa.schema([("trade_date", pa.string())]), flavor="hive")
+        first = ds.dataset(paths[0], format="parquet").schema
+        fields = [pa.field("ts_code", pa.string())] + [f for f in first if f.name not in ("ts_code", "trade_date")]
+        return ds.dataset(paths, format="parquet", partitioning=partitioning, partition_base_dir=self.store.root,
+                          schema=pa.schema(fields + [pa.field("trade_date", pa.string())]))
+
+    @staticmethod
+    def _filter(ts_code, where):
+        import pyarrow.dataset as ds
+
+        flt = where
+        if ts_code:
+            codes = [c.strip() for c in ts_code.split(",") if c.strip()] if isinstance(ts_code, str) else list(ts_code)
+            code_filter = ds.field("ts_code") == codes[0] if len(codes) == 1 else ds.field("ts_code").isin(codes)
+            flt = code_filter if flt is None else code_filter & flt
+        return flt
+
+    def table(self, columns: Optional[Iterable[str]] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None, trade_date: Optional[str] = None, days: Optional[int] = None,
+              ts_code=None, where=None):
+        """Arrow table of the matching rows; None when no stored day is in range."""
+        selected = self.days(start_date, end_date, trade_date, days)
+        if not selected:
+            return None
+        dataset = self.dataset(selected)
+        cols = None
+        if columns:
+            cols = list(dict.fromkeys(["ts_code", "trade_date"] + [c for c in columns if c in dataset.schema.names]))
+        return dataset.to_table(columns=cols, filter=self._filter(ts_code, where))
+
+    def scan(self, columns: Optional[Iterable[str]] = None, start_date: Optional[str] = None,
+             end_date: Optional[str] = None, trade_date: Optional[str] = None, days: Optional[int] = None,
+             ts_code=None, where=None):
+        """
+        DataFrame of the matching rows (ts_code, trade_date first).
+
+        `where` is a pyarrow expression built with `field`, e.g.
+        `(field('pct_chg') > 9.5) & (field('amount') > 1e6)`.
+        """
+        import pandas as pd
+
+        table = self.table(columns, start_date, end_date, trade_date, days, ts_code, where)
+        if table is None:
+            return pd.DataFrame(columns=["ts_code", "trade_date"] + [c for c in columns or [] if c not in
+                                                                     ("ts_code", "trade_date")])
+        df = table.to_pandas()
+        return df[["ts_code", "trade_date"] + [c for c in df.columns if c not in ("ts_code", "trade_date")]]
+
+    def aggregate(self, aggs: Dict[str, Tuple[str, str]], by: Sequence[str] = ("ts_code",),
+                  start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  trade_date: Optional[str] = None, days: Optional[int] = None, ts_code=None, where=None):
+        """
+        Grouped aggregation inside Arrow: `aggs` maps output names to
+        (column, function), function being an Arrow hash aggregate such as
+        sum, mean, min, max, count, stddev. Returns one row per `by` group.
+        """
+        import pandas as pd
+
+        by = [by] if isinstance(by, str) else list(by)
+        columns = list(dict.fromkeys(by + [col for col, _ in aggs.values()]))
+        table = self.table(columns, start_date, end_date, trade_date, days, ts_code, where)
+        if table is None or table.num_rows == 0:
+            return pd.DataFrame(columns=by + list(aggs))
+        result = table.group_by(by).aggregate([(col, fn) for col, fn in aggs.values()])
+        names = {f"{col}_{fn}": name for name, (col, fn) in aggs.items()}
+        return result.rename_columns([names.get(c, c) for c in result.column_names]).to_pandas()[by + list(aggs)]
+
+    def period_return(self, days: Optional[int] = None, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None, top: Optional[int] = None, ascending: bool = False,
+                      ts_code=None, where=None):
+        """
+        Close-to-close return per ts_code over a window, e.g. days=60 for the
+        60-day return ending at the last stored day (end_date). Reads only
+        ts_code/trade_date/close of the window's partitions; the return runs
+        from each symbol's first to last close inside the window, so
+        suspensions do not drop it. Sorted by return_pct, `top` rows kept.
+        """
+        import pandas as pd
+        import pyarrow.compute as pc
+
+        window = self.days(start_date, end_date, days=days + 1 if days else None)
+        empty = pd.DataFrame(columns=["ts_code", "start_date", "end_date", "start_close", "end_close", "return_pct"])
+        if not window:
+            return empty
+        table = self.table(["close"], window[0], window[-1], ts_code=ts_code, where=where)
+        if table is None or table.num_rows == 0:
+            return empty
+        table = table.sort_by([("ts_code", "ascending"), ("trade_date", "ascending")])
+        grouped = table.group_by("ts_code", use_threads=False).aggregate([
+            ("trade_date", "min"), ("trade_date", "max"), ("close", "first"), ("close", "last")])
+        ret = pc.multiply(pc.subtract(pc.divide(grouped["close_last"], grouped["close_first"]), 1.0), 100.0)
+        df = pd.DataFrame({
+            "ts_code": grouped["ts_code"].to_pandas(),
+            "start_date": grouped["trade_date_min"].to_pandas(),
+            "end_date": grouped["trade_date_max"].to_pandas(),
+            "start_close": grouped["close_first"].to_pandas(),
+            "end_close": grouped["close_last"].to_pandas(),
+            "return_pct": ret.to_pandas(),
+        })
+        df = df.sort_values("return_pct", ascending=ascending, na_position="last").reset_index(drop=True)
+        return df.head(top) if top else df
+
+    def sql(self, query: str):
+        """
+        Run DuckDB SQL against the view `daily` (every stored day; filter on
+        trade_date for partition pruning). Returns a DataFrame.
+        """
+        duckdb = _duckdb()
+        if duckdb is None:
+            raise RuntimeError("QUERY.sql needs the duckdb package; use QUERY.scan/aggregate/period_return instead")
+        if not self.store.dates():
+            raise RuntimeError("the market store is empty; run `python -m tools.market_store ingest` first")
+        pattern = f"{self.store.root}/{PARTITION_PREFIX}*/{PART_NAME}".replace("'", "''")
+        con = duckdb.connect()
+        try:
+            con.execute(f"CREATE VIEW daily AS SELECT * FROM read_parquet('{pattern}', hive_partitioning = true, "
+                        "hive_types = {'trade_date': VARCHAR})")
+            return con.execute(query).df()
+        finally:
+            con.close()
@@ -0,0 +1,259 @@
+"""
+Local whole-market daily store for cross-sectional questions (top gainers,
+breadth, turnover ranking) without per-symbol API calls.
+
+`pro.daily(trade_date=...)` snapshots are stored one Parquet file per
+trading day under workspace/market/daily/trade_date=YYYYMMDD/ (hive
+layout), sorted by ts_code in small row groups. Writes are atomic per day, so
+reruns only fill in missing days:
+
+    python -m tools.market_store ingest                 # catch up to today (cron-friendly)
+    python -m tools.market_store ingest --start 20200101 --workers 4 --rate 300
+    python -m tools.market_store info
+    python -m tools.market_store ingest --api daily_basic   # valuation/turnover snapshots
+
+`--api daily_basic` keeps `pro.daily_basic(trade_date=...)` snapshots in the
+same layout under workspace/market/daily_basic/ (input of tools/factor_store).
+Generated scripts read the daily bars through `MARKET.daily(...)` from the
+preamble.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
+MARKET_DIR = os.path.join(ROOT_DIR, "workspace", "market")
+STORE_DIR = os.path.join(MARKET_DIR, "daily")
+# Whole-market snapshot interfaces that can be stored (one directory each under MARKET_DIR)
+APIS = ("daily", "daily_basic")
+
+PARTITION_PREFIX = "trade_date="
+PART_NAME = "part-0.parquet"
+# Rows per row group; days are sorted by ts_code, so a ts_code filter skips most groups
+ROW_GROUP_ROWS = 2048
+# Tushare's per-minute quota for pro.daily depends on the account's points
+DEFAULT_RATE = float(os.getenv("FINDATA_TUSHARE_RATE", "200"))
+MAX_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """Thread-safe token bucket: at most `rate` calls per `per` seconds, bursts up to `rate`."""
+
+    def __init__(self, rate: float, per: float = 60.0):
+        self.rate = rate
+        self.per = per
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.per)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) * self.per / self.rate
+            time.sleep(wait)
+
+
+class MarketStore:
+    """Date-partitioned Parquet store of whole-market daily bars."""
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+
+    def partition_path(self, trade_date: str) -> str:
+        return os.path.join(self.root, f"{PARTITION_PREFIX}{trade_date}", PART_NAME)
+
+    def dates(self) -> List[str]:
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return []
+        return sorted(n[len(PARTITION_PREFIX):] for n in names
+                      if n.startswith(PARTITION_PREFIX) and os.path.exists(os.path.join(self.root, n, PART_NAME)))
+
+    def has(self, trade_date: str) -> bool:
+        return os.path.exists(self.partition_path(trade_date))
+
+    def write_day(self, trade_date: str, df) -> int:
+        """Replace one day's partition atomically (`df` a DataFrame or an Arrow table); returns the row count."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if isinstance(df, pa.Table):
+            table = df.drop_columns([c for c in ["trade_date"] if c in df.column_names]).sort_by("ts_code")
+        else:
+            df = df.drop(columns=["trade_date"], errors="ignore").sort_values("ts_code")
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        # Plain string type (Parquet still dictionary-encodes the pages): row-group
+        # min/max statistics on ts_code are then usable for pruning ts_code filters
+        table = table.set_column(table.schema.get_field_index("ts_code"), "ts_code",
+                                 table.column("ts_code").cast(pa.string()))
+        path = self.partition_path(trade_date)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".part.", suffix=".tmp", dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp, compression="zstd", row_group_size=ROW_GROUP_ROWS)
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return table.num_rows
+
+    def table(self, trade_date: Optional[str] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None, ts_code: Optional[str] = None,
+              columns: Optional[Iterable[str]] = None):
+        """Arrow table for the selected days; only the matching partitions are opened."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        start, end = (trade_date, trade_date) if trade_date else (start_date, end_date)
+        days = [d for d in self.dates() if (not start or d >= start) and (not end or d <= end)]
+        if not days:
+            return None
+        dataset = ds.dataset([self.partition_path(d) for d in days], format="parquet",
+                             partitioning=ds.partitioning(pa.schema([("trade_date", pa.string())]), flavor="hive"),
+                             partition_base_dir=self.root)
+        flt = None
+        if ts_code:
+            codes = [c.strip() for c in ts_code.split(",") if c.strip()]
+            flt = ds.field("ts_code").isin(codes)
+        cols = None
+        if columns:
+            cols = list(dict.fromkeys(["ts_code", "trade_date"] + [c for c in columns if c in dataset.schema.names]))
+        return dataset.to_table(columns=cols, filter=flt)
+
+    def daily(self, trade_date: Optional[str] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None, ts_code: Optional[str] = None,
+              fields: Optional[str] = None):
+        """Same shape as `pro.daily`, served from the local store (ts_code as plain strings)."""
+        import pandas as pd
+
+        columns = [c.strip() for c in fields.split(",") if c.strip()] if fields else None
+        table = self.table(trade_date, start_date, end_date, ts_code, columns)
+        if table is None:
+            return pd.DataFrame(columns=columns or ["ts_code", "trade_date"])
+        df = table.to_pandas()
+        df["ts_code"] = df["ts_code"].astype(str)
+        df = df[["ts_code", "trade_date"] + [c for c in df.columns if c not in ("ts_code", "trade_date")]]
+        return df.sort_values(["trade_date", "ts_code"], ascending=[False, True]).reset_index(drop=True)
+
+    def info(self) -> Dict:
+        dates = self.dates()
+        size = sum(os.path.getsize(self.partition_path(d)) for d in dates)
+        return {"days": len(dates), "first": dates[0] if dates else None,
+                "last": dates[-1] if dates else None, "bytes": size, "root": self.root}
+
+
+def _call(limiter: RateLimiter, fn, **kwargs):
+    for attempt in range(MAX_ATTEMPTS):
+        limiter.acquire()
+        try:
+            return fn(**kwargs)
+        except Exception:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def store_for(api: str = "daily") -> MarketStore:
+    """The store holding `pro.<api>(trade_date=...)` snapshots."""
+    if api not in APIS:
+        raise ValueError(f"api must be one of {APIS}, got {api!r}")
+    return MarketStore(os.path.join(MARKET_DIR, api))
+
+
+def ingest(start_date: str, end_date: str, pro=None, store: Optional[MarketStore] = None,
+           workers: int = 4, rate: float = DEFAULT_RATE, force: bool = False, progress=print,
+           api: str = "daily") -> Dict:
+    """
+    Store every SSE trading day in [start_date, end_date] not yet present
+    (all of them with `force`). Days run `workers` at a time, all calls
+    sharing one rate limiter. Days with no data yet (e.g. today before the
+    close) are left out, so a later run picks them up. `api` selects the
+    snapshot interface ("daily" or "daily_basic").
+    """
+    store = store or store_for(api)
+    pro = pro or _pro_client()
+    limiter = RateLimiter(rate)
+    today = time.strftime("%Y%m%d")
+    cal = _call(limiter, pro.trade_cal, exchange="SSE", start_date=start_date, end_date=min(end_date, today))
+    days = sorted(cal.loc[cal["is_open"].astype(int) == 1, "cal_date"].astype(str))
+    todo = [d for d in days if force or not store.has(d)]
+    result = {"trading_days": len(days), "skipped": len(days) - len(todo), "written": 0,
+              "empty": 0, "failed": [], "rows": 0}
+    progress(f"[{api}] {len(days)} trading days, {result['skipped']} already stored, {len(todo)} to fetch")
+
+    def fetch(day: str):
+        df = _call(limiter, getattr(pro, api), trade_date=day)
+        if df is None or df.empty:
+            return day, 0
+        return day, store.write_day(day, df)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(fetch, d): d for d in todo}
+        for n, future in enumerate(as_completed(futures), 1):
+            day = futures[future]
+            try:
+                _, rows = future.result()
+            except Exception as e:
+                result["failed"].append(day)
+                progress(f"[{api}] {n}/{len(todo)} {day} failed: {e}")
+                continue
+            if rows:
+                result["written"] += 1
+                result["rows"] += rows
+            else:
+                result["empty"] += 1
+            if n % 50 == 0 or n == len(todo):
+                progress(f"[{api}] {n}/{len(todo)} days fetched")
+    return result
+
+
+def _pro_client():
+    from .tushare_api import _ensure_tushare_initialized
+    return _ensure_tushare_initialized()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Whole-market daily snapshot store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="fetch missing trading days")
+    p_ingest.add_argument("--start", help="YYYYMMDD; default: day after the last stored day, or one year ago")
+    p_ingest.add_argument("--end", default=time.strftime("%Y%m%d"), help="YYYYMMDD; default: today")
+    p_ingest.add_argument("--workers", type=int, default=4)
+    p_ingest.add_argument("--rate", type=float, default=DEFAULT_RATE, help="max pro.* calls per minute")
+    p_ingest.add_argument("--force", action="store_true", help="refetch days already stored")
+    p_ingest.add_argument("--api", choices=APIS, default="daily", help="snapshot interface to store")
+    p_info = sub.add_parser("info", help="show what the store holds")
+    p_info.add_argument("--api", choices=APIS, default="daily")
+    args = parser.parse_args(argv)
+
+    store = store_for(args.api)
+    if args.command == "info":
+        print(store.info())
+        return
+    start = args.start
+    if not start:
+        dates = store.dates()
+        start = dates[-1] if dates else time.strftime("%Y%m%d", time.localtime(time.time() - 365 * 86400))
+    result = ingest(start, args.end, store=store, workers=args.workers, rate=args.rate, force=args.force,
+                    api=args.api)
+    print(f"[{args.api}] written={result['written']} rows={result['rows']} skipped={result['skipped']} "
+          f"empty={result['empty']} failed={len(result['failed'])}")
+    if result["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Forward (qfq) / backward (hfq) price adjustment from Tushare adj_factor.
+
+    hfq = raw * adj_factor
+    qfq = raw * adj_factor / latest adj_factor of that ts_code
+
+hfq of a past day never changes; qfq depends on the latest factor, so it
+shifts whenever a new corporate action lands. `PriceAdjuster` therefore
+keeps raw bars and factors separately and derives both views lazily, so a
+new factor invalidates only the affected (ts_code, view) pair and never
+requires refetching history.
+"""
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "pre_close")
+ADJUSTMENTS = ("qfq", "hfq")
+
+
+def _with_factors(df, factors=None):
+    """Attach `adj_factor` (merged from `factors` if given), filled across suspensions per symbol."""
+    import pandas as pd
+
+    if factors is not None:
+        df = df.drop(columns=["adj_factor"], errors="ignore").merge(
+            factors[["ts_code", "trade_date", "adj_factor"]], on=["ts_code", "trade_date"], how="left")
+    elif "adj_factor" not in df.columns:
+        raise ValueError("adj_factor column missing and no factors given")
+    df = df.sort_values(["ts_code", "trade_date"]).reset_index(drop=True)
+    df["adj_factor"] = pd.to_numeric(df["adj_factor"], errors="coerce")
+    df["adj_factor"] = df.groupby("ts_code", sort=False)["adj_factor"].ffill()
+    df["adj_factor"] = df.groupby("ts_code", sort=False)["adj_factor"].bfill().fillna(1.0)
+    return df
+
+
+def adjust_prices(df, factors=None, how: str = "qfq", price_columns: Iterable[str] = PRICE_COLUMNS,
+                  latest: Optional[Dict[str, float]] = None):
+    """
+    Adjusted copy of a daily-bar frame (one or many ts_codes).
+
+    `df` needs ts_code, trade_date and the price columns; factors come from
+    `factors` (pro.adj_factor output) or an `adj_factor` column in `df`.
+    qfq is anchored at each symbol's last row, or at `latest[ts_code]`
+    when the newest factor is known beyond the bars. All price columns are
+    scaled by one broadcast multiply; `change` is recomputed, pct_chg and
+    volumes are unaffected by adjustment.
+    """
+    if how not in ADJUSTMENTS:
+        raise ValueError(f"how must be one of {ADJUSTMENTS}, got {how!r}")
+    df = _with_factors(df, factors)
+    ratio = df["adj_factor"].to_numpy(dtype="float64")
+    if how == "qfq":
+        anchor = df.groupby("ts_code", sort=False)["adj_factor"].transform("last")
+        if latest:
+            anchor = df["ts_code"].map(latest).fillna(anchor)
+        ratio = ratio / anchor.to_numpy(dtype="float64")
+
+    cols = [c for c in price_columns if c in df.columns]
+    df[cols] = df[cols].to_numpy(dtype="float64") * ratio[:, None]
+    if "change" in df.columns and {"close", "pre_close"} <= set(cols):
+        df["change"] = df["close"] - df["pre_close"]
+    return df
+
+
+class PriceAdjuster:
+    """
+    Raw bars + factors per ts_code, with cached qfq/hfq views.
+
+    add_bars / add_factors merge new rows (by trade_date); view() recomputes
+    only the (ts_code, how) pairs whose inputs changed:
+    - new bars for a symbol invalidate both of its views;
+    - a factor change on an existing date invalidates both;
+    - a new latest factor (e.g. an ex-dividend day) invalidates qfq only;
+    - a new factor date that covers bars already held invalidates both
+      (those bars' factor, hence their hfq and qfq ratios, changes).
+    """
+
+    def __init__(self):
+        self._bars: Dict[str, object] = {}
+        self._factors: Dict[str, object] = {}
+        self._views: Dict[Tuple[str, str], object] = {}
+        self._lock = threading.Lock()
+        self.stats = {"computed": 0, "cached": 0, "invalidated": 0}
+
+    def _invalidate(self, ts_code: str, kinds: Iterable[str]):
+        for how in kinds:
+            if self._views.pop((ts_code, how), None) is not None:
+                self.stats["invalidated"] += 1
+
+    @staticmethod
+    def _merge(old, new):
+        import pandas as pd
+
+        if old is None:
+            return new.drop_duplicates("trade_date", keep="last").sort_values("trade_date").reset_index(drop=True)
+        merged = pd.concat([old, new], ignore_index=True)
+        return merged.drop_duplicates("trade_date", keep="last").sort_values("trade_date").reset_index(drop=True)
+
+    def add_bars(self, df):
+        """Unadjusted daily bars (pro.daily output), any number of symbols."""
+        with self._lock:
+            for ts_code, part in df.groupby("ts_code", sort=False):
+                self._bars[ts_code] = self._merge(self._bars.get(ts_code),
+                                                  part.drop(columns=["adj_factor"], errors="ignore"))
+                self._invalidate(ts_code, ADJUSTMENTS)
+
+    def add_factors(self, df):
+        """pro.adj_factor output, any number of symbols."""
+        with self._lock:
+            for ts_code, part in df[["ts_code", "trade_date", "adj_factor"]].groupby("ts_code", sort=False):
+                old = self._factors.get(ts_code)
+                new = self._merge(old, part)
+                self._factors[ts_code] = new
+                if old is None:
+                    self._invalidate(ts_code, ADJUSTMENTS)
+                    continue
+                before = old.set_index("trade_date")["adj_factor"]
+                after = new.set_index("trade_date")["adj_factor"].reindex(before.index)
+                bars = self._bars.get(ts_code)
+                added = new.loc[~new["trade_date"].isin(before.index), "trade_date"]
+                if not before.equals(after):
+                    self._invalidate(ts_code, ADJUSTMENTS)
+                else:
+                    if new["adj_factor"].iloc[-1] != old["adj_factor"].iloc[-1]:
+                        self._invalidate(ts_code, ["qfq"])
+                    if bars is not None and added.isin(bars["trade_date"]).any():
+                        self._invalidate(ts_code, ADJUSTMENTS)
+
+    def view(self, how: str = "qfq", ts_codes: Optional[Iterable[str]] = None,
+             start_date: Optional[str] = None, end_date: Optional[str] = None):
+        """
+        Adjusted panel for `ts_codes` (all held symbols by default), sorted by
+        (ts_code, trade_date). qfq is anchored at each symbol's latest held
+        factor, so the date filter does not change the values.
+        """
+        import pandas as pd
+
+        if how not in ADJUSTMENTS:
+            raise ValueError(f"how must be one of {ADJUSTMENTS}, got {how!r}")
+        frames = []
+        with self._lock:
+            for ts_code in (list(ts_codes) if ts_codes is not None else list(self._bars)):
+                if ts_code not in self._bars:
+                    continue
+                view = self._views.get((ts_code, how))
+                if view is None:
+                    factors = self._factors.get(ts_code)
+                    if factors is None:
+                        factors = pd.DataFrame(columns=["ts_code", "trade_date", "adj_factor"])
+                    latest = {ts_code: float(factors["adj_factor"].iloc[-1])} if len(factors) else None
+                    view = adjust_prices(self._bars[ts_code], factors, how=how, latest=latest)
+                    self._views[(ts_code, how)] = view
+                    self.stats["computed"] += 1
+                else:
+                    self.stats["cached"] += 1
+                frames.append(view)
+        if not frames:
+            return pd.DataFrame()
+        out = pd.concat(frames, ignore_index=True)
+        if start_date:
+            out = out[out["trade_date"] >= start_date]
+        if end_date:
+            out = out[out["trade_date"] <= end_date]
+        return out.reset_index(drop=True)
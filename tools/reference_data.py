@@ -0,0 +1,197 @@
+"""
+Reference datasets for generated scripts (`REF` in the executor preamble).
+
+stock_basic, trade_cal and the last few whole-market daily snapshots are
+cached as uncompressed Arrow IPC files under workspace/cache/reference/ and
+opened with pyarrow.memory_map, so concurrently running scripts share the
+same page-cache pages instead of each pulling the tables from Tushare.
+A file is refetched on first access once it is older than its TTL;
+`python -m tools.reference_data --refresh` warms the cache ahead of time.
+"""
+import argparse
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
+CACHE_DIR = os.path.join(ROOT_DIR, "workspace", "cache", "reference")
+
+# Trading days covered by daily_recent
+RECENT_DAYS = 5
+
+
+def _arrow():
+    """pyarrow, imported on first use (keeps the preamble cheap); None when not installed."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def _fetch_stock_basic(pro, ref: "ReferenceData"):
+    return pro.stock_basic(exchange="", list_status="L",
+                           fields="ts_code,symbol,name,area,industry,market,list_date")
+
+
+def _fetch_trade_cal(pro, ref: "ReferenceData"):
+    year = time.localtime().tm_year
+    return pro.trade_cal(exchange="SSE", start_date="20100101", end_date=f"{year}1231",
+                         fields="exchange,cal_date,is_open,pretrade_date")
+
+
+def _fetch_daily_recent(pro, ref: "ReferenceData"):
+    import pandas as pd
+    cal = ref.trade_cal
+    today = time.strftime("%Y%m%d")
+    open_days = sorted(cal.loc[(cal["is_open"].astype(int) == 1) & (cal["cal_date"] <= today), "cal_date"])
+    frames = [pro.daily(trade_date=d) for d in open_days[-RECENT_DAYS:]]
+    frames = [f for f in frames if f is not None and not f.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+@dataclass
+class Dataset:
+    name: str
+    ttl: float
+    fetch: Callable
+    description: str
+
+
+DATASETS: Dict[str, Dataset] = {d.name: d for d in [
+    Dataset("stock_basic", 24 * 3600, _fetch_stock_basic,
+            "all listed stocks: ts_code, symbol, name, area, industry, market, list_date"),
+    Dataset("trade_cal", 24 * 3600, _fetch_trade_cal,
+            "SSE trading calendar since 2010: exchange, cal_date, is_open, pretrade_date"),
+    Dataset("daily_recent", 6 * 3600, _fetch_daily_recent,
+            f"whole-market pro.daily rows for the last {RECENT_DAYS} trading days"),
+]}
+
+
+def dataset_path(name: str) -> str:
+    return os.path.join(CACHE_DIR, f"{name}.arrow")
+
+
+def _is_fresh(path: str, ttl: float) -> bool:
+    try:
+        return time.time() - os.path.getmtime(path) < ttl
+    except OSError:
+        return False
+
+
+def write_table(name: str, df) -> str:
+    """Write `df` as an uncompressed Arrow IPC file (memory-mappable), atomically."""
+    pa = _arrow()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fd, tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=CACHE_DIR)
+    os.close(fd)
+    try:
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, dataset_path(name))
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return dataset_path(name)
+
+
+def open_table(name: str):
+    """Memory-mapped pyarrow.Table; column buffers point into the shared file mapping."""
+    pa = _arrow()
+    source = pa.memory_map(dataset_path(name), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+class ReferenceData:
+    """
+    Lazy access to the reference datasets: `REF.stock_basic` etc. return
+    pandas DataFrames (loaded once per script), `REF.table(name)` the
+    zero-copy Arrow table. Without pyarrow the datasets are fetched from
+    `pro` directly and not cached.
+    """
+
+    def __init__(self, pro=None):
+        self._pro = pro
+        self._frames: Dict[str, object] = {}
+
+    def _ensure(self, name: str, force: bool = False):
+        dataset = DATASETS[name]
+        path = dataset_path(name)
+        if not force and _is_fresh(path, dataset.ttl):
+            return
+        if self._pro is None:
+            if os.path.exists(path):
+                return
+            raise RuntimeError(f"reference dataset {name} is not cached and no Tushare client is available")
+        try:
+            df = dataset.fetch(self._pro, self)
+        except Exception as e:
+            if os.path.exists(path):
+                print(f"Warning: refreshing {name} failed ({e}); using the cached copy")
+                return
+            raise
+        write_table(name, df)
+
+    def table(self, name: str):
+        if name not in DATASETS:
+            raise KeyError(f"unknown reference dataset: {name}")
+        if _arrow() is None:
+            raise RuntimeError("pyarrow is not installed")
+        self._ensure(name)
+        return open_table(name)
+
+    def __getattr__(self, name: str):
+        if name not in DATASETS:
+            raise AttributeError(name)
+        if name not in self._frames:
+            if _arrow() is None:
+                self._frames[name] = DATASETS[name].fetch(self._pro, self)
+            else:
+                self._frames[name] = self.table(name).to_pandas()
+        return self._frames[name]
+
+    def __dir__(self):
+        return list(DATASETS) + ["table"]
+
+    def __repr__(self):
+        return "ReferenceData(" + ", ".join(DATASETS) + ")"
+
+
+def refresh(names: Optional[List[str]] = None, pro=None, force: bool = False) -> Dict[str, int]:
+    """Fetch the given datasets (all by default); returns row counts."""
+    ref = ReferenceData(pro)
+    rows = {}
+    for name in names or list(DATASETS):
+        if name not in DATASETS:
+            raise KeyError(f"unknown reference dataset: {name}")
+        ref._ensure(name, force=force)
+        rows[name] = open_table(name).num_rows
+    return rows
+
+
+def _pro_client():
+    from dotenv import load_dotenv
+    from .stub_tushare import pro_api as stub_pro_api, stub_enabled
+    load_dotenv()
+    if stub_enabled():
+        return stub_pro_api()
+    import tushare as ts
+    return ts.pro_api(os.getenv("TUSHARE_TOKEN"))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Warm the reference dataset cache")
+    parser.add_argument("--refresh", nargs="*", metavar="NAME", help=f"datasets to refresh ({', '.join(DATASETS)})")
+    parser.add_argument("--force", action="store_true", help="refetch even if the cache is fresh")
+    args = parser.parse_args(argv)
+    for name, n in refresh(args.refresh or None, _pro_client(), force=args.force).items():
+        print(f"{name}: {n} rows -> {dataset_path(name)}")
+
+
+if __name__ == "__main__":
+    main()
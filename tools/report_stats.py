@@ -0,0 +1,114 @@
+"""
+Summary statistics for export reports ("价格统计" / "数据摘要" sheets).
+
+Instead of one .mean()/.max()/.min()/.std() call per column plus
+`len(df[df['pct_chg'] > 0])` copies, each function here issues a single
+aggregation over the whole column block (or one groupby for a multi-symbol
+panel) and counts up/down/flat days with one bincount over the sign.
+"""
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+STATS = ("mean", "max", "min", "std")
+STAT_LABELS = {"mean": "平均值", "max": "最大值", "min": "最小值", "std": "标准差",
+               "sum": "合计", "count": "样本数"}
+COLUMN_LABELS = {"open": "开盘价", "high": "最高价", "low": "最低价", "close": "收盘价",
+                 "pre_close": "昨收价", "change": "涨跌额", "pct_chg": "涨跌幅(%)", "vol": "成交量",
+                 "amount": "成交额", "amplitude": "振幅(%)", "turnover_rate": "换手率(%)",
+                 "cumulative_return": "累计收益率(%)"}
+
+
+def summary_stats(df: pd.DataFrame, columns: Optional[Iterable[str]] = None, by: Optional[str] = None,
+                  stats: Sequence[str] = STATS, labels: bool = False) -> pd.DataFrame:
+    """
+    One row per column (per (by, column) for a panel), one column per stat.
+
+    `columns` defaults to every numeric column. With `labels=True` the
+    index and headers use the Chinese report names (统计项, 平均值, ...).
+    """
+    cols = [c for c in (columns or df.select_dtypes("number").columns) if c in df.columns and c != by]
+    if by is None:
+        out = df[cols].agg(list(stats)).T
+    else:
+        out = df.groupby(by, sort=True, observed=True)[cols].agg(list(stats)).stack(level=0, future_stack=True)
+    out = out[list(stats)]
+    if labels:
+        out = out.rename(index=COLUMN_LABELS, columns=STAT_LABELS)
+        out.index.name = "统计项" if by is None else out.index.name
+        if by is not None:
+            out.index = out.index.set_names([by, "统计项"])
+    return out
+
+
+def movement_counts(pct: pd.Series, by: Optional[pd.Series] = None) -> pd.DataFrame:
+    """up/down/flat day counts from one sign + bincount pass (NaN rows ignored)."""
+    values = pct.to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(values)
+    bucket = (np.sign(values[valid]) + 1).astype(np.intp)  # 0 down, 1 flat, 2 up
+    if by is None:
+        counts = np.bincount(bucket, minlength=3).reshape(1, 3)
+        index = pd.RangeIndex(1)
+    else:
+        codes, index = pd.factorize(by, sort=True)
+        counts = np.bincount(codes[valid] * 3 + bucket, minlength=3 * len(index)).reshape(-1, 3)
+    return pd.DataFrame({"up_days": counts[:, 2], "down_days": counts[:, 0], "flat_days": counts[:, 1]},
+                        index=index)
+
+
+def report_metrics(df: pd.DataFrame, by: Optional[str] = None) -> pd.DataFrame:
+    """
+    The "数据摘要" metrics of a daily-bar frame (one row) or panel (one row per `by`):
+    trading_days, start/end date, first/last close, change, change_pct,
+    max_high, min_low, avg_close, range_pct, vol/amount sum/mean/max,
+    volatility (std of pct_chg), max_gain, max_loss, up/down/flat days, up_ratio.
+    Rows need not be sorted: first/last close follow trade_date. The index
+    is ignored (concatenated frames may repeat labels), and a categorical
+    trade_date is compared by its values.
+    """
+    df = df.reset_index(drop=True)
+    if isinstance(df["trade_date"].dtype, pd.CategoricalDtype):
+        df["trade_date"] = df["trade_date"].astype(df["trade_date"].cat.categories.dtype)
+    spec = {
+        "trading_days": ("close", "count"),
+        "first_row": ("trade_date", "idxmin"),
+        "last_row": ("trade_date", "idxmax"),
+        "start_date": ("trade_date", "min"),
+        "end_date": ("trade_date", "max"),
+        "max_high": ("high", "max"),
+        "min_low": ("low", "min"),
+        "avg_close": ("close", "mean"),
+        "vol_sum": ("vol", "sum"),
+        "vol_mean": ("vol", "mean"),
+        "vol_max": ("vol", "max"),
+        "amount_sum": ("amount", "sum"),
+        "amount_mean": ("amount", "mean"),
+        "volatility": ("pct_chg", "std"),
+        "max_gain": ("pct_chg", "max"),
+        "max_loss": ("pct_chg", "min"),
+    }
+    spec = {name: (col, fn) for name, (col, fn) in spec.items() if col in df.columns}
+    if by is None:
+        # a constant groupby key costs a factorize pass; reduce the columns directly
+        out = pd.DataFrame({name: [getattr(df[col], fn)()] for name, (col, fn) in spec.items()})
+    else:
+        out = df.groupby(by, sort=True, observed=True).agg(**spec)
+
+    close = df["close"]
+    out["first_close"] = close.loc[out.pop("first_row")].to_numpy()
+    out["last_close"] = close.loc[out.pop("last_row")].to_numpy()
+    out["change"] = out["last_close"] - out["first_close"]
+    out["change_pct"] = out["change"] / out["first_close"] * 100
+    if {"max_high", "min_low"} <= set(out.columns):
+        out["range_pct"] = (out["max_high"] / out["min_low"] - 1) * 100
+    if "pct_chg" in df.columns:
+        moves = movement_counts(df["pct_chg"], df[by] if by is not None else None)
+        out[["up_days", "down_days", "flat_days"]] = moves.to_numpy()
+        out["up_ratio"] = out["up_days"] / out["trading_days"] * 100
+    return out
+
+
+def metrics_dict(df: pd.DataFrame) -> Dict:
+    """report_metrics() of a single-symbol frame as a plain dict."""
+    return report_metrics(df).iloc[0].to_dict()
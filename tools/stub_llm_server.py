@@ -0,0 +1,180 @@
+"""
+Local stand-in for an OpenAI-compatible `/v1/chat/completions` endpoint.
+
+Used to exercise the backend pool (failover, hedging, cache-hit reporting)
+and for load tests without calling DeepSeek.
+
+    python -m tools.stub_llm_server --port 8765 --ttft 0.2 --token-delay 0.005
+
+Then point a backend at it in config.json:
+    "llm_backends": [{"name": "stub", "base_url": "http://127.0.0.1:8765/v1", "api_key": "stub"}]
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+DEFAULT_REPLY = """计划：输出一条确认信息。
+
+```python
+print("stub llm reply executed")
+```
+"""
+
+
+class StubOptions:
+    def __init__(self, reply: str = DEFAULT_REPLY, ttft: float = 0.05, token_delay: float = 0.0,
+                 chunk_chars: int = 8, fail_rate: float = 0.0, model: str = "stub-model"):
+        self.reply = reply
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.chunk_chars = chunk_chars
+        self.fail_rate = fail_rate
+        self.model = model
+        # Simulated provider prefix cache: system prompts seen before count as hits
+        self.seen_prefixes = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+
+
+def _usage(opts: StubOptions, messages, reply: str) -> dict:
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+    with opts.lock:
+        hit = (len(system) // 4) if system in opts.seen_prefixes else 0
+        opts.seen_prefixes.add(system)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(reply) // 4,
+        "total_tokens": prompt_tokens + len(reply) // 4,
+        "prompt_cache_hit_tokens": hit,
+        "prompt_cache_miss_tokens": prompt_tokens - hit,
+    }
+
+
+def _make_handler(opts: StubOptions):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._send_json(200, {"object": "list", "data": [{"id": opts.model, "object": "model"}]})
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            req = json.loads(self.rfile.read(length) or b"{}")
+            with opts.lock:
+                opts.requests += 1
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            if opts.fail_rate and random.random() < opts.fail_rate:
+                self._send_json(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                return
+
+            messages = req.get("messages", [])
+            model = req.get("model") or opts.model
+            reply = opts.reply
+            usage = _usage(opts, messages, reply)
+            cid = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            created = int(time.time())
+            time.sleep(opts.ttft)
+
+            if not req.get("stream"):
+                self._send_json(200, {
+                    "id": cid, "object": "chat.completion", "created": created, "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": reply}}],
+                    "usage": usage,
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def send(payload):
+                self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            base = {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model}
+            try:
+                send(dict(base, choices=[{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]))
+                for i in range(0, len(reply), opts.chunk_chars):
+                    send(dict(base, choices=[{"index": 0, "delta": {"content": reply[i:i + opts.chunk_chars]},
+                                              "finish_reason": None}]))
+                    if opts.token_delay:
+                        time.sleep(opts.token_delay)
+                send(dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+                if (req.get("stream_options") or {}).get("include_usage"):
+                    send(dict(base, choices=[], usage=usage))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                # Client cancelled (e.g. lost a hedged race)
+                pass
+            self.close_connection = True
+
+    return Handler
+
+
+def serve_in_thread(port: int = 0, host: str = "127.0.0.1", **options) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stub in a daemon thread. Returns (server, base_url);
+    call server.shutdown() when done.
+    """
+    opts = StubOptions(**options)
+    server = ThreadingHTTPServer((host, port), _make_handler(opts))
+    server.daemon_threads = True
+    server.stub_options = opts
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--chunk-chars", type=int, default=8)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="probability of an HTTP 500")
+    parser.add_argument("--reply-file", help="file whose content is returned as the assistant reply")
+    args = parser.parse_args(argv)
+
+    reply = DEFAULT_REPLY
+    if args.reply_file:
+        with open(args.reply_file, "r", encoding="utf-8") as f:
+            reply = f.read()
+    opts = StubOptions(reply=reply, ttft=args.ttft, token_delay=args.token_delay,
+                       chunk_chars=args.chunk_chars, fail_rate=args.fail_rate)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(opts))
+    server.daemon_threads = True
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Offline stand-in for `tushare.pro_api()`.
+
+Enabled with FINDATA_STUB_TUSHARE=1: generated scripts then get a `pro`
+that returns deterministic synthetic frames with the real column layout,
+so load tests and demos run without a token or network. Daily bars and the
+trading calendar come from tools/synthetic_market.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from .synthetic_market import base_volume, generate_daily, trading_days
+
+STUB_ENV = "FINDATA_STUB_TUSHARE"
+# Price paths start here, so any requested window of a code shows the same bars
+EPOCH = "20100101"
+
+STOCKS = [
+    ("000001.SZ", "000001", "平安银行", "深圳", "银行", "主板", "19910403"),
+    ("000002.SZ", "000002", "万科A", "深圳", "全国地产", "主板", "19910129"),
+    ("000858.SZ", "000858", "五粮液", "四川", "白酒", "主板", "19980427"),
+    ("300750.SZ", "300750", "宁德时代", "福建", "电气设备", "创业板", "20180611"),
+    ("600000.SH", "600000", "浦发银行", "上海", "银行", "主板", "19991110"),
+    ("600036.SH", "600036", "招商银行", "深圳", "银行", "主板", "20020409"),
+    ("600519.SH", "600519", "贵州茅台", "贵州", "白酒", "主板", "20010827"),
+    ("601318.SH", "601318", "中国平安", "深圳", "保险", "主板", "20070301"),
+]
+
+DAILY_BASIC_COLUMNS = ["ts_code", "trade_date", "close", "turnover_rate", "turnover_rate_f", "volume_ratio",
+                       "pe", "pe_ttm", "pb", "ps", "ps_ttm", "dv_ratio", "dv_ttm", "total_share", "float_share",
+                       "free_share", "total_mv", "circ_mv"]
+
+
+def stub_enabled() -> bool:
+    return os.getenv(STUB_ENV, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _seed(*parts) -> int:
+    return int.from_bytes(hashlib.md5("|".join(map(str, parts)).encode("utf-8")).digest()[:4], "little")
+
+
+def _fields(df, fields: Optional[str]):
+    if fields:
+        cols = [c.strip() for c in fields.split(",") if c.strip() in df.columns]
+        if cols:
+            return df[cols]
+    return df
+
+
+def _window(start_date: Optional[str], end_date: Optional[str]):
+    import pandas as pd
+    end = pd.Timestamp(end_date) if end_date else pd.Timestamp.today().normalize()
+    start = pd.Timestamp(start_date) if start_date else end - pd.Timedelta(days=365)
+    return start.strftime("%Y%m%d"), end.strftime("%Y%m%d")
+
+
+class StubPro:
+    """Implements the handful of pro.* endpoints the knowledge base documents."""
+
+    def query(self, api_name: str, fields: Optional[str] = None, **kwargs):
+        method = getattr(self, api_name, None)
+        if method is None or api_name.startswith("_"):
+            raise Exception(f"stub tushare: unsupported api {api_name}")
+        return method(fields=fields, **kwargs)
+
+    def stock_basic(self, exchange: str = "", list_status: str = "L", fields: Optional[str] = None, **kwargs):
+        import pandas as pd
+        df = pd.DataFrame(STOCKS, columns=["ts_code", "symbol", "name", "area", "industry", "market", "list_date"])
+        if exchange:
+            df = df[df["ts_code"].str.endswith(".SH" if exchange.upper() == "SSE" else ".SZ")]
+        return _fields(df.reset_index(drop=True), fields)
+
+    def trade_cal(self, exchange: str = "SSE", start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  is_open: Optional[str] = None, fields: Optional[str] = None, **kwargs):
+        import pandas as pd
+        start, end = _window(start_date, end_date)
+        days = pd.date_range(start, end)
+        open_flag = days.isin(trading_days(start, end)).astype(int)
+        df = pd.DataFrame({"exchange": exchange, "cal_date": days.strftime("%Y%m%d"), "is_open": open_flag})
+        if is_open is not None:
+            df = df[df["is_open"] == int(is_open)]
+        return _fields(df.iloc[::-1].reset_index(drop=True), fields)
+
+    def daily(self, ts_code: str = "", trade_date: Optional[str] = None, start_date: Optional[str] = None,
+              end_date: Optional[str] = None, fields: Optional[str] = None, **kwargs):
+        codes = [c.strip() for c in ts_code.split(",") if c.strip()] or [s[0] for s in STOCKS]
+        start, end = _window(trade_date or start_date, trade_date or end_date)
+        listed = {s[0]: s[6] for s in STOCKS}
+        # Fixed epoch and per-code start price: same code -> same path regardless of the requested window
+        out = generate_daily(codes, start, end, epoch=EPOCH, list_dates=[listed.get(c) for c in codes],
+                             start_price=[20.0 * (1 + _seed(c) % 50) for c in codes])
+        out = out.astype({"ts_code": str, "trade_date": str})
+        out = out.sort_values(["trade_date", "ts_code"], ascending=[False, True]).reset_index(drop=True)
+        return _fields(out, fields)
+
+    def fund_daily(self, **kwargs):
+        return self.daily(**kwargs)
+
+    def daily_basic(self, ts_code: str = "", trade_date: Optional[str] = None, start_date: Optional[str] = None,
+                    end_date: Optional[str] = None, fields: Optional[str] = None, **kwargs):
+        import numpy as np
+        bars = self.daily(ts_code=ts_code, trade_date=trade_date, start_date=start_date, end_date=end_date)
+        if bars.empty:
+            return _fields(bars.reindex(columns=DAILY_BASIC_COLUMNS), fields)
+        # Per-code constants: share count (万股) sized for 0.5-1.5% daily turnover, earnings and book per share
+        seeds = bars["ts_code"].map(lambda code: _seed("basic", code))
+        codes = bars["ts_code"].unique()
+        typical_vol = bars["ts_code"].map(dict(zip(codes, base_volume(codes))))
+        float_share = np.round(typical_vol * 100 / 1e4 / 0.01 / (0.5 + (seeds % 100) / 100), 2)
+        total_share = np.round(float_share * (1 + (seeds % 7) / 10), 2)
+        eps = bars["ts_code"].map(lambda code: 20 * (1 + _seed(code) % 50)) / (8 + seeds % 40)
+        bps = eps * (2 + seeds % 9)
+        close = bars["close"]
+        df = bars[["ts_code", "trade_date", "close"]].assign(
+            turnover_rate=np.round(bars["vol"] * 100 / (float_share * 1e4) * 100, 4),
+            turnover_rate_f=np.round(bars["vol"] * 100 / (float_share * 0.7e4) * 100, 4),
+            volume_ratio=np.round(np.exp(np.random.default_rng(_seed("vr", len(bars))).normal(0, 0.3, len(bars))), 2),
+            pe=np.round(close / (eps * 0.95), 4), pe_ttm=np.round(close / eps, 4), pb=np.round(close / bps, 4),
+            ps=np.round(close / (eps * 6), 4), ps_ttm=np.round(close / (eps * 6.2), 4),
+            dv_ratio=np.round(eps * 0.3 / close * 100, 4), dv_ttm=np.round(eps * 0.3 / close * 100, 4),
+            total_share=total_share, float_share=float_share, free_share=np.round(float_share * 0.7, 2),
+            total_mv=np.round(close * total_share, 4), circ_mv=np.round(close * float_share, 4),
+        )
+        return _fields(df.reset_index(drop=True), fields)
+
+    def cn_gdp(self, q: Optional[str] = None, start_q: Optional[str] = None, end_q: Optional[str] = None,
+               fields: Optional[str] = None, **kwargs):
+        import pandas as pd
+        rows = []
+        gdp = 200000.0
+        for year in range(2000, pd.Timestamp.today().year + 1):
+            for quarter in range(1, 5):
+                gdp *= 1.018
+                rows.append({"quarter": f"{year}Q{quarter}", "gdp": round(gdp, 1), "gdp_yoy": 6.0,
+                             "pi": round(gdp * 0.07, 1), "pi_yoy": 3.5, "si": round(gdp * 0.38, 1),
+                             "si_yoy": 5.5, "ti": round(gdp * 0.55, 1), "ti_yoy": 6.5})
+        df = pd.DataFrame(rows)
+        if q:
+            df = df[df["quarter"] == q]
+        if start_q:
+            df = df[df["quarter"] >= start_q]
+        if end_q:
+            df = df[df["quarter"] <= end_q]
+        return _fields(df.iloc[::-1].reset_index(drop=True), fields)
+
+    def cn_cpi(self, m: Optional[str] = None, start_m: Optional[str] = None, end_m: Optional[str] = None,
+               fields: Optional[str] = None, **kwargs):
+        import numpy as np
+        import pandas as pd
+        months = pd.period_range("2000-01", pd.Timestamp.today().to_period("M"), freq="M")
+        rng = np.random.default_rng(_seed("cpi"))
+        yoy = np.round(2 + np.cumsum(rng.normal(0, 0.2, len(months))) * 0.3, 1)
+        df = pd.DataFrame({"month": months.strftime("%Y%m"), "nt_val": np.round(100 + yoy, 1), "nt_yoy": yoy,
+                           "nt_mom": np.round(rng.normal(0.1, 0.3, len(months)), 1),
+                           "nt_accu": np.round(100 + yoy * 0.9, 1)})
+        if m:
+            df = df[df["month"] == m]
+        if start_m:
+            df = df[df["month"] >= start_m]
+        if end_m:
+            df = df[df["month"] <= end_m]
+        return _fields(df.iloc[::-1].reset_index(drop=True), fields)
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def unsupported(**kwargs):
+            import pandas as pd
+            return pd.DataFrame()
+        return unsupported
+
+
+def pro_api(token: Optional[str] = None) -> StubPro:
+    return StubPro()
@@ -0,0 +1,317 @@
+"""
+Seeded synthetic daily bars in `pro.daily` layout, for load tests,
+benchmarks and the stub Tushare.
+
+Everything is generated as (days x symbols) matrices. The random numbers come
+from a counter-based hash of (seed, ts_code, calendar day) instead of a
+sequential stream. A symbol's bars on a given day are therefore the same
+whatever window or set of symbols is requested, and no per-day or per-row
+loop is involved:
+
+    df = generate_daily(["600519.SH", "000858.SZ"], "20230101", "20231231", seed=42)
+    df = generate_daily(5000, "20150101", "20241231")          # synthetic_codes(5000)
+    write_store(MarketStore(root), 5000, "20150101", "20241231")
+
+    python -m tools.synthetic_market --symbols 5000 --start 20150101 --end 20241231 --root /tmp/market/daily
+
+Bars are consistent by construction:
+- pre_close is the previous close
+- change and pct_chg follow from the rounded prices
+- daily moves stay within the board's price limit (±10%, ±20% for
+  300xxx/688xxx)
+- low <= open, close <= high
+- vol (手) grows with the size of the move
+- amount (千元) = vol x average price / 10
+
+Trading days follow an approximate SSE calendar (weekends, New Year, the
+Spring Festival week, Labour Day, National Day), or any calendar passed
+in, e.g. `REF.trade_cal`.
+"""
+import argparse
+import hashlib
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+DAILY_COLUMNS = ["ts_code", "trade_date", "open", "high", "low", "close", "pre_close",
+                 "change", "pct_chg", "vol", "amount"]
+BLOCK_DAYS = 250
+
+# Lunar New Year's Day; the exchanges close from its eve through the fifth day
+SPRING_FESTIVAL = [
+    "20000205", "20010124", "20020212", "20030201", "20040122", "20050209", "20060129", "20070218",
+    "20080207", "20090126", "20100214", "20110203", "20120123", "20130210", "20140131", "20150219",
+    "20160208", "20170128", "20180216", "20190205", "20200125", "20210212", "20220201", "20230122",
+    "20240210", "20250129", "20260217", "20270206", "20280126", "20290213", "20300203", "20310123",
+    "20320211", "20330131", "20340219", "20350208",
+]
+# (month, first day, last day) closed every year
+FIXED_HOLIDAYS = [(1, 1, 1), (5, 1, 3), (10, 1, 7)]
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_STREAM = 0xD1B54A32D192ED03
+
+
+def trading_days(start_date: str, end_date: str, calendar=None):
+    """
+    Trading days in [start_date, end_date] as a DatetimeIndex. `calendar` is
+    an iterable of YYYYMMDD open days or a trade_cal frame (cal_date,
+    is_open); without it weekdays minus the approximate SSE holidays are used.
+    """
+    import numpy as np
+    import pandas as pd
+
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+    if calendar is not None:
+        if isinstance(calendar, pd.DataFrame):
+            open_days = calendar.loc[calendar["is_open"].astype(int) == 1, "cal_date"]
+        else:
+            open_days = list(calendar)
+        days = pd.DatetimeIndex(pd.to_datetime(pd.Index(open_days).astype(str), format="%Y%m%d")).sort_values()
+        return days[(days >= start) & (days <= end)]
+    days = pd.bdate_range(start, end)
+    closed = np.zeros(len(days), dtype=bool)
+    for month, first, last in FIXED_HOLIDAYS:
+        closed |= (days.month == month) & (days.day >= first) & (days.day <= last)
+    for new_year in pd.to_datetime(SPRING_FESTIVAL, format="%Y%m%d"):
+        closed |= (days >= new_year - pd.Timedelta(days=1)) & (days <= new_year + pd.Timedelta(days=5))
+    return days[~closed]
+
+
+def synthetic_codes(n: int) -> List[str]:
+    """n distinct ts_codes, alternating Shanghai (600xxx) and Shenzhen (000xxx) main-board codes."""
+    return [f"{600000 + i // 2:06d}.SH" if i % 2 == 0 else f"{1 + i // 2:06d}.SZ" for i in range(n)]
+
+
+def price_limit(ts_code: str) -> float:
+    """Daily price limit as a fraction: 20% on ChiNext/STAR, 30% on BSE, else 10%."""
+    code = ts_code.split(".")[0]
+    if code.startswith(("300", "301", "688", "689")):
+        return 0.2
+    if ts_code.endswith(".BJ"):
+        return 0.3
+    return 0.1
+
+
+def _keys(codes: Sequence[str], seed: int):
+    import numpy as np
+
+    return np.array([int.from_bytes(hashlib.md5(f"{seed}|{c}".encode("utf-8")).digest()[:8], "little")
+                     for c in codes], dtype=np.uint64)
+
+
+def _mix(x):
+    """splitmix64 finalizer, elementwise on uint64 (wrapping arithmetic)."""
+    import numpy as np
+
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def _uniform(keys, day_numbers, stream: int):
+    """(days x symbols) float32 uniforms in (0, 1), a pure function of (key, day, stream); `_normals` uses streams < 100."""
+    import numpy as np
+
+    with np.errstate(over="ignore"):
+        x = day_numbers.astype(np.uint64)[:, None] * np.uint64(_GOLDEN) + keys[None, :]
+        x ^= np.uint64((_STREAM * (stream + 1)) & 0xFFFFFFFFFFFFFFFF)
+        _mix(x)
+    # 24 bits are plenty for noise, and float32 halves the cost of the transcendental functions
+    x >>= np.uint64(40)
+    out = x.astype("float32")
+    out += np.float32(0.5)
+    out *= np.float32(2.0 ** -24)
+    return out
+
+
+def _normals(keys, day_numbers, stream: int):
+    """Two independent standard normal matrices, by Box-Muller from a pair of uniform streams."""
+    import numpy as np
+
+    radius = _uniform(keys, day_numbers, 2 * stream)
+    np.log(radius, out=radius)
+    radius *= np.float32(-2.0)
+    np.sqrt(radius, out=radius)
+    angle = _uniform(keys, day_numbers, 2 * stream + 1)
+    angle *= np.float32(2.0 * np.pi)
+    return radius * np.cos(angle), radius * np.sin(angle)
+
+
+def base_volume(ts_codes: Sequence[str], seed: int = 0):
+    """Typical daily volume (手) of each symbol on a quiet day; log-normal around 1e5."""
+    import numpy as np
+
+    return 1e5 * np.exp(1.5 * _normals(_keys(list(ts_codes), seed), np.zeros(1, dtype=np.int64), 9)[1][0])
+
+
+def _per_symbol(values, n: int, default):
+    import numpy as np
+
+    if values is None:
+        return None if default is None else np.full(n, default, dtype="float64")
+    if np.isscalar(values):
+        return np.full(n, values, dtype="float64")
+    return np.asarray(values, dtype="float64")
+
+
+def iter_blocks(ts_codes: Union[int, Sequence[str]], start_date: str, end_date: str, seed: int = 0,
+                calendar=None, epoch: Optional[str] = None, start_price=None, list_dates=None,
+                drift: float = 0.0003, volatility: float = 0.02, suspension_rate: float = 0.0,
+                block_days: int = BLOCK_DAYS) -> Iterator[Tuple[object, List[str], Dict, object]]:
+    """
+    Yield (days, codes, {column: days x symbols matrix}, valid) blocks of
+    at most `block_days` trading days covering [start_date, end_date];
+    `valid` marks the rows that exist (listed and not suspended).
+
+    The price path starts at `epoch` (default start_date) from `start_price`
+    (scalar or one per symbol; default a log-normal price around 12). Pass a
+    fixed epoch to keep a symbol's prices identical across windows.
+    `list_dates` (YYYYMMDD or None per symbol) drops rows before listing;
+    `suspension_rate` is the probability that a listed symbol does not
+    trade on a day.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes = synthetic_codes(ts_codes) if isinstance(ts_codes, int) else list(ts_codes)
+    n = len(codes)
+    keys = _keys(codes, seed)
+    origin = np.zeros(1, dtype=np.int64)
+    base = _per_symbol(start_price, n, None)
+    if base is None:
+        base = np.round(np.exp(2.5 + 0.8 * _normals(keys, origin, 9)[0][0]), 2)
+    sigma = volatility * (0.6 + 0.8 * _uniform(keys, origin, 100)[0])
+    shares = base_volume(codes, seed)
+    limits = np.array([price_limit(c) for c in codes])
+    # keep rounded moves inside the limit
+    up, down = np.log1p(limits - 0.002), np.log1p(-(limits - 0.002))
+    listing = None
+    if list_dates is not None:
+        listed_on = pd.to_datetime(pd.Series(list(list_dates), dtype=object), format="%Y%m%d", errors="coerce")
+        since_1970 = (listed_on - pd.Timestamp("1970-01-01")).dt.days
+        listing = np.where(listed_on.isna(), np.iinfo(np.int64).min, since_1970.fillna(0)).astype(np.int64)
+
+    first = min(epoch, start_date) if epoch else start_date
+    days = trading_days(first, end_date, calendar)
+    numbers = days.to_numpy(dtype="datetime64[D]").astype(np.int64)
+    begin = int(days.searchsorted(pd.Timestamp(start_date)))
+    cum = np.zeros(n)
+    last_close = None
+    for b in range(0, len(days), block_days):
+        dn = numbers[b:b + block_days]
+        listed = np.ones((len(dn), n), dtype=bool) if listing is None else dn[:, None] >= listing[None, :]
+        traded = listed & (_uniform(keys, dn, 101) >= suspension_rate)
+        z_return, z_gap = _normals(keys, dn, 0)
+        r = np.clip(drift + sigma * z_return, down, up)
+        r = np.where(traded, r, 0.0)
+        path = cum + np.cumsum(r, axis=0)
+        cum = path[-1]
+        close = np.maximum(np.round(base * np.exp(path), 2), 0.01)
+        first_pre = last_close if last_close is not None else np.round(base * np.exp(-r[0]), 2)
+        # a suspended day repeats the last close, so the next pre_close is the last traded close
+        pre_close = np.vstack([first_pre[None, :], close[:-1]])
+        last_close = close[-1]
+        if b + len(dn) <= begin:
+            continue
+
+        gap = np.clip(0.3 * sigma * z_gap, down, up)
+        open_ = np.round(pre_close * np.exp(gap), 2)
+        z_high, z_low = _normals(keys, dn, 1)
+        wick = np.abs(0.5 * sigma * z_high)
+        ceiling, floor = np.round(pre_close * (1 + limits), 2), np.round(pre_close * (1 - limits), 2)
+        high = np.maximum(np.minimum(np.round(np.maximum(open_, close) * (1 + wick), 2), ceiling),
+                          np.maximum(open_, close))
+        wick = np.abs(0.5 * sigma * z_low)
+        low = np.minimum(np.maximum(np.round(np.minimum(open_, close) * (1 - wick), 2), floor),
+                         np.minimum(open_, close))
+        move = np.abs(close / pre_close - 1.0)
+        vol = np.round(shares * np.exp(0.4 * _normals(keys, dn, 2)[0] + 25.0 * move), 2)
+        frame = {
+            "open": open_, "high": high, "low": low, "close": close, "pre_close": pre_close,
+            "change": np.round(close - pre_close, 2), "pct_chg": np.round((close / pre_close - 1.0) * 100, 4),
+            "vol": vol, "amount": np.round(vol * (open_ + high + low + close) / 40.0, 3),
+        }
+        skip = max(0, begin - b)
+        block = days[b + skip:b + len(dn)]
+        yield block, codes, {k: v[skip:] for k, v in frame.items()}, traded[skip:]
+
+
+def generate_daily(ts_codes: Union[int, Sequence[str]], start_date: str, end_date: str, seed: int = 0,
+                   **options):
+    """
+    Long frame of synthetic bars with the `pro.daily` columns, sorted by
+    (trade_date, ts_code); ts_code and trade_date (YYYYMMDD) are ordered
+    categoricals with sorted categories, so sort_values, min/max and
+    comparisons with stored values (`trade_date >= '20240115'`) behave as on
+    strings. `options` are those of `iter_blocks`.
+    """
+    import numpy as np
+    import pandas as pd
+
+    parts = []
+    codes = []
+    day_labels = []
+    for days, codes, frame, valid in iter_blocks(ts_codes, start_date, end_date, seed, **options):
+        if valid.all():
+            rows = np.repeat(np.arange(valid.shape[0], dtype=np.int32), valid.shape[1])
+            cols = np.tile(np.arange(valid.shape[1], dtype=np.int32), valid.shape[0])
+            part = {k: v.ravel() for k, v in frame.items()}
+        else:
+            rows, cols = np.nonzero(valid)
+            part = {k: v[valid] for k, v in frame.items()}
+        part.update({"ts_code": cols, "trade_date": rows + len(day_labels)})
+        parts.append(part)
+        day_labels.extend(days.strftime("%Y%m%d"))
+    if not parts:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    data = {k: np.concatenate([p[k] for p in parts]) for k in parts[0]}
+    codes = pd.Index(codes)
+    if not codes.is_monotonic_increasing:  # recode to sorted categories, keep (date, code) row order
+        rank = np.argsort(np.argsort(codes, kind="stable")).astype(np.int32)
+        data["ts_code"] = rank[data["ts_code"]]
+        order = np.lexsort((data["ts_code"], data["trade_date"]))
+        data = {k: v[order] for k, v in data.items()}
+        codes = codes.sort_values()
+    data["ts_code"] = pd.Categorical.from_codes(data["ts_code"], categories=codes, ordered=True)
+    data["trade_date"] = pd.Categorical.from_codes(data["trade_date"], categories=day_labels, ordered=True)
+    return pd.DataFrame(data, columns=DAILY_COLUMNS)
+
+
+def write_store(store, ts_codes: Union[int, Sequence[str]], start_date: str, end_date: str, seed: int = 0,
+                progress=None, **options) -> Dict:
+    """Write synthetic days straight into a `MarketStore` (one partition per day); returns counts."""
+    import pyarrow as pa
+
+    result = {"days": 0, "rows": 0}
+    for days, codes, frame, valid in iter_blocks(ts_codes, start_date, end_date, seed, **options):
+        names = pa.array(codes, pa.string())
+        for i, day in enumerate(days.strftime("%Y%m%d")):
+            mask = valid[i]
+            table = pa.table({"ts_code": names.filter(mask), **{k: v[i][mask] for k, v in frame.items()}})
+            result["rows"] += store.write_day(day, table)
+            result["days"] += 1
+        if progress:
+            progress(f"[synthetic] {result['days']} days, {result['rows']:,} rows written")
+    return result
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    from .market_store import MarketStore, STORE_DIR
+
+    parser = argparse.ArgumentParser(description="Write synthetic daily bars into a market store")
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--start", required=True, help="YYYYMMDD")
+    parser.add_argument("--end", required=True, help="YYYYMMDD")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--suspension-rate", type=float, default=0.0)
+    parser.add_argument("--root", default=STORE_DIR, help="store directory (default: the real market store)")
+    args = parser.parse_args(argv)
+    result = write_store(MarketStore(args.root), args.symbols, args.start, args.end, seed=args.seed,
+                         suspension_rate=args.suspension_rate, progress=print)
+    print(f"[synthetic] wrote {result['days']} days, {result['rows']:,} rows to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
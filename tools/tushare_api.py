@@ -10,6 +10,9 @@ def _load_token_from_env() -> Optional[str]:
     return os.getenv("TUSHARE_TOKEN")
 
 def _ensure_tushare_initialized():
+    from .stub_tushare import stub_enabled, pro_api
+    if stub_enabled():
+        return pro_api()
     import tushare as ts
     token = _load_token_from_env()
     if token:
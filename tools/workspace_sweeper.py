@@ -0,0 +1,177 @@
+"""
+Retention for the per-run folders under workspace/temp_scripts and
+workspace/exports: entries older than the age limit are removed, then the
+oldest ones until the directory fits its size budget. Runs that are still
+executing are never touched.
+
+Limits come from the environment (0 disables a limit):
+    FINDATA_SCRIPTS_RETENTION_HOURS / FINDATA_SCRIPTS_RETENTION_MB   (24 h / 256 MB)
+    FINDATA_EXPORTS_RETENTION_HOURS / FINDATA_EXPORTS_RETENTION_MB   (168 h / 2048 MB)
+    FINDATA_SWEEP_INTERVAL                                           (600 s)
+"""
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir))
+WORKSPACE_DIR = os.path.join(ROOT_DIR, "workspace")
+
+
+@dataclass
+class RetentionPolicy:
+    directory: str
+    max_age_seconds: float
+    max_bytes: int
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def default_policies() -> List[RetentionPolicy]:
+    mb, hour = 1024 * 1024, 3600
+    return [
+        RetentionPolicy(os.path.join(WORKSPACE_DIR, "temp_scripts"),
+                        _env_float("FINDATA_SCRIPTS_RETENTION_HOURS", 24) * hour,
+                        int(_env_float("FINDATA_SCRIPTS_RETENTION_MB", 256) * mb)),
+        RetentionPolicy(os.path.join(WORKSPACE_DIR, "exports"),
+                        _env_float("FINDATA_EXPORTS_RETENTION_HOURS", 168) * hour,
+                        int(_env_float("FINDATA_EXPORTS_RETENTION_MB", 2048) * mb)),
+    ]
+
+
+def _entry_usage(path: str) -> Tuple[int, float]:
+    """(total bytes, newest mtime) of a file or directory tree."""
+    try:
+        st = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return 0, 0.0
+    if not os.path.isdir(path) or os.path.islink(path):
+        return st.st_size, st.st_mtime
+    size, newest = 0, st.st_mtime
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                fst = os.stat(os.path.join(dirpath, name), follow_symlinks=False)
+            except OSError:
+                continue
+            size += fst.st_size
+            newest = max(newest, fst.st_mtime)
+    return size, newest
+
+
+def _remove(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def sweep(policy: RetentionPolicy, protect: Iterable[str] = (), now: Optional[float] = None) -> Dict:
+    """
+    Apply one policy to the direct children of `policy.directory`.
+    Names in `protect` (active run ids) and dot-files are skipped.
+    """
+    now = time.time() if now is None else now
+    protected = set(protect)
+    result = {"directory": policy.directory, "removed": 0, "freed_bytes": 0, "kept": 0, "kept_bytes": 0}
+    try:
+        names = os.listdir(policy.directory)
+    except OSError:
+        return result
+
+    entries = []
+    for name in names:
+        if name.startswith("."):
+            continue
+        path = os.path.join(policy.directory, name)
+        size, mtime = _entry_usage(path)
+        entries.append((mtime, size, name, path))
+    entries.sort()
+
+    total = sum(size for _, size, _, _ in entries)
+    for mtime, size, name, path in entries:
+        if name in protected:
+            continue
+        too_old = policy.max_age_seconds and now - mtime > policy.max_age_seconds
+        too_big = policy.max_bytes and total > policy.max_bytes
+        if not (too_old or too_big):
+            continue
+        _remove(path)
+        total -= size
+        result["removed"] += 1
+        result["freed_bytes"] += size
+
+    result["kept"] = len(entries) - result["removed"]
+    result["kept_bytes"] = total
+    return result
+
+
+class WorkspaceSweeper:
+    """Daemon thread applying the retention policies every `interval` seconds."""
+
+    def __init__(self, policies: Optional[List[RetentionPolicy]] = None,
+                 protect: Callable[[], Iterable[str]] = lambda: (),
+                 interval: Optional[float] = None):
+        self.policies = policies or default_policies()
+        self.protect = protect
+        self.interval = interval if interval is not None else _env_float("FINDATA_SWEEP_INTERVAL", 600)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {"sweeps": 0, "removed": 0, "freed_bytes": 0, "last_sweep": None}
+
+    def sweep_once(self) -> List[Dict]:
+        with self._lock:
+            protected = set(self.protect())
+            results = [sweep(p, protected) for p in self.policies]
+            self._stats["sweeps"] += 1
+            self._stats["removed"] += sum(r["removed"] for r in results)
+            self._stats["freed_bytes"] += sum(r["freed_bytes"] for r in results)
+            self._stats["last_sweep"] = time.time()
+            return results
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep_once()
+            except Exception as e:
+                print(f"[sweeper] {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._loop, name="workspace-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            usage = {os.path.basename(p.directory): _entry_usage(p.directory)[0] for p in self.policies}
+            return dict(self._stats, bytes=usage)
+
+
+_sweeper: Optional[WorkspaceSweeper] = None
+_sweeper_lock = threading.Lock()
+
+
+def ensure_sweeper(protect: Callable[[], Iterable[str]] = lambda: ()) -> WorkspaceSweeper:
+    """Start the process-wide sweeper once; later calls return it."""
+    global _sweeper
+    with _sweeper_lock:
+        if _sweeper is None:
+            _sweeper = WorkspaceSweeper(protect=protect)
+            _sweeper.start()
+        return _sweeper